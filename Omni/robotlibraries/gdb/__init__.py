@@ -1,3 +1,6 @@
 from .gdb_control import (
     gdb,
 )
+from .async_gdb import (
+    AsyncGdb,
+)
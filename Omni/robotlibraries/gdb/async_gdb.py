@@ -0,0 +1,290 @@
+import asyncio
+import itertools
+import os
+import numpy
+from collections import OrderedDict
+from pygdbmi import gdbmiparser
+from pygdbmi.constants import GdbTimeoutError, DEFAULT_GDB_TIMEOUT_SEC
+from .gdb_control import build_break_insert_cmd, print_format_flag
+from .mi_responses import (OPEN_OCD, GdbResponseError, GdbBreakpointNotStopped, save_as_json, result_record,
+                           verify_server_connection, verify_elf_loaded, parse_gdb_version, parse_working_dir,
+                           parse_server_type, parse_print_value, parse_program_state, verify_done_response,
+                           verify_load_elf_response, verify_connect_response, verify_continue_response,
+                           verify_reset_halt_response, verify_break_insert_response, verify_break_delete_response,
+                           verify_change_working_dir_response)
+from .source_utility import line_of_test_tag, verify_source_file, resolve_line_number
+from .mi_events import MiEventStream
+from .run_state import TargetRunState, STATE_RUNNING
+from .memory import (GdbMemoryReadError, MEMORY_READ_CHUNK_SIZE, memory_address_expression,
+                     build_read_memory_cmds, decode_memory_blocks)
+
+
+STREAM_READER_LIMIT = 2 ** 24
+
+
+class AsyncGdb:
+    """asyncio gdb client with the operations of the blocking gdb library.
+
+    A single reader task parses the MI output of the gdb subprocess and
+    resolves awaiting commands by MI token, so several targets can be
+    driven from one event loop:
+
+        async with AsyncGdb() as board_a, AsyncGdb() as board_b:
+            await asyncio.gather(board_a.flash(), board_b.flash())
+    """
+
+    def __init__(self, gdb_path='/usr/local/bin/arm-none-eabi-gdb', gdb_args=("--interpreter=mi3",)):
+        self.command = [gdb_path, *gdb_args]
+        self.server = ""
+        self.connected_to_server = False
+        self.elf_loaded = False
+        self.working_dir = ""
+        self.logfile_path = ""
+        self.logfile_dir = ""
+        self.version = ""
+        self.run_state = TargetRunState()
+        self.events = MiEventStream()
+        self.process = None
+        self.__tokens = itertools.count(1)
+        self.__pending = OrderedDict()
+        self.__unassigned = []
+        self.__stop_records = None
+        self.__reader_task = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.exit()
+
+    async def start(self):
+        self.__stop_records = asyncio.Queue()
+        self.process = await asyncio.create_subprocess_exec(
+            *self.command, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL, limit=STREAM_READER_LIMIT)
+        self.__reader_task = asyncio.create_task(self.__read_output())
+        self.version = parse_gdb_version(await self.write("-gdb-version"))
+        await self.write("-gdb-set mi-async on")
+        await self.get_working_dir()
+
+    async def exit(self):
+        if (self.process is None):
+            return
+        if (self.process.returncode is None):
+            self.process.terminate()
+            await self.process.wait()
+        await self.__reader_task
+        self.process = None
+
+    async def write(self, command, timeout_sec=DEFAULT_GDB_TIMEOUT_SEC):
+        token = next(self.__tokens)
+        future = asyncio.get_running_loop().create_future()
+        self.__pending[token] = future
+        self.process.stdin.write(f"{token}{command}\n".encode())
+        await self.process.stdin.drain()
+        try:
+            return await asyncio.wait_for(future, timeout_sec)
+        except asyncio.TimeoutError:
+            self.__pending.pop(token, None)
+            raise GdbTimeoutError(
+                "Did not get result record from gdb after %s seconds" % timeout_sec)
+
+    async def __read_output(self):
+        while True:
+            line = await self.process.stdout.readline()
+            if (line == b""):
+                break
+            text = line.decode(errors="replace").rstrip("\r\n")
+            if (text.strip() == "" or gdbmiparser.response_is_finished(text)):
+                continue
+            record = gdbmiparser.parse_response(text)
+            record["stream"] = "stdout"
+            self.__dispatch(record)
+        for future in self.__pending.values():
+            if (not future.done()):
+                future.set_exception(ConnectionError("gdb process exited"))
+        self.__pending.clear()
+
+    def __dispatch(self, record):
+        if (record["type"] == "notify" and record["message"] in ("running", "stopped")):
+            self.__track_run_state(record)
+        elif (record["type"] == "result" and record["message"] == "running"):
+            # *running may be read after the command returned at ^running.
+            self.run_state.set_state(STATE_RUNNING)
+        if (record["type"] != "result"):
+            self.events.publish(record)
+            if (len(self.__pending) != 0):
+                self.__unassigned.append(record)
+            return
+        token = record.get("token")
+        if (token is None and len(self.__pending) != 0):
+            token = next(iter(self.__pending))
+        records = self.__unassigned + [record]
+        self.__unassigned = []
+        future = self.__pending.pop(token, None)
+        if (future is not None and not future.done()):
+            future.set_result(records)
+
+    def __track_run_state(self, record):
+        self.run_state.update(record)
+        if (record["message"] == "stopped"):
+            self.__stop_records.put_nowait(record["payload"])
+
+    def __clear_stop_records(self):
+        while (not self.__stop_records.empty()):
+            self.__stop_records.get_nowait()
+
+    async def __wait_for_stop(self, timeout_sec):
+        try:
+            return await asyncio.wait_for(self.__stop_records.get(), timeout_sec)
+        except asyncio.TimeoutError:
+            raise GdbTimeoutError(
+                "Did not get *stopped record from gdb after %s seconds" % timeout_sec)
+
+    async def get_working_dir(self):
+        self.working_dir = parse_working_dir(await self.write("pwd"))
+
+    async def load_elf_file(self, path, timeout_sec=10):
+        verify_load_elf_response(await self.write("-file-exec-and-symbols "+path, timeout_sec), self.logfile_dir)
+        self.elf_loaded = True
+
+    async def set_log_file_path(self, log_file_path):
+        response_list = await self.write("-gdb-set logging file "+log_file_path)
+        verify_done_response(response_list, "set_log_file_path", self.logfile_dir)
+        self.logfile_path = log_file_path
+        self.logfile_dir = os.path.dirname(self.logfile_path)
+
+    async def start_logging(self):
+        verify_done_response(await self.write("-gdb-set logging on"), "start_logging", self.logfile_dir)
+
+    async def stop_logging(self):
+        verify_done_response(await self.write("-gdb-set logging off"), "stop_logging", self.logfile_dir)
+
+    async def connect(self, ip, port, timeout_sec=DEFAULT_GDB_TIMEOUT_SEC):
+        try:
+            response_list = await self.write(f"-target-select extended-remote {ip}:{port}", timeout_sec)
+        except GdbTimeoutError:
+            raise ConnectionError(f"Timeout connecting to {ip}:{port}")
+        verify_connect_response(response_list, self.logfile_dir)
+        self.server = await self.__get_server_type()
+        self.connected_to_server = True
+
+    async def __get_server_type(self):
+        return parse_server_type(await self.write("monitor version")) or \
+            parse_server_type(await self.write("monitor help"))
+
+    async def flash(self, timeout_sec=60):
+        verify_server_connection(self.connected_to_server)
+        verify_elf_loaded(self.elf_loaded)
+        response_list = await self.write("-target-download", timeout_sec)
+        result = result_record(response_list)
+        if (result is None or result["message"] != "done"):
+            raise GdbResponseError("Unexpected GDB response in flash.", self.logfile_dir,
+                                   response_list, "malformed_flash.json")
+
+    async def continue_execution(self):
+        verify_server_connection(self.connected_to_server)
+        verify_elf_loaded(self.elf_loaded)
+        await self.__execute_continue_cmd("continue_execution")
+
+    async def __execute_continue_cmd(self, keyword):
+        self.__clear_stop_records()
+        verify_continue_response(await self.write("-exec-continue"), keyword, self.logfile_dir)
+
+    async def continue_until_breakpoint(self, timeout_sec=1):
+        verify_server_connection(self.connected_to_server)
+        await self.__execute_continue_cmd("continue_until_breakpoint")
+        stop = await self.__wait_for_stop(timeout_sec)
+        if (stop.get("reason") != "breakpoint-hit"):
+            raise GdbResponseError("Unexpected GDB response in continue_until_breakpoint",
+                                   self.logfile_dir, [stop], "malformed_continue_until_breakpoint.json")
+
+    async def reset_halt(self):
+        verify_server_connection(self.connected_to_server)
+        if (self.server != OPEN_OCD):
+            raise NotImplementedError("monitor reset halt not implemented for " + self.server)
+        verify_reset_halt_response(await self.write("monitor reset halt"), self.logfile_dir)
+        # Monitor commands change the target state behind gdb's back.
+        self.run_state.reset()
+
+    async def pause(self, timeout_sec=DEFAULT_GDB_TIMEOUT_SEC):
+        self.__clear_stop_records()
+        response_list = await self.write("-exec-interrupt")
+        if (response_list[-1]["message"] != "done"):
+            raise GdbResponseError("Unexpected GDB response in pause", self.logfile_dir,
+                                   response_list, "malformed_pause.json")
+        stop = await self.__wait_for_stop(timeout_sec)
+        if (stop.get("signal-name") != "SIGINT"):
+            raise GdbResponseError("Unexpected GDB response in pause", self.logfile_dir,
+                                   [stop], "malformed_pause.json")
+
+    async def get_program_state(self):
+        verify_server_connection(self.connected_to_server)
+        if (self.run_state.is_known()):
+            return self.run_state.state
+        state, breakpoint_number = parse_program_state(await self.write("info program"), self.logfile_dir)
+        if (state == "running"):
+            self.run_state.set_state(STATE_RUNNING)
+        else:
+            self.run_state.confirm_stopped(breakpoint_number)
+        return state
+
+    def get_stop_info(self):
+        return self.run_state.stop_info()
+
+    async def insert_breakpoint(self, source_file_path, line_number=-1, break_type="", tag=""):
+        verify_source_file(source_file_path)
+        line_number = resolve_line_number(source_file_path, tag, line_number)
+        bp_cmd = build_break_insert_cmd(os.path.basename(source_file_path), line_number, break_type)
+        return verify_break_insert_response(await self.write(bp_cmd), self.logfile_dir)
+
+    async def stopped_at_breakpoint_with_tag(self, source_file_path, tag):
+        if (self.run_state.is_stopped_at_breakpoint() == False):
+            raise GdbBreakpointNotStopped(
+                "Error stopped_at_breakpoint_with_tag: Program is not stopped at breakpoint")
+        line = line_of_test_tag(tag, source_file_path)
+        bp_filename = os.path.basename(self.run_state.fullname or self.run_state.file)
+        return line == self.run_state.line and bp_filename == os.path.basename(source_file_path)
+
+    async def delete_all_breakpoints(self):
+        verify_break_delete_response(await self.write("-break-delete"), self.logfile_dir)
+
+    async def next(self, timeout_sec=DEFAULT_GDB_TIMEOUT_SEC):
+        self.__clear_stop_records()
+        response_list = await self.write("-exec-next")
+        if (response_list[-1]["message"] == "running"):
+            stop = await self.__wait_for_stop(timeout_sec)
+            if (stop.get("reason") == "end-stepping-range"):
+                return
+            response_list.append(stop)
+        raise GdbResponseError("Unexpected GDB response in next",
+                               self.logfile_dir, response_list, "malformed_next.json")
+
+    async def get_variable_value(self, variable_name, format):
+        return await self.get_object_value(variable_name, format)
+
+    async def get_object_value(self, object_name, format):
+        print_type = print_format_flag(format)
+        return parse_print_value(await self.write("print "+print_type+" "+object_name))
+
+    async def read_memory(self, address_or_symbol, length, dtype=None, chunk_size=MEMORY_READ_CHUNK_SIZE):
+        address_expression = memory_address_expression(address_or_symbol)
+        commands = build_read_memory_cmds(address_expression, int(length), int(chunk_size))
+        response_lists = await asyncio.gather(*[self.write(c) for c in commands])
+        for response_list in response_lists:
+            if (response_list[-1]["message"] == "error"):
+                raise GdbMemoryReadError(
+                    f"Error reading memory at {address_expression}: {response_list[-1]['payload']['msg']}")
+        data = decode_memory_blocks([r[-1] for r in response_lists], int(length), int(chunk_size))
+        if (dtype is None):
+            return data
+        return numpy.frombuffer(data, dtype=dtype)
+
+    async def change_working_dir(self, directory):
+        verify_change_working_dir_response(await self.write("cd "+directory), self.logfile_dir)
+        self.working_dir = directory
+
+    async def send_command(self, command, response_file):
+        self.run_state.reset()
+        save_as_json(await self.write(command), response_file)
@@ -0,0 +1,83 @@
+import os
+import threading
+
+
+BREAKPOINT_NOTIFICATIONS = ["breakpoint-created", "breakpoint-modified", "breakpoint-deleted"]
+
+
+class BreakpointTable:
+    """Local mirror of gdb's breakpoint table.
+
+    Filled from -break-insert results and =breakpoint-* notifications and
+    indexed by number, by (source file name, line) and by test tag, so
+    breakpoint lookups need neither a -break-list round trip nor a scan of
+    the source file.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__by_number = {}
+        self.__by_location = {}
+        self.__tag_lines = {}
+
+    def add(self, bkpt):
+        with self.__lock:
+            self.__remove(bkpt["number"])
+            self.__by_number[bkpt["number"]] = bkpt
+            self.__by_location.setdefault(breakpoint_location(bkpt), set()).add(bkpt["number"])
+
+    def remember_tag(self, source_file_path, tag, line_number):
+        self.__tag_lines[tag_key(source_file_path, tag)] = int(line_number)
+
+    def remove(self, number):
+        with self.__lock:
+            self.__remove(number)
+
+    def clear(self):
+        with self.__lock:
+            self.__by_number.clear()
+            self.__by_location.clear()
+
+    def update(self, event):
+        if (event["message"] == "breakpoint-deleted"):
+            self.remove(event["payload"]["id"])
+        elif (event["message"] in ("breakpoint-created", "breakpoint-modified")):
+            bkpt = event["payload"]["bkpt"]
+            if (bkpt["number"] in self.__by_number or event["message"] == "breakpoint-created"):
+                self.add(bkpt)
+
+    def get(self, number):
+        return self.__by_number.get(str(number))
+
+    def numbers_at(self, source_file, line_number):
+        return sorted(self.__by_location.get((os.path.basename(source_file), int(line_number)), ()), key=int)
+
+    def tag_line(self, source_file_path, tag):
+        return self.__tag_lines.get(tag_key(source_file_path, tag))
+
+    def breakpoints(self):
+        return list(self.__by_number.values())
+
+    def __len__(self):
+        return len(self.__by_number)
+
+    def __remove(self, number):
+        bkpt = self.__by_number.pop(number, None)
+        if (bkpt is None):
+            return
+        numbers = self.__by_location.get(breakpoint_location(bkpt), set())
+        numbers.discard(number)
+        if (len(numbers) == 0):
+            self.__by_location.pop(breakpoint_location(bkpt), None)
+
+
+def breakpoint_location(bkpt):
+    location = bkpt
+    if ("line" not in bkpt and len(bkpt.get("locations", [])) != 0):
+        location = bkpt["locations"][0]
+    file_name = os.path.basename(location.get("fullname", location.get("file", "")))
+    return file_name, int(location.get("line", -1))
+
+
+def tag_key(source_file_path, tag):
+    return os.path.abspath(source_file_path), tag
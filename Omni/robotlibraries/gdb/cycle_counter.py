@@ -0,0 +1,33 @@
+import numpy
+
+
+DEMCR_ADDRESS = 0xe000edfc
+DEMCR_TRCENA = 0x01000000
+DWT_CTRL_ADDRESS = 0xe0001000
+DWT_CTRL_CYCCNTENA = 0x1
+DWT_CYCCNT_ADDRESS = 0xe0001004
+CYCCNT_MASK = 0xffffffff
+CYCLE_PERCENTILES = (50, 90, 99)
+
+
+def build_enable_cyccnt_cmds():
+    # TRCENA powers the DWT, CYCCNTENA starts the counter. Other bits are kept.
+    return [f'-data-evaluate-expression "*(unsigned int *){hex(address)} |= {hex(bit)}"'
+            for address, bit in ((DEMCR_ADDRESS, DEMCR_TRCENA), (DWT_CTRL_ADDRESS, DWT_CTRL_CYCCNTENA))]
+
+
+def cycle_delta(start, end):
+    """Cycles between two CYCCNT reads, allowing for one wrap of the 32 bit counter."""
+    return (end - start) & CYCCNT_MASK
+
+
+def cycle_statistics(cycles, percentiles=CYCLE_PERCENTILES):
+    if (len(cycles) == 0):
+        raise ValueError("No cycle counts measured")
+    values = numpy.asarray(cycles, dtype=numpy.int64)
+    statistics = {"iterations": len(cycles), "min": int(values.min()), "mean": float(values.mean()),
+                  "max": int(values.max()), "std": float(values.std())}
+    for percentile, value in zip(percentiles, numpy.percentile(values, percentiles)):
+        statistics[f"p{percentile}"] = float(value)
+    statistics["cycles"] = [int(c) for c in cycles]
+    return statistics
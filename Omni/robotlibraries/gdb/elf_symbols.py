@@ -0,0 +1,221 @@
+import bisect
+import hashlib
+import json
+import struct
+from collections import Counter, namedtuple
+
+
+SYMBOL_CACHE_SUFFIX = ".omni-symbols.json"
+SYMBOL_CACHE_VERSION = 3
+HASH_CHUNK_SIZE = 1 << 20
+
+SHT_SYMTAB = 2
+SHT_NOBITS = 8
+SHF_ALLOC = 2
+PT_LOAD = 1
+STT_NOTYPE = 0
+STT_OBJECT = 1
+STT_FUNC = 2
+STB_LOCAL = 0
+EM_ARM = 40
+SHN_UNDEF = 0
+
+ElfSymbol = namedtuple("ElfSymbol", ["name", "address", "size", "type", "binding"])
+ElfSection = namedtuple("ElfSection", ["name", "address", "load_address", "size", "offset"])
+ElfHeader = namedtuple("ElfHeader", ["is_64_bit", "endian", "machine", "sections", "segments", "shstrndx"])
+
+
+class ElfFormatError(Exception):
+    pass
+
+
+class ElfSymbolIndex:
+    """Name and address index over the symbol table of an ELF file.
+
+    Function lookups by address use a binary search over the sorted start
+    addresses, so no gdb round trip is needed to map a PC to a function.
+    """
+
+    def __init__(self, symbols, elf_sha256=""):
+        self.elf_sha256 = elf_sha256
+        self.__all = list(symbols)
+        self.__definitions = Counter(symbol.name for symbol in self.__all)
+        self.__by_name = {}
+        for symbol in self.__all:
+            known = self.__by_name.get(symbol.name)
+            if (known is None or (known.binding == STB_LOCAL and symbol.binding != STB_LOCAL)):
+                self.__by_name[symbol.name] = symbol
+        self.__functions = sorted((s for s in self.__all if s.type == STT_FUNC), key=lambda s: s.address)
+        self.__function_addresses = [s.address for s in self.__functions]
+        self.__sized = sorted((s for s in self.__by_name.values() if s.size != 0), key=lambda s: s.address)
+        self.__sized_addresses = [s.address for s in self.__sized]
+
+    @classmethod
+    def load(cls, elf_path, cache_path=None):
+        cache_path = cache_path or elf_path + SYMBOL_CACHE_SUFFIX
+        elf_sha256 = file_sha256(elf_path)
+        index = cls.__load_cache(cache_path, elf_sha256)
+        if (index is None):
+            with open(elf_path, "rb") as elf_file:
+                index = cls(read_elf_symbols(elf_file.read()), elf_sha256)
+            index.save(cache_path)
+        return index
+
+    @classmethod
+    def __load_cache(cls, cache_path, elf_sha256):
+        try:
+            with open(cache_path) as cache_file:
+                cache = json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+        if (cache.get("version") != SYMBOL_CACHE_VERSION or cache.get("elf_sha256") != elf_sha256):
+            return None
+        return cls([ElfSymbol(*s) for s in cache["symbols"]], elf_sha256)
+
+    def save(self, cache_path):
+        cache = {"version": SYMBOL_CACHE_VERSION, "elf_sha256": self.elf_sha256,
+                 "symbols": [list(s) for s in self.__all]}
+        try:
+            with open(cache_path, "w") as cache_file:
+                json.dump(cache, cache_file)
+        except OSError:
+            # A read-only build directory only costs the next load a re-parse.
+            pass
+
+    def symbols(self):
+        return sorted(self.__by_name.values(), key=lambda s: (s.address, s.name))
+
+    def lookup(self, name):
+        return self.__by_name.get(name)
+
+    def global_symbol(self, name):
+        """The symbol of name if it is its only definition and global. A file
+        static of the same name may shadow it in gdb, so None then."""
+        symbol = self.__by_name.get(name)
+        if (symbol is None or symbol.binding == STB_LOCAL or self.__definitions[name] != 1):
+            return None
+        return symbol
+
+    def function_at(self, address):
+        position = bisect.bisect_right(self.__function_addresses, address) - 1
+        if (position < 0):
+            return None
+        function = self.__functions[position]
+        if (function.size != 0 and address >= function.address + function.size):
+            return None
+        return function
+
+    def symbols_in(self, start, end):
+        """Symbols overlapping the address range [start, end)."""
+        position = max(bisect.bisect_right(self.__sized_addresses, start) - 1, 0)
+        overlapping = []
+        for symbol in self.__sized[position:bisect.bisect_left(self.__sized_addresses, end)]:
+            if (symbol.address + symbol.size > start):
+                overlapping.append(symbol)
+        return overlapping
+
+    def __contains__(self, name):
+        return name in self.__by_name
+
+    def __len__(self):
+        return len(self.__by_name)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as elf_file:
+        for chunk in iter(lambda: elf_file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_elf_header(data):
+    if (data[:4] != b"\x7fELF"):
+        raise ElfFormatError("Not an ELF file: bad magic number")
+    is_64_bit = data[4] == 2
+    endian = "<" if data[5] == 1 else ">"
+    e_machine, = struct.unpack_from(endian + "H", data, 18)
+    if (is_64_bit):
+        e_phoff, e_shoff = struct.unpack_from(endian + "QQ", data, 32)
+        e_phentsize, e_phnum, e_shentsize, e_shnum, e_shstrndx = struct.unpack_from(endian + "HHHHH", data, 54)
+        section_format = endian + "IIQQQQIIQQ"
+    else:
+        e_phoff, e_shoff = struct.unpack_from(endian + "II", data, 28)
+        e_phentsize, e_phnum, e_shentsize, e_shnum, e_shstrndx = struct.unpack_from(endian + "HHHHH", data, 42)
+        section_format = endian + "IIIIIIIIII"
+    sections = [struct.unpack_from(section_format, data, e_shoff + i * e_shentsize)
+                for i in range(e_shnum)]
+    segments = []
+    for i in range(e_phnum):
+        if (is_64_bit):
+            p_type, _, p_offset, p_vaddr, p_paddr, p_filesz, p_memsz, _ = struct.unpack_from(
+                endian + "IIQQQQQQ", data, e_phoff + i * e_phentsize)
+        else:
+            p_type, p_offset, p_vaddr, p_paddr, p_filesz, p_memsz, _, _ = struct.unpack_from(
+                endian + "IIIIIIII", data, e_phoff + i * e_phentsize)
+        segments.append((p_type, p_offset, p_vaddr, p_paddr, p_filesz, p_memsz))
+    return ElfHeader(is_64_bit, endian, e_machine, sections, segments, e_shstrndx)
+
+
+def read_elf_symbols(data):
+    header = read_elf_header(data)
+    symbols = []
+    for section in header.sections:
+        if (section[1] != SHT_SYMTAB):
+            continue
+        strtab = header.sections[section[6]]
+        symbols += read_symbol_table(data, section, strtab, header.endian, header.is_64_bit,
+                                     header.machine == EM_ARM)
+    return symbols
+
+
+def read_elf_sections(data):
+    """Sections whose contents are programmed into the target.
+
+    load_address is where the contents are stored (the LMA), which differs
+    from address for initialized data copied to RAM at startup.
+    """
+    header = read_elf_header(data)
+    shstrtab_offset = header.sections[header.shstrndx][4] if header.shstrndx < len(header.sections) else 0
+    sections = []
+    for section in header.sections:
+        sh_name, sh_type, sh_flags, sh_addr, sh_offset, sh_size = section[:6]
+        if (sh_type == SHT_NOBITS or not sh_flags & SHF_ALLOC or sh_size == 0):
+            continue
+        name = data[shstrtab_offset + sh_name:data.index(b"\0", shstrtab_offset + sh_name)].decode(errors="replace")
+        sections.append(ElfSection(name, sh_addr, section_load_address(header.segments, sh_offset, sh_addr),
+                                   sh_size, sh_offset))
+    return sections
+
+
+def section_load_address(segments, offset, address):
+    for p_type, p_offset, p_vaddr, p_paddr, p_filesz, _ in segments:
+        if (p_type == PT_LOAD and p_offset <= offset < p_offset + p_filesz):
+            return p_paddr + offset - p_offset
+    return address
+
+
+def read_symbol_table(data, symtab, strtab, endian, is_64_bit, is_arm):
+    offset, size, entry_size = symtab[4], symtab[5], symtab[9]
+    strtab_offset = strtab[4]
+    symbols = []
+    for entry in range(offset + entry_size, offset + size, entry_size):
+        if (is_64_bit):
+            st_name, st_info, _, st_shndx, st_value, st_size = struct.unpack_from(
+                endian + "IBBHQQ", data, entry)
+        else:
+            st_name, st_value, st_size, st_info, _, st_shndx = struct.unpack_from(
+                endian + "IIIBBH", data, entry)
+        symbol_type = st_info & 0xf
+        binding = st_info >> 4
+        # Untyped globals are linker script symbols such as _estack.
+        is_linker_symbol = symbol_type == STT_NOTYPE and binding != STB_LOCAL
+        if ((symbol_type not in (STT_OBJECT, STT_FUNC) and not is_linker_symbol) or st_shndx == SHN_UNDEF):
+            continue
+        name_end = data.index(b"\0", strtab_offset + st_name)
+        name = data[strtab_offset + st_name:name_end].decode(errors="replace")
+        if (is_arm and symbol_type == STT_FUNC):
+            # Bit 0 of a Thumb function address only selects the instruction set.
+            st_value &= ~1
+        symbols.append(ElfSymbol(name, st_value, st_size, symbol_type, binding))
+    return symbols
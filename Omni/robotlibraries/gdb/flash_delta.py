@@ -0,0 +1,92 @@
+import bisect
+import re
+from .elf_symbols import read_elf_sections
+
+
+FLASH_WRITE_TIMEOUT_SEC = 30
+ERASED_BYTE = 0xff
+FLASH_BANK_PATTERN = re.compile(r"^#(\d+)\s*:.*? at (0x[0-9a-fA-F]+), size (0x[0-9a-fA-F]+)", re.MULTILINE)
+FLASH_SECTOR_PATTERN = re.compile(r"^\s*#\s*\d+:\s*(0x[0-9a-fA-F]+)\s+\((0x[0-9a-fA-F]+)", re.MULTILINE)
+
+
+class FlashLayoutError(Exception):
+    pass
+
+
+def build_flash_banks_cmd():
+    return "monitor flash banks"
+
+
+def parse_flash_banks(text):
+    """Bank numbers listed by build_flash_banks_cmd."""
+    return [int(m.group(1)) for m in FLASH_BANK_PATTERN.finditer(text)]
+
+
+def build_flash_info_cmd(bank):
+    return f"monitor flash info {bank}"
+
+
+def parse_flash_info(text):
+    """Erase sectors of a bank as (start address, size) pairs. OpenOCD
+    lists sector offsets relative to the bank base."""
+    bank = FLASH_BANK_PATTERN.search(text)
+    if (bank is None):
+        return []
+    base = int(bank.group(2), 16)
+    return [(base + int(m.group(1), 16), int(m.group(2), 16)) for m in FLASH_SECTOR_PATTERN.finditer(text)]
+
+
+def uniform_sectors(elf_data, sector_size):
+    """Equal sized sectors covering the image, for flash drivers that do
+    not report their layout."""
+    starts = set()
+    for section in read_elf_sections(elf_data):
+        first = section.load_address - section.load_address % sector_size
+        starts.update(range(first, section.load_address + section.size, sector_size))
+    return [(start, sector_size) for start in sorted(starts)]
+
+
+def image_sectors(elf_data, layout):
+    """Contents of every erase sector the image touches, keyed by sector
+    start address. layout is the sorted list of (start, size) sectors.
+    Bytes the image does not cover read as erased flash."""
+    starts = [start for start, _ in layout]
+    sectors = {}
+    for section in read_elf_sections(elf_data):
+        contents = elf_data[section.offset:section.offset + section.size]
+        address = section.load_address
+        while (len(contents) != 0):
+            index = bisect.bisect_right(starts, address) - 1
+            if (index < 0 or address >= layout[index][0] + layout[index][1]):
+                raise FlashLayoutError(f"Section {section.name} at {hex(address)} is outside the flash sectors")
+            sector_start, sector_size = layout[index]
+            sector = sectors.setdefault(sector_start, bytearray([ERASED_BYTE]) * sector_size)
+            count = min(len(contents), sector_start + sector_size - address)
+            sector[address - sector_start:address - sector_start + count] = contents[:count]
+            address += count
+            contents = contents[count:]
+    return sectors
+
+
+def changed_sectors(old_sectors, new_sectors):
+    return sorted(start for start, contents in new_sectors.items() if old_sectors.get(start) != contents)
+
+
+def sector_runs(sectors, sector_starts):
+    """Merge adjacent sectors into (start address, length) runs."""
+    runs = []
+    for start in sorted(sector_starts):
+        if (len(runs) != 0 and runs[-1][0] + runs[-1][1] == start):
+            runs[-1] = (runs[-1][0], runs[-1][1] + len(sectors[start]))
+        else:
+            runs.append((start, len(sectors[start])))
+    return runs
+
+
+def run_contents(sectors, run):
+    start, length = run
+    return b"".join(sectors[address] for address in sorted(sectors) if start <= address < start + length)
+
+
+def build_write_image_cmd(bin_path, address):
+    return f"monitor flash write_image erase {bin_path} {hex(address)} bin"
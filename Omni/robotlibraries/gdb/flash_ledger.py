@@ -0,0 +1,76 @@
+import hashlib
+import json
+import os
+import re
+from .elf_symbols import read_elf_sections
+
+
+FLASH_LEDGER_DIR = os.path.join(os.path.expanduser("~"), ".cache", "omni", "flash-ledger")
+COMPARE_SECTION_PATTERN = re.compile(r"Section (\S+), range (0x[0-9a-fA-F]+) -- (0x[0-9a-fA-F]+): (matched|MIS-MATCHED)")
+
+
+def section_hashes(elf_data):
+    """sha256 of every section programmed into the target, by section name."""
+    hashes = {}
+    for section in read_elf_sections(elf_data):
+        contents = elf_data[section.offset:section.offset + section.size]
+        hashes[section.name] = {"load_address": section.load_address, "size": section.size,
+                                "sha256": hashlib.sha256(contents).hexdigest()}
+    return hashes
+
+
+def parse_compare_sections(text):
+    """Map section name to True if "compare-sections" reported it matched."""
+    return {m.group(1): m.group(4) == "matched" for m in COMPARE_SECTION_PATTERN.finditer(text)}
+
+
+def ledger_file_name(board_id):
+    return re.sub(r"[^\w.-]", "_", board_id) + ".json"
+
+
+class FlashLedger:
+    """Section hashes of the image last flashed to each board.
+
+    A board whose ledger entry differs from the new image is flashed without
+    asking the target. An identical entry is still confirmed with the
+    target's CRCs, as the board may have been flashed outside this library.
+    """
+
+    def __init__(self, ledger_dir=FLASH_LEDGER_DIR):
+        self.ledger_dir = ledger_dir
+
+    def get(self, board_id):
+        try:
+            with open(os.path.join(self.ledger_dir, ledger_file_name(board_id))) as ledger_file:
+                return json.load(ledger_file)["sections"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def image(self, board_id):
+        """The ELF file last flashed to the board, if it was recorded."""
+        try:
+            with open(self.__image_path(board_id), "rb") as image_file:
+                return image_file.read()
+        except OSError:
+            return None
+
+    def record(self, board_id, hashes, elf_data=None):
+        try:
+            os.makedirs(self.ledger_dir, exist_ok=True)
+            if (elf_data is not None):
+                with open(self.__image_path(board_id), "wb") as image_file:
+                    image_file.write(elf_data)
+            with open(os.path.join(self.ledger_dir, ledger_file_name(board_id)), "w") as ledger_file:
+                json.dump({"board_id": board_id, "sections": hashes}, ledger_file)
+        except OSError:
+            pass
+
+    def forget(self, board_id):
+        for path in (os.path.join(self.ledger_dir, ledger_file_name(board_id)), self.__image_path(board_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def __image_path(self, board_id):
+        return os.path.join(self.ledger_dir, ledger_file_name(board_id)[:-len(".json")] + ".elf")
@@ -0,0 +1,39 @@
+import re
+
+
+CRC32_POLYNOMIAL = 0x04c11db7
+CRC_REPLY_PATTERN = re.compile(r'received: "(C([0-9a-fA-F]+)|E([0-9a-fA-F]*))"')
+
+
+def crc32_table():
+    table = []
+    for byte in range(256):
+        crc = byte << 24
+        for _ in range(8):
+            crc = ((crc << 1) ^ CRC32_POLYNOMIAL) if crc & 0x80000000 else crc << 1
+        table.append(crc & 0xffffffff)
+    return table
+
+
+CRC32_TABLE = crc32_table()
+
+
+def target_crc32(data, crc=0xffffffff):
+    """CRC-32 as computed by gdbservers for the qCRC packet: MSB first,
+    initial value 0xffffffff and no final inversion."""
+    table = CRC32_TABLE
+    for byte in data:
+        crc = ((crc << 8) & 0xffffffff) ^ table[(crc >> 24) ^ byte]
+    return crc
+
+
+def build_crc_cmd(address, length):
+    return f"maint packet qCRC:{address:x},{length:x}"
+
+
+def parse_crc_reply(text):
+    """CRC from the output of build_crc_cmd, or None if the target refused it."""
+    match = CRC_REPLY_PATTERN.search(text)
+    if (match is None or match.group(2) is None):
+        return None
+    return int(match.group(2), 16)
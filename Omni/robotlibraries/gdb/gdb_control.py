@@ -1,61 +1,145 @@
 import subprocess
 from pygdbmi.gdbcontroller import GdbController
-from pygdbmi.constants import GdbTimeoutError
+from pygdbmi.constants import GdbTimeoutError, DEFAULT_GDB_TIMEOUT_SEC
 import re
 import os
-import json
-from .source_utility import line_of_test_tag, TagNotFoundError, TagError
-import linecache
-
-
-OPEN_OCD = "Open On-Chip Debugger"
-SEGGER_JLINK = "SEGGER J-Link GDB Server"
-
-
-class GdbResponseError(Exception):
-    def __init__(self, message, folder_path="", malformed_response=[], malformed_file_name="") -> None:
-        if (len(folder_path) != 0 and len(malformed_response) != 0 and malformed_file_name != ""):
-            message = message + "Gdb response saved in {malformed_file_path}"
-            malformed_msg_file_path = os.path.join(
-                folder_path, malformed_file_name)
-            save_as_json(malformed_response, malformed_msg_file_path)
+import tempfile
+import time
+import numpy
+from functools import partial
+from .source_utility import (line_of_test_tag, TagNotFoundError, TagError,
+                             verify_source_file, resolve_line_number,
+                             scan_test_tags, line_from_tag_matches)
+from .mi_transport import MiResultTransport, PygdbmiTransport
+from .mi_responses import (OPEN_OCD, SEGGER_JLINK, GdbResponseError, GdbBreakpointNotStopped, GdbFlashError,
+                           save_as_json, stream_text, result_record, error_msg, verify_server_connection,
+                           verify_elf_loaded, parse_gdb_version, parse_working_dir, parse_server_type,
+                           parse_print_value, parse_program_state, verify_done_response, verify_load_elf_response,
+                           verify_connect_response, verify_continue_response, verify_reset_halt_response,
+                           verify_break_insert_response, verify_break_delete_response,
+                           verify_change_working_dir_response)
+from .run_state import TargetRunState, STATE_RUNNING
+from .memory import (GdbMemoryReadError, MEMORY_READ_CHUNK_SIZE, memory_address_expression,
+                     build_read_memory_cmds, decode_memory_blocks, resolve_memory_regions)
+from .var_watch import VariableWatchSet
+from .value_format import ObjectValueCache
+from .breakpoint_table import BreakpointTable, BREAKPOINT_NOTIFICATIONS, breakpoint_location
+from .elf_symbols import ElfSymbolIndex, ElfFormatError, file_sha256, read_elf_sections
+from .flash_ledger import FlashLedger, FLASH_LEDGER_DIR, section_hashes, parse_compare_sections
+from .flash_delta import (FLASH_WRITE_TIMEOUT_SEC, FlashLayoutError, image_sectors, changed_sectors, sector_runs,
+                          run_contents, uniform_sectors, build_write_image_cmd, build_flash_banks_cmd,
+                          parse_flash_banks, build_flash_info_cmd, parse_flash_info)
+from .flash_verify import target_crc32, build_crc_cmd, parse_crc_reply
+from .svd import SvdDevice, SvdError
+from .registers import RegisterFile
+from .memory_snapshot import SNAPSHOT_DIR, write_snapshot, load_snapshot, diff_snapshot_regions
+from .cycle_counter import DWT_CYCCNT_ADDRESS, build_enable_cyccnt_cmds, cycle_delta, cycle_statistics
+from .live_watch import (DEFAULT_LIVE_WATCH_RATE_HZ, DEFAULT_LIVE_WATCH_CAPACITY, LiveWatchBuffer,
+                         LiveWatchSampler, LiveWatchReadError, build_mdb_cmd, parse_mdb_reply)
+from .watch_trace import TRACE_DIR, DEFAULT_TRACE_EVENTS, WatchTraceWriter, parse_watch_value
+from .pc_profile import (DEFAULT_SAMPLE_RATE_HZ, PROFILE_METHOD_AUTO, PROFILE_METHOD_PCSR, PROFILE_METHOD_HALT,
+                         build_pcsr_read_cmd, parse_pcsr_reply, resolve_stacks, flat_profile, write_collapsed_stacks)
+from ..openocd_tcl import OpenocdTclClient, OpenocdError, OPENOCD_TCL_PORT
+from .stack_usage import STACK_PAINT_PATTERN, DEFAULT_STACK_REGIONS, build_paint_cmd, stack_usage
+from .gdb_index import (GdbIndexError, GDB_INDEX_CACHE_DIR, INDEX_CACHE_OFF, INDEX_CACHE_HIT, INDEX_CACHE_MISS,
+                        indexed_elf_path, build_save_index_cmd, add_index_section)
+from .type_layout import (GdbTypeLayoutError, TypeLayoutCache, TYPE_CACHE_SUFFIX, parse_type_layout,
+                          split_array_type, array_layout, layout_dtype, decode_value)
+
+
+TRANSPORT_PYGDBMI = "pygdbmi"
+TRANSPORT_RESULT = "result"
+BREAKPOINT_FLAGS = {"hardware": "-h", "temporary": "-t", "": ""}
+PRINT_FORMATS = {"dec": "/d", "hex": "/x", "bin": "/t"}
+EVENT_POLL_SEC = 0.05
+
+
+def build_break_insert_cmd(source_file, line_number, break_type):
+    break_type_flag = map_breakpoint_flag(break_type)
+    bp_cmd = f"-break-insert --source {source_file} --line {line_number} {break_type_flag}"
+    return bp_cmd.rstrip()
+
+
+def breakpoint_spec(spec):
+    if (isinstance(spec, dict)):
+        source_file_path = spec["source_file_path"]
+        line_number = int(spec.get("line_number", -1))
+        tag = spec.get("tag", "")
+        break_type = spec.get("break_type", "")
+    else:
+        source_file_path, location, *break_type = spec
+        break_type = break_type[0] if len(break_type) != 0 else ""
+        if (isinstance(location, int) or str(location).isdigit()):
+            line_number, tag = int(location), ""
         else:
-            super().__init__(message)
+            line_number, tag = -1, location
+    return {"source_file_path": source_file_path, "line_number": line_number, "tag": tag,
+            "break_type": break_type, "number": None, "bkpt": None, "error": None}
 
 
-class GdbBreakpointNotStopped(Exception):
-    pass
+def map_breakpoint_flag(break_type):
+    if (break_type not in BREAKPOINT_FLAGS):
+        raise ValueError(
+            "Invalid break_type argument. Valid types: hardware, temporary and \"\".")
+    return BREAKPOINT_FLAGS[break_type]
 
 
-class GdbFlashError(Exception):
-    pass
-
-
-def save_as_json(response, file):
-    with open(file, "w") as log_file:
-        json.dump(response, log_file)
-    return
+def print_format_flag(format):
+    if (format not in PRINT_FORMATS):
+        raise ValueError(
+            "Invalid value for 'format' parameter. Expected values: 'dec', 'hex', or 'bin'. Got: '{}'".format(format))
+    return PRINT_FORMATS[format]
 
 
 class gdb:
     ROBOT_LIBRARY_SCOPE = 'GLOBAL'
 
-    def __init__(self, gdb_path='/usr/local/bin/arm-none-eabi-gdb'):
+    def __init__(self, gdb_path='/usr/local/bin/arm-none-eabi-gdb', transport=TRANSPORT_PYGDBMI):
         self.server = ""
+        self.server_address = ""
         self.connected_to_server = False
+        self.flash_report = {}
         self.elf_loaded = False
+        self.elf_file_path = ""
+        self.elf_load_stats = {}
+        self.symbols = None
+        self.type_layouts = None
+        self.svd_device = None
+        self.painted_stacks = None
+        self.live_watch = None
         self.working_dir = ""
         self.logfile_path = ""
         self.logfile_dir = ""
+        self.__verify_transport(transport)
+        self.transport = transport
         self.__is_gdb_installed()
         self.gdb_controller = GdbController(
             command=[gdb_path, '--interpreter=mi3'])
+        if (transport == TRANSPORT_RESULT):
+            self.gdb_controller = MiResultTransport(self.gdb_controller)
+        else:
+            self.gdb_controller = PygdbmiTransport(self.gdb_controller)
+        self.events = self.gdb_controller.events
+        self.run_state = TargetRunState()
+        self.events.subscribe(self.run_state.update, ["notify"], ["running", "stopped"])
+        self.breakpoints = BreakpointTable()
+        self.events.subscribe(self.breakpoints.update, ["notify"], BREAKPOINT_NOTIFICATIONS)
+        self.watched_variables = VariableWatchSet()
+        self.object_values = ObjectValueCache()
+        self.events.subscribe(self.object_values.clear, ["notify"], ["running", "memory-changed"])
+        self.registers = RegisterFile()
+        self.events.subscribe(self.registers.clear, ["notify"], ["running"])
         inital_resp = self.gdb_controller.get_gdb_response()
-        self.version = self.__get_version(inital_resp)
+        self.version = parse_gdb_version(inital_resp)
         self.get_working_dir()
         response_list = self.gdb_controller.write("-gdb-set mi-async on")
         return
 
+    def __verify_transport(self, transport):
+        if (transport not in (TRANSPORT_PYGDBMI, TRANSPORT_RESULT)):
+            raise ValueError(
+                f"Invalid transport argument. Valid transports: {TRANSPORT_PYGDBMI} and {TRANSPORT_RESULT}.")
+
     def __is_gdb_installed(self) -> bool:
         version_cmd = ["arm-none-eabi-gdb", "--version"]
         try:
@@ -67,154 +151,225 @@ class gdb:
         else:
             return True
 
-    def __get_version(self, inital_resp) -> str:
-        pattern = r'\b\d+\.\d+-\d+\.\d+\b'
-        match = re.search(pattern, inital_resp[1]["payload"])
-        if (match == None):
-            # Temporary solution
-            return "Not parsed"
-        else:
-            return match.group(0)
-
     def get_working_dir(self):
-        pattern = r'Working directory (.+).'
-        response_list = self.gdb_controller.write("pwd")
-        payload_working_dir = response_list[1]['payload']
-        match = re.search(pattern, payload_working_dir)
-        self.working_dir = match.group(1)
-
-    def load_elf_file(self, path, timeout_sec=10):
-        mi_load_cmd = "-file-exec-and-symbols "+path
+        self.working_dir = parse_working_dir(self.gdb_controller.write("pwd"))
+
+    def load_elf_file(self, path, timeout_sec=10, use_index_cache=False, index_cache_dir=GDB_INDEX_CACHE_DIR):
+        # gdb resolves relative paths against its own working directory.
+        elf_file_path = os.path.join(self.working_dir, path)
+        load_path = path
+        index_cache = INDEX_CACHE_OFF
+        if (use_index_cache):
+            cached_path = indexed_elf_path(index_cache_dir, file_sha256(elf_file_path))
+            index_cache = INDEX_CACHE_HIT if os.path.isfile(cached_path) else INDEX_CACHE_MISS
+            if (index_cache == INDEX_CACHE_HIT):
+                load_path = cached_path
+        start = time.perf_counter()
+        mi_load_cmd = "-file-exec-and-symbols "+load_path
         response_list = self.gdb_controller.write(mi_load_cmd, timeout_sec)
-        self.__verify_load_file_error(response_list)
-
-    def __verify_load_file_error(self, response_list):
-        response = response_list[-1]
-        if (response["message"] == "done" and response["type"] == "result"):
-            self.elf_loaded = True
-        else:
-            self.__raise_load_elf_exceptions(response_list)
-        return
-
-    def __raise_load_elf_exceptions(self, response_list):
-        response = response_list[-1]
-        if (self.__is_not_found_error(response)):
-            raise FileNotFoundError(response["payload"]["msg"])
-        else:
-            raise GdbResponseError(
-                "Unexpected GDB response in load_elf_file.", self.logfile_dir,
-                response_list, "malformed_load_elf_file.json")
-
-    def __is_not_found_error(self, response):
+        verify_load_elf_response(response_list, self.logfile_dir)
+        self.elf_loaded = True
+        self.elf_load_stats = {"path": path, "loaded_path": load_path, "index_cache": index_cache,
+                               "load_sec": time.perf_counter() - start}
+        self.elf_file_path = elf_file_path
+        self.symbols = None
+        self.type_layouts = None
+        if (index_cache == INDEX_CACHE_MISS):
+            self.__build_index_cache(elf_file_path, cached_path, timeout_sec)
+
+    def __build_index_cache(self, elf_file_path, cached_path, timeout_sec):
+        start = time.perf_counter()
         try:
-            return "No such file or directory" in response["payload"]["msg"]
-        except (KeyError, TypeError):
-            return False
+            with tempfile.TemporaryDirectory() as index_dir:
+                response_list = self.gdb_controller.write(build_save_index_cmd(index_dir), timeout_sec)
+                result = result_record(response_list)
+                if (result is None or result["message"] != "done"):
+                    raise GdbIndexError(f"save gdb-index failed: {error_msg(result)}")
+                add_index_section(elf_file_path, index_dir, cached_path)
+        except GdbIndexError as error:
+            # The ELF is loaded either way, only the next load stays slow.
+            self.elf_load_stats["index_error"] = str(error)
+        self.elf_load_stats["index_build_sec"] = time.perf_counter() - start
 
     def set_log_file_path(self, log_file_path):
         response_list = self.gdb_controller.write(
             "-gdb-set logging file "+log_file_path)
-        self.__verify_set_log_file_rsp(response_list)
+        verify_done_response(response_list, "set_log_file_path", self.logfile_dir)
         self.logfile_path = log_file_path
         self.logfile_dir = os.path.dirname(self.logfile_path)
 
-    def __verify_set_log_file_rsp(self, response_list):
-        if (self.__is_response_valid(response_list)):
-            return
-        elif (self.__is_msg_in_payload(response_list)):
-            raise GdbResponseError(
-                "Error on set_log_file_path message from gdb. "+response_list[0]["payload"]["msg"])
-        else:
-            raise GdbResponseError(
-                "Unexpected GDB response in set_log_file_path")
-
-    def __is_response_valid(self, response_list):
-        response = response_list[-1]
-        return response.get("type") == "result" and response.get("message") == "done"
-
-    def __is_msg_in_payload(self, response_list):
-        return "msg" in response_list[0]["payload"]
-
     def connect(self, ip, port):
         mi_connect_cmd = "-target-select extended-remote "+ip+":"+port
         try:
-            rsp = self.gdb_controller.write(mi_connect_cmd)[-1]
-            if (self.__is_connected_in_response(rsp)):
-                self.server = self.__get_server_type()
-                self.connected_to_server = True
-            else:
-                raise GdbResponseError(
-                    'Unexpected GDB response in connect.', self.logfile_dir, rsp, "malformed_connect.json")
+            verify_connect_response(self.gdb_controller.write(mi_connect_cmd), self.logfile_dir)
         except GdbTimeoutError:
             raise ConnectionError("Timeout connecting to "+ip+":"+port)
+        self.server = self.__get_server_type()
+        self.server_address = ip+":"+port
+        self.connected_to_server = True
+        self.registers.reset_names()
         return
 
-    def __is_connected_in_response(self, response):
-        if (response["message"] == "connected"):
-            return True
-        else:
-            return False
-
     def __get_server_type(self):
-        response_list = self.gdb_controller.write("monitor version")
-        if (self.__is_server_open_ocd(response_list) == True):
-            return OPEN_OCD
-        else:
-            response_list = self.gdb_controller.write("monitor help")
-            rsp = response_list[1]["payload"]
-            if (SEGGER_JLINK in rsp):
-                return SEGGER_JLINK
-
-    def __is_server_open_ocd(self, response_list):
-        rsp = response_list[1]
-        if (OPEN_OCD in rsp["payload"]):
-            return True
-        else:
-            return False
-
-    def flash(self):
-        self.__verify_server_connection()
-        self.__verify_if_elf_loaded()
+        return parse_server_type(self.gdb_controller.write("monitor version")) or \
+            parse_server_type(self.gdb_controller.write("monitor help"))
+
+    def flash(self, skip_if_unchanged=False, board_id="", ledger_dir=FLASH_LEDGER_DIR,
+              delta=False, sector_size=None, verify=False):
+        verify_server_connection(self.connected_to_server)
+        verify_elf_loaded(self.elf_loaded)
+        self.object_values.clear()
+        self.registers.clear()
+        self.flash_report = {"sections": {}, "mode": "full"}
+        board_id = board_id or self.server_address
+        ledger = FlashLedger(ledger_dir)
+        elf_data, hashes = self.__elf_section_hashes() if (skip_if_unchanged or delta) else (None, None)
+        skip = skip_if_unchanged and self.__target_holds_image(ledger.get(board_id), hashes)
+        if (not skip):
+            previous_image = ledger.image(board_id) if (delta and elf_data is not None) else None
+            # An interrupted write leaves the target unknown, so the entry is only recorded again on success.
+            ledger.forget(board_id)
+            if (previous_image is None or not self.__flash_delta(previous_image, elf_data, sector_size)):
+                self.__download()
+        self.flash_report["skipped"] = skip
+        if (verify):
+            self.verify_flash(board_id=board_id, ledger_dir=ledger_dir)
+        if (hashes is not None):
+            ledger.record(board_id, hashes, elf_data)
+
+    def verify_flash(self, timeout_sec=FLASH_WRITE_TIMEOUT_SEC, board_id="", ledger_dir=FLASH_LEDGER_DIR):
+        verify_server_connection(self.connected_to_server)
+        verify_elf_loaded(self.elf_loaded)
+        with open(self.elf_file_path, "rb") as elf_file:
+            elf_data = elf_file.read()
+        mismatches = []
+        for section, matched in self.__compare_section_crcs(elf_data, timeout_sec):
+            if (matched is None):
+                raise GdbFlashError(f"Target did not return a CRC for section {section.name}")
+            if (not matched):
+                mismatches.append(f"{section.name} {hex(section.load_address)}-"
+                                  f"{hex(section.load_address + section.size)}")
+        self.flash_report["verified"] = len(mismatches) == 0
+        if (len(mismatches) != 0):
+            FlashLedger(ledger_dir).forget(board_id or self.server_address)
+            raise GdbFlashError("Flash verification failed. Mismatching ranges: " + ", ".join(mismatches))
+
+    def __compare_section_crcs(self, elf_data, timeout_sec):
+        """(section, matched) for every loadable section of elf_data, with
+        matched None if the target returned no CRC."""
+        sections = read_elf_sections(elf_data)
+        response_lists = self.send_pipelined_commands(
+            [build_crc_cmd(s.load_address, s.size) for s in sections], timeout_sec)
+        matches = []
+        for section, response_list in zip(sections, response_lists):
+            target_crc = parse_crc_reply(stream_text(response_list))
+            matches.append((section, None if target_crc is None else
+                            target_crc == target_crc32(elf_data[section.offset:section.offset + section.size])))
+        return matches
+
+    def __download(self):
         response_list = self.gdb_controller.write("-target-download")
         for r in response_list:
-            if (("download" in r["payload"]) == False):
+            if (self.__is_download_record(r) == False):
                 raise GdbResponseError("Unexpected GDB response in flash.",
                                        self.logfile_dir,
                                        response_list,
                                        "malformed_flash.json")
 
+    def __flash_delta(self, previous_image, elf_data, sector_size):
+        """Rewrite the erase sectors that differ from the previous image.
+        False if the target does not hold the previous image or the sectors
+        are unknown, so the image has to be downloaded in full."""
+        if (self.server != OPEN_OCD):
+            raise NotImplementedError("Delta flashing not implemented for " + str(self.server))
+        if (not all(matched for _, matched in self.__compare_section_crcs(previous_image, FLASH_WRITE_TIMEOUT_SEC))):
+            self.flash_report["delta_fallback"] = "target does not hold the previous image"
+            return False
+        try:
+            layout = self.__flash_layout(previous_image, elf_data, sector_size)
+            sectors = image_sectors(elf_data, layout)
+            runs = sector_runs(sectors, changed_sectors(image_sectors(previous_image, layout), sectors))
+        except FlashLayoutError as e:
+            self.flash_report["delta_fallback"] = str(e)
+            return False
+        with tempfile.TemporaryDirectory() as run_dir:
+            for start, length in runs:
+                bin_path = os.path.join(run_dir, f"{start:08x}.bin")
+                with open(bin_path, "wb") as bin_file:
+                    bin_file.write(run_contents(sectors, (start, length)))
+                response_list = self.gdb_controller.write(
+                    build_write_image_cmd(bin_path, start), FLASH_WRITE_TIMEOUT_SEC)
+                result = result_record(response_list)
+                if (result is None or result["message"] != "done" or "Error" in stream_text(response_list)):
+                    raise GdbFlashError(f"Error writing flash at {hex(start)}: "
+                                        + (stream_text(response_list).strip() or error_msg(result)))
+        bytes_total = sum(len(contents) for contents in sectors.values())
+        bytes_written = sum(length for _, length in runs)
+        self.flash_report.update({"mode": "delta", "runs": [(hex(start), length) for start, length in runs],
+                                  "bytes_total": bytes_total, "bytes_written": bytes_written,
+                                  "bytes_saved": bytes_total - bytes_written})
+        return True
+
+    def __flash_layout(self, previous_image, elf_data, sector_size):
+        if (sector_size is not None):
+            sector_size = int(sector_size)
+            return sorted(set(uniform_sectors(previous_image, sector_size)) | set(uniform_sectors(elf_data, sector_size)))
+        banks = parse_flash_banks(stream_text(self.gdb_controller.write(build_flash_banks_cmd())))
+        layout = []
+        if (len(banks) != 0):
+            for response_list in self.send_pipelined_commands([build_flash_info_cmd(b) for b in banks]):
+                layout += parse_flash_info(stream_text(response_list))
+        if (len(layout) == 0):
+            raise FlashLayoutError("OpenOCD did not report the flash sectors")
+        return sorted(layout)
+
+    def __elf_section_hashes(self):
+        try:
+            with open(self.elf_file_path, "rb") as elf_file:
+                elf_data = elf_file.read()
+            return elf_data, section_hashes(elf_data)
+        except (OSError, ElfFormatError):
+            return None, None
+
+    def __target_holds_image(self, recorded_hashes, hashes):
+        if (recorded_hashes is not None and hashes is not None and recorded_hashes != hashes):
+            # The ledger already tells the image changed, no need to ask the target.
+            return False
+        response_list = self.gdb_controller.write("compare-sections")
+        matched = parse_compare_sections(stream_text(response_list))
+        self.flash_report["sections"] = matched
+        result = result_record(response_list)
+        if (result is None or result["message"] != "done" or len(matched) == 0):
+            return False
+        names = hashes.keys() if hashes is not None else matched.keys()
+        return all(matched.get(name, False) for name in names)
+
+    def __is_download_record(self, record):
+        if (record["type"] == "result"):
+            return record["message"] == "done"
+        return isinstance(record["payload"], str) and "download" in record["payload"]
+
     def continue_execution(self):
-        self.__verify_server_connection()
-        self.__verify_if_elf_loaded()
+        verify_server_connection(self.connected_to_server)
+        verify_elf_loaded(self.elf_loaded)
         response_list = self.__execute_continue_cmd()
         self.__verify_continue_execution(response_list)
 
-    def __verify_if_elf_loaded(self):
-        if (self.elf_loaded == False):
-            raise GdbFlashError(
-                "No ELF file loaded in GDBclient. Use load_elf_file to load an elf file.")
-
     def __execute_continue_cmd(self):
         return self.gdb_controller.write("-exec-continue")
 
     def __verify_continue_execution(self, response_list):
-        rsp = response_list[0]
-        if (rsp["type"] != "result" or rsp["message"] != "running"):
-            raise GdbResponseError(
-                "Unexpected GDB response in continue_execution",
-                self.logfile_dir,
-                response_list, "malformed_continue_execution.json")
+        verify_continue_response(response_list, "continue_execution", self.logfile_dir)
 
     def reset_halt(self):
-        self.__verify_server_connection()
+        verify_server_connection(self.connected_to_server)
         self.__verify_server_type_for_reset_halt()
         response_list = self.gdb_controller.write("monitor reset halt")
-        self.__verify_reset_halt(response_list)
-
-    def __verify_server_connection(self):
-        if (self.connected_to_server == False):
-            raise ConnectionError("GDBclient is not connected to any server." +
-                                  "Please connect to a GDBserver or OpenOCD for proper functioning.")
+        verify_reset_halt_response(response_list, self.logfile_dir)
+        # Monitor commands change the target state behind gdb's back.
+        self.run_state.reset()
+        self.object_values.clear()
+        self.registers.clear()
 
     def __verify_server_type_for_reset_halt(self):
         if (self.server == OPEN_OCD):
@@ -226,45 +381,44 @@ class gdb:
             raise NotImplementedError(
                 "reset halt not implemented for" + self.server)
 
-    def __verify_reset_halt(self, response_list):
-        for r in response_list:
-            if (isinstance(r["payload"], str) and "target halted due to debug-request" in r["payload"]):
-                return
-        raise GdbResponseError(
-            "Unexpected GDB response in reset_halt", self.logfile_dir, response_list, "malformed_reset_halt.json")
-
     def pause(self):
         mi_pause_cmd = "-exec-interrupt"
         response_list = self.gdb_controller.write(mi_pause_cmd)
         self.__verify_pause(response_list)
 
     def __verify_pause(self, response_list):
-        r = response_list[2]["payload"]
-        if ("received signal SIGINT, Interrupt" in r):
+        r = stream_text(response_list)
+        if ("received signal SIGINT, Interrupt" in r or self.__is_stopped_by_sigint(response_list)):
             return
         else:
             raise GdbResponseError("Unexpected GDB response in pause",
                                    self.logfile_dir, response_list, "malformed_pause.json")
 
-    def get_program_state(self):
-        self.__verify_server_connection()
-        response_list = self.gdb_controller.write("info program")
-        if (self.__is_program_running(response_list)):
-            return "running"
-        elif (self.__is_program_stopped(response_list)):
-            return "stopped"
+    def __is_stopped_by_sigint(self, response_list):
+        for r in response_list:
+            if (r["type"] == "notify" and r["message"] == "stopped" and
+                    r["payload"].get("signal-name") == "SIGINT"):
+                return True
+        return False
+
+    def get_program_state(self, refresh=False):
+        verify_server_connection(self.connected_to_server)
+        if (refresh == False and self.run_state.is_known()):
+            return self.__current_run_state().state
+        state, breakpoint_number = parse_program_state(self.gdb_controller.write("info program"), self.logfile_dir)
+        if (state == "running"):
+            self.run_state.set_state(STATE_RUNNING)
         else:
-            raise GdbResponseError(
-                "Unexpected GDB response in get_program_state", self.logfile_dir,
-                response_list, "malformed_get_program_state.json")
+            self.run_state.confirm_stopped(breakpoint_number)
+        return state
 
-    def __is_program_running(self, response_list):
-        running_msg = response_list[1]["payload"]
-        return "Selected thread is running" in running_msg
+    def get_stop_info(self):
+        return self.__current_run_state().stop_info()
 
-    def __is_program_stopped(self, response_list):
-        stoped_msg = response_list[2]["payload"]
-        return "Program stopped" in stoped_msg
+    def __current_run_state(self):
+        if (self.run_state.state == STATE_RUNNING):
+            self.gdb_controller.poll_events()
+        return self.run_state
 
     def insert_breakpoint(self, source_file_path, line_number=-1, break_type="", tag=""):
         self.__verify_source_file_path(source_file_path)
@@ -273,90 +427,93 @@ class gdb:
             source_file_path, tag, line_number)
         bp_cmd = self.__build_bp_cmd(source_file, line_number, break_type)
         response_list = self.gdb_controller.write(bp_cmd)
-        self.__verify_bp_cmd_response(response_list)
+        bkpt = self.__verify_bp_cmd_response(response_list)
+        if (bkpt is not None):
+            self.breakpoints.add(bkpt)
+        if (tag != ""):
+            self.breakpoints.remember_tag(source_file_path, tag, line_number)
         return
 
     def __verify_source_file_path(self, source_file_path):
-        if (not os.path.isfile(source_file_path)):
-            raise FileNotFoundError(
-                f"""The specified source file path '{source_file_path}' does not exist or is not a file. Please provide 
-                a valid path to the source file where you want to set the breakpoint.""")
+        verify_source_file(source_file_path)
 
     def __seek_line_number_from_src_file(self, source_file_path, tag="", line_number=-1):
-        if (tag != "" and line_number != -1):
-            self.__verify_line_and_tag(source_file_path, line_number, tag)
-            return line_number
-        elif (tag != "" and line_number == -1):
-            return line_of_test_tag(tag, source_file_path)
-        elif (tag == "" and line_number != -1):
-            return line_number
-        else:
-            raise ValueError(
-                "Invalid arguments. line_number or tag or both must be defined")
-
-    def __verify_line_and_tag(self, source_file_path, line_number, tag):
-        target_line = linecache.getline(source_file_path, line_number)
-        if (not (tag in target_line)):
-            raise ValueError(
-                f"Invalid line or tag value. Line {line_number} does not contain \"{tag}\".")
+        return resolve_line_number(source_file_path, tag, line_number)
 
     def __build_bp_cmd(self, source_file, line_number, break_type):
-        break_type_flag = self.__map_breakpoint_flag(break_type)
-        bp_cmd = f"-break-insert --source {source_file} --line {line_number} {break_type_flag}"
-        return bp_cmd.rstrip()
-
-    def __map_breakpoint_flag(self, break_type):
-        breakpoint_flags_map = {"hardware": "-h", "temporary": "-t", "": ""}
-        if (break_type not in breakpoint_flags_map):
-            raise ValueError(
-                "Invalid break_type argument. Valid types: hardware, temporary and \"\".")
-        return breakpoint_flags_map[break_type]
+        return build_break_insert_cmd(source_file, line_number, break_type)
 
     def __verify_bp_cmd_response(self, response_list):
-        if (len(response_list) == 2):
-            result_msg = response_list[1]
-        elif ((len(response_list) == 1)):
-            result_msg = response_list[0]
-            self.__verify_result_msg_from_bp_cmd(result_msg)
-        else:
-            raise GdbResponseError(
-                "Unexpected GDB response in insert_breakpoint", self.logfile_dir,
-                response_list, "malformed_insert_bp.json")
-
-    def __verify_result_msg_from_bp_cmd(self, result_msg):
-        if ("error" in result_msg["message"]):
-            payload_error_msg = result_msg["payload"]["msg"]
-            if ("No line" in payload_error_msg or "No source file named" in payload_error_msg):
-                raise GdbResponseError(
-                    result_msg["payload"]["msg"]+" defined in the elf file")
-            else:
-                raise GdbResponseError(
-                    "Unexpected result_msg in insert_breakpoint", self.logfile_dir,
-                    result_msg, "malformed_bp_cmd_response.json")
-        else:
+        return verify_break_insert_response(response_list, self.logfile_dir)
+
+    def insert_breakpoints(self, breakpoints, timeout_sec=DEFAULT_GDB_TIMEOUT_SEC):
+        results = [breakpoint_spec(b) for b in breakpoints]
+        commands = self.__build_bp_cmds(results)
+        pending = [r for r in results if r["error"] is None]
+        if (len(commands) == 0):
+            return results
+        response_lists = self.send_pipelined_commands(commands, timeout_sec)
+        for result, response_list in zip(pending, response_lists):
+            self.__record_inserted_breakpoint(result, response_list)
+        return results
+
+    def __build_bp_cmds(self, results):
+        tag_matches = self.__scan_tags_per_source_file(results)
+        commands = []
+        for r in results:
+            try:
+                if (r["tag"] != "" and r["line_number"] == -1):
+                    matches = tag_matches[r["source_file_path"]]
+                    if (isinstance(matches, Exception)):
+                        raise matches
+                    r["line_number"] = line_from_tag_matches(
+                        r["tag"], r["source_file_path"], matches[r["tag"]])
+                else:
+                    self.__verify_source_file_path(r["source_file_path"])
+                    r["line_number"] = resolve_line_number(
+                        r["source_file_path"], r["tag"], r["line_number"])
+                commands.append(self.__build_bp_cmd(
+                    os.path.basename(r["source_file_path"]), r["line_number"], r["break_type"]))
+            except (FileNotFoundError, TagNotFoundError, TagError, ValueError) as e:
+                r["error"] = f"{type(e).__name__}: {e}"
+        return commands
+
+    def __scan_tags_per_source_file(self, results):
+        tags_per_file = {}
+        for r in results:
+            if (r["tag"] != "" and r["line_number"] == -1):
+                tags_per_file.setdefault(r["source_file_path"], set()).add(r["tag"])
+        tag_matches = {}
+        for source_file_path, tags in tags_per_file.items():
+            try:
+                self.__verify_source_file_path(source_file_path)
+                tag_matches[source_file_path] = scan_test_tags(tags, source_file_path)
+            except FileNotFoundError as e:
+                tag_matches[source_file_path] = e
+        return tag_matches
+
+    def __record_inserted_breakpoint(self, result, response_list):
+        try:
+            bkpt = self.__verify_bp_cmd_response(response_list)
+        except GdbResponseError as e:
+            result["error"] = f"{type(e).__name__}: {e}"
             return
+        if (bkpt is not None):
+            self.breakpoints.add(bkpt)
+            result["number"] = bkpt["number"]
+            result["bkpt"] = bkpt
+        if (result["tag"] != ""):
+            self.breakpoints.remember_tag(result["source_file_path"], result["tag"], result["line_number"])
 
     def change_working_dir(self, directory):
         response_list = self.gdb_controller.write("cd "+directory)
-        self.__verify_cd_response(response_list)
+        verify_change_working_dir_response(response_list, self.logfile_dir)
         self.working_dir = directory
         return
 
-    def __verify_cd_response(self, response_list):
-        if ("Working directory" in response_list[1]["payload"]):
-            return
-        elif (response_list[2]["message"] == "error" and
-              "No such file or directory" in response_list[2]["payload"]["msg"]):
-            raise FileNotFoundError(response_list[2]["payload"]["msg"])
-        else:
-            raise GdbResponseError(
-                "Unexpected GDB response in change_working_dir",
-                self.logfile_dir, response_list,
-                "malformed_change_working_dir.json")
-
     def continue_until_breakpoint(self, timeout_sec=1):
-        self.__verify_server_connection()
-        response_cont_cmd = self.__execute_continue_cmd()
+        verify_server_connection(self.connected_to_server)
+        response_cont_cmd = self.__after_running(self.__execute_continue_cmd())
         if (self.__breakpoint_hit(response_cont_cmd) == True):
             return
         else:
@@ -370,6 +527,13 @@ class gdb:
                     self.logfile_dir, response_read,
                     "malformed_continue_until_breakpoint.json")
 
+    def __after_running(self, response_list):
+        # A *stopped read before the ^running of this continue is left over from an earlier run.
+        for index, r in enumerate(response_list):
+            if (r["type"] == "result" and r["message"] == "running"):
+                return response_list[index + 1:]
+        return []
+
     def __breakpoint_hit(self, response):
         for entry in response:
             if (entry["type"] == "notify" and entry["message"] == "stopped" and entry["payload"]["reason"] == "breakpoint-hit"):
@@ -377,30 +541,48 @@ class gdb:
         return False
 
     def stopped_at_breakpoint_with_tag(self, source_file_path, tag):
-        info_program_rsp_list = self.gdb_controller.write("info program")
-        self.__verify_stopped_at_breakpoint_st(info_program_rsp_list)
-        bp_index = self.__seek_breakpoint_index(info_program_rsp_list)
-        resp_break_list = self.gdb_controller.write("-break-list")
-        bp_entry = self.__get_breakpoint_entry(bp_index, resp_break_list)
-        bp_filename = self.__get_bp_file_name(bp_entry)
-        line_number = self.__get_breakpoint_line(bp_entry)
-        line = line_of_test_tag(tag, source_file_path)
+        bp_index = self.__stopped_breakpoint_index()
+        bp_entry = self.breakpoints.get(bp_index)
+        if (bp_entry is None):
+            resp_break_list = self.gdb_controller.write("-break-list")
+            bp_entry = self.__get_breakpoint_entry(bp_index, resp_break_list)
+            self.breakpoints.add(bp_entry)
+        bp_filename, line_number = breakpoint_location(bp_entry)
+        line = self.__tag_line(source_file_path, tag)
         source_file = os.path.basename(source_file_path)
         if (line == line_number and bp_filename == source_file):
             return True
         else:
             return False
 
+    def __tag_line(self, source_file_path, tag):
+        line = self.breakpoints.tag_line(source_file_path, tag)
+        if (line is None):
+            line = line_of_test_tag(tag, source_file_path)
+            self.breakpoints.remember_tag(source_file_path, tag, line)
+        return line
+
+    def __stopped_breakpoint_index(self):
+        if (self.run_state.is_known() == False):
+            info_program_rsp_list = self.gdb_controller.write("info program")
+            self.__verify_stopped_at_breakpoint_st(info_program_rsp_list)
+            return self.__seek_breakpoint_index(info_program_rsp_list)
+        if (self.__current_run_state().is_stopped_at_breakpoint() == False):
+            raise GdbBreakpointNotStopped(
+                "Error stopped_at_breakpoint_with_tag: Program is not stopped at breakpoint")
+        return self.run_state.breakpoint_number
+
     def __verify_stopped_at_breakpoint_st(self, response_list):
         if (self.__get_program_running_state(response_list) != "Stopped at breakpoint"):
             raise GdbBreakpointNotStopped(
                 "Error stopped_at_breakpoint_with_tag: Program is not stopped at breakpoint")
 
     def __get_program_running_state(self, response_list):
-        if (len(response_list) == 3 and "Selected thread is running" in response_list[1]["payload"]):
+        info_program_msg = stream_text(response_list)
+        if ("Selected thread is running" in info_program_msg):
             return "Running"
-        elif (len(response_list) == 6 and "Program stopped at" in response_list[2]["payload"]):
-            if ("It stopped at breakpoint" in response_list[3]["payload"]):
+        elif ("Program stopped at" in info_program_msg):
+            if ("It stopped at breakpoint" in info_program_msg):
                 return "Stopped at breakpoint"
             else:
                 return "Stopped"
@@ -408,13 +590,13 @@ class gdb:
             raise GdbResponseError("malformed message")
 
     def __seek_breakpoint_index(self, response_list):
-        stoped_at_bp_payload = response_list[3]["payload"]
-        match = re.search(r"breakpoint (\d+)", stoped_at_bp_payload)
+        stoped_at_bp_payload = stream_text(response_list)
+        match = re.search(r"stopped at breakpoint (\d+)", stoped_at_bp_payload)
         breakpoint_index = match.group(1)
         return breakpoint_index
 
     def __get_breakpoint_entry(self, bp_index, response_list):
-        bp_entries = response_list[0]["payload"]["BreakpointTable"]["body"]
+        bp_entries = result_record(response_list)["payload"]["BreakpointTable"]["body"]
         for e in bp_entries:
             if e["number"] == bp_index:
                 return e
@@ -422,24 +604,13 @@ class gdb:
             "Invalid breakpoint index "+bp_index+" in breakpoints list./n" +
             "Probably the breakpoint was not set.")
 
-    def __get_bp_file_name(self, bp_entry):
-        full_path = bp_entry["fullname"]
-        return os.path.basename(full_path)
-
-    def __get_breakpoint_line(self, bp_entry):
-        return int(bp_entry["line"])
-
     def delete_all_breakpoints(self):
         del_breakpoints_rsp_list = self.gdb_controller.write("-break-delete")
-        return self.__verify_done_response_bp(del_breakpoints_rsp_list)
+        self.__verify_done_response_bp(del_breakpoints_rsp_list)
+        self.breakpoints.clear()
 
     def __verify_done_response_bp(self, rsp_list):
-        if ("done" in rsp_list[0]["message"]):
-            return
-        else:
-            raise GdbResponseError(
-                "Unexpected GDB response in delete_all_breakpoints",
-                self.logfile_dir, rsp_list, "malformed_delete_all_breakpoints.json")
+        verify_break_delete_response(rsp_list, self.logfile_dir)
 
     def next(self):
         next_rsp_list = self.gdb_controller.write("-exec-next")
@@ -457,63 +628,552 @@ class gdb:
         return self.get_object_value(variable_name, format)
 
     def get_object_value(self, object_name, format):
-        self.__verify_format(format)
-        print_type = self.___extract_type(format)
-        var_response_list = self.gdb_controller.write(
-            "print "+print_type+" "+object_name)
-        object_string = self.__extract_object_string(var_response_list)
+        print_format_flag(format)
+        object_string = self.object_values.get(object_name, format)
+        if (object_string is not None):
+            return object_string
+        formats = [format] if format == "hex" else [format, "hex"]
+        commands = ["print "+print_format_flag(f)+" "+object_name for f in formats]
+        commands += ["ptype "+object_name, "print sizeof("+object_name+")"]
+        response_lists = self.send_pipelined_commands(commands)
+        object_string = parse_print_value(response_lists[0])
+        self.object_values.store(object_name, format, object_string)
+        try:
+            hex_string, type_name, size = [parse_print_value(r) for r in response_lists[len(formats)-1:]]
+            self.object_values.store_raw(object_name, hex_string, type_name, size)
+        except GdbResponseError:
+            pass
         return object_string
 
-    def __verify_format(self, format):
-        if (format != "dec" and format != "hex" and format != "bin"):
+    def watch_variables(self, expressions, format="natural", timeout_sec=DEFAULT_GDB_TIMEOUT_SEC):
+        if (isinstance(expressions, str)):
+            expressions = [expressions]
+        rewatched = [e for e in expressions if e in self.watched_variables]
+        if (len(rewatched) != 0):
+            self.unwatch_variables(rewatched, timeout_sec)
+        names, commands = self.watched_variables.create_cmds(expressions, format)
+        response_lists = iter(self.send_pipelined_commands(commands, timeout_sec))
+        errors = []
+        for expression, name in zip(expressions, names):
+            result = result_record(next(response_lists))
+            if (format != "natural"):
+                format_result = result_record(next(response_lists))
+                if (format_result is not None and format_result["message"] == "done"):
+                    result = format_result
+            if (result is None or result["message"] != "done"):
+                errors.append(expression + ": " + error_msg(result))
+                continue
+            self.watched_variables.add(expression, name, result["payload"].get("value"))
+        if (len(errors) != 0):
+            raise GdbResponseError("Error in watch_variables. " + "; ".join(errors))
+        values = self.watched_variables.values()
+        return {e: values[e] for e in expressions}
+
+    def get_changed_variables(self, timeout_sec=DEFAULT_GDB_TIMEOUT_SEC):
+        response_list = self.gdb_controller.write("-var-update --all-values *", timeout_sec)
+        result = result_record(response_list)
+        if (result is None or result["message"] != "done"):
+            raise GdbResponseError("Unexpected GDB response in get_changed_variables", self.logfile_dir,
+                                   response_list, "malformed_get_changed_variables.json")
+        return self.watched_variables.apply_changes(result["payload"]["changelist"])
+
+    def get_watched_variables(self):
+        return self.watched_variables.values()
+
+    def unwatch_variables(self, expressions=None, timeout_sec=DEFAULT_GDB_TIMEOUT_SEC):
+        if (expressions is None):
+            expressions = self.watched_variables.expressions()
+        elif (isinstance(expressions, str)):
+            expressions = [expressions]
+        commands = ["-var-delete " + self.watched_variables.remove(e) for e in expressions]
+        if (len(commands) == 0):
+            return
+        for expression, response_list in zip(expressions, self.send_pipelined_commands(commands, timeout_sec)):
+            result = result_record(response_list)
+            if (result is None or result["message"] != "done"):
+                raise GdbResponseError(
+                    "Error in unwatch_variables. " + expression + ": " + error_msg(result))
+
+    def get_symbol_index(self):
+        if (self.symbols is None):
+            verify_elf_loaded(self.elf_loaded)
+            self.symbols = ElfSymbolIndex.load(self.elf_file_path)
+        return self.symbols
+
+    def get_symbol_address(self, symbol_name):
+        return self.__lookup_symbol(symbol_name).address
+
+    def get_symbol_size(self, symbol_name):
+        return self.__lookup_symbol(symbol_name).size
+
+    def get_function_at(self, address):
+        function = self.get_symbol_index().function_at(int(address, 0) if isinstance(address, str) else address)
+        return None if function is None else function.name
+
+    def __lookup_symbol(self, symbol_name):
+        symbol = self.get_symbol_index().lookup(symbol_name)
+        if (symbol is None):
+            raise ValueError(f"Symbol '{symbol_name}' not found in {self.elf_file_path}")
+        return symbol
+
+    def __indexed_symbol(self, address_or_symbol):
+        if (not isinstance(address_or_symbol, str) or not self.elf_loaded):
+            return None
+        try:
+            return self.get_symbol_index().global_symbol(address_or_symbol.strip())
+        except (OSError, ElfFormatError):
+            # Without a readable ELF on the host gdb still resolves the symbol.
+            return None
+
+    def read_memory(self, address_or_symbol, length=None, dtype=None,
+                    chunk_size=MEMORY_READ_CHUNK_SIZE, timeout_sec=DEFAULT_GDB_TIMEOUT_SEC):
+        symbol = self.__indexed_symbol(address_or_symbol)
+        if (symbol is not None):
+            address_or_symbol = symbol.address
+            if (length is None):
+                length = symbol.size
+        if (length is None):
             raise ValueError(
-                "Invalid value for 'format' parameter. Expected values: 'dec', 'hex', or 'bin'. Got: '{}'".format(format))
-
-    def ___extract_type(self, format):
-        if (format == "dec"):
-            return '/d'
-        elif (format == "hex"):
-            return '/x'
-        elif (format == "bin"):
-            return '/t'
-        else:
+                f"No length given and '{address_or_symbol}' is not a unique global symbol of the loaded ELF file")
+        length = int(length)
+        chunk_size = int(chunk_size)
+        address_expression = memory_address_expression(address_or_symbol)
+        commands = build_read_memory_cmds(address_expression, length, chunk_size)
+        response_lists = self.send_pipelined_commands(commands, timeout_sec)
+        results = [self.__verify_read_memory_response(r, address_expression) for r in response_lists]
+        data = decode_memory_blocks(results, length, chunk_size)
+        if (dtype is None):
+            return data
+        return numpy.frombuffer(data, dtype=dtype)
+
+    def __verify_read_memory_response(self, response_list, address_expression):
+        result = result_record(response_list)
+        if (result is not None and result["message"] == "done"):
+            return result
+        elif (result is not None and result["message"] == "error"):
+            raise GdbMemoryReadError(
+                f"Error reading memory at {address_expression}: {result['payload']['msg']}")
+        raise GdbResponseError("Unexpected GDB response in read_memory", self.logfile_dir,
+                               response_list, "malformed_read_memory.json")
+
+    def get_type_layout(self, type_name, timeout_sec=DEFAULT_GDB_TIMEOUT_SEC):
+        layouts = self.__type_layout_cache()
+        if (type_name in layouts):
+            return layouts.get(type_name)
+        ptype_rsp, sizeof_rsp = self.send_pipelined_commands(
+            ["ptype /o "+type_name, "print sizeof("+type_name+")"], timeout_sec)
+        for response_list in (ptype_rsp, sizeof_rsp):
+            result = result_record(response_list)
+            if (result is None or result["message"] != "done"):
+                raise GdbTypeLayoutError(
+                    f"Error reading the layout of type '{type_name}': {error_msg(result)}")
+        layout = parse_type_layout(type_name, stream_text(ptype_rsp, ("console",)),
+                                   parse_print_value(sizeof_rsp),
+                                   lambda member_type: self.get_type_layout(member_type, timeout_sec))
+        layouts.store(type_name, layout)
+        return layout
+
+    def read_object(self, expression, as_array=False, endian="<", timeout_sec=DEFAULT_GDB_TIMEOUT_SEC):
+        element, dims = self.__object_layout(expression, timeout_sec)
+        layout = array_layout(element, dims)
+        data = self.read_memory(expression, layout["size"], timeout_sec=timeout_sec)
+        if (as_array):
+            return numpy.frombuffer(data, dtype=layout_dtype(element, endian)).reshape(dims or (1,))
+        return decode_value(layout, data, 0, endian)
+
+    def __object_layout(self, expression, timeout_sec):
+        type_name, dims = split_array_type(
+            parse_print_value(self.gdb_controller.write("whatis "+expression)))
+        return self.get_type_layout(type_name, timeout_sec), dims
+
+    def __type_layout_cache(self):
+        if (self.type_layouts is None):
+            self.type_layouts = TypeLayoutCache()
+            if (self.elf_loaded):
+                try:
+                    self.type_layouts = TypeLayoutCache(self.elf_file_path + TYPE_CACHE_SUFFIX,
+                                                        self.get_symbol_index().elf_sha256)
+                except (OSError, ElfFormatError):
+                    # Layouts are still cached for this session when the ELF is not on the host.
+                    pass
+        return self.type_layouts
+
+    def get_registers(self, timeout_sec=DEFAULT_GDB_TIMEOUT_SEC):
+        if (self.registers.snapshot is not None):
+            return dict(self.registers.snapshot)
+        commands = ["-data-list-register-values x"]
+        if (self.registers.names is None):
+            commands.insert(0, "-data-list-register-names")
+        response_lists = self.send_pipelined_commands(commands, timeout_sec)
+        results = [self.__verify_register_response(r) for r in response_lists]
+        if (self.registers.names is None):
+            self.registers.set_names(results[0]["payload"]["register-names"])
+        return self.registers.store(results[-1]["payload"]["register-values"])
+
+    def __verify_register_response(self, response_list):
+        result = result_record(response_list)
+        if (result is None or result["message"] != "done" or not isinstance(result["payload"], dict)):
+            raise GdbResponseError("Unexpected GDB response in get_registers", self.logfile_dir,
+                                   response_list, "malformed_get_registers.json")
+        return result
+
+    def paint_stacks(self, regions=None, pattern=STACK_PAINT_PATTERN, timeout_sec=DEFAULT_GDB_TIMEOUT_SEC):
+        regions = resolve_memory_regions(regions or DEFAULT_STACK_REGIONS, self.__lookup_symbol)
+        pattern = int(pattern)
+        stack_pointer = self.get_registers(timeout_sec).get("sp")
+        commands = []
+        for start, end in regions.values():
+            if (isinstance(stack_pointer, int) and start <= stack_pointer < end):
+                # Frames above the stack pointer are live and must survive.
+                end = stack_pointer
+            if (end > start):
+                commands.append(build_paint_cmd(start, end - start, pattern))
+        for response_list in self.send_pipelined_commands(commands, timeout_sec):
+            result = result_record(response_list)
+            if (result is None or result["message"] != "done"):
+                raise GdbResponseError(f"Error painting stacks: {error_msg(result)}")
+        self.object_values.clear()
+        self.painted_stacks = {"regions": regions, "pattern": pattern}
+
+    def get_stack_usage(self, timeout_sec=DEFAULT_GDB_TIMEOUT_SEC):
+        if (self.painted_stacks is None):
+            raise ValueError("No stacks painted. Use paint_stacks after reset_halt first.")
+        regions = self.painted_stacks["regions"]
+        return {name: stack_usage(data, regions[name][0], self.painted_stacks["pattern"])
+                for name, data in self.__read_regions(regions, timeout_sec).items()}
+
+    def snapshot_memory(self, regions, name, snapshot_dir=SNAPSHOT_DIR, timeout_sec=DEFAULT_GDB_TIMEOUT_SEC):
+        regions = resolve_memory_regions(regions, self.__lookup_symbol)
+        return write_snapshot(snapshot_dir, name, regions, self.__read_regions(regions, timeout_sec))
+
+    def diff_snapshots(self, snapshot_a, snapshot_b, snapshot_dir=SNAPSHOT_DIR):
+        changes = diff_snapshot_regions(*load_snapshot(snapshot_dir, snapshot_a),
+                                        *load_snapshot(snapshot_dir, snapshot_b))
+        symbols = self.__optional_symbol_index()
+        for change in changes:
+            change["symbols"] = [] if symbols is None else [
+                s.name for s in symbols.symbols_in(change["start"], change["end"])]
+        return changes
+
+    def __optional_symbol_index(self):
+        try:
+            return self.get_symbol_index()
+        except (GdbFlashError, OSError, ElfFormatError):
+            return None
+
+    def __read_regions(self, regions, timeout_sec):
+        commands = {name: build_read_memory_cmds(hex(start), end - start) for name, (start, end) in regions.items()}
+        response_lists = self.send_pipelined_commands([c for cmds in commands.values() for c in cmds], timeout_sec)
+        contents = {}
+        position = 0
+        for name, (start, end) in regions.items():
+            results = [self.__verify_read_memory_response(r, hex(start))
+                       for r in response_lists[position:position + len(commands[name])]]
+            position += len(commands[name])
+            contents[name] = decode_memory_blocks(results, end - start)
+        return contents
+
+    def measure_cycles(self, source_file_path, start_tag, end_tag, iterations=1, timeout_sec=1):
+        verify_server_connection(self.connected_to_server)
+        self.__enable_cycle_counter()
+        start_number, end_number = self.__insert_tag_breakpoints(source_file_path, (start_tag, end_tag))
+        cycles = []
+        try:
+            for _ in range(int(iterations)):
+                start = self.__cycle_count_at_breakpoint(start_number, timeout_sec)
+                cycles.append(cycle_delta(start, self.__cycle_count_at_breakpoint(end_number, timeout_sec)))
+        finally:
+            if (self.run_state.state == STATE_RUNNING):
+                self.__halt_running_target(f"Target still running after measure_cycles. "
+                                           f"Breakpoints {start_number} and {end_number} were not deleted")
+            self.__delete_breakpoints([start_number, end_number])
+        return cycle_statistics(cycles)
+
+    def __enable_cycle_counter(self):
+        for response_list in self.send_pipelined_commands(build_enable_cyccnt_cmds()):
+            result = result_record(response_list)
+            if (result is None or result["message"] != "done"):
+                raise GdbResponseError(f"Error enabling the DWT cycle counter: {error_msg(result)}")
+
+    def __insert_tag_breakpoints(self, source_file_path, tags):
+        results = self.insert_breakpoints([(source_file_path, tag, "hardware") for tag in tags])
+        for result in results:
+            if (result["error"] is not None or result["number"] is None):
+                raise GdbResponseError(f"Error inserting breakpoint at tag '{result['tag']}': {result['error']}")
+        return [result["number"] for result in results]
+
+    def __cycle_count_at_breakpoint(self, number, timeout_sec):
+        self.continue_until_breakpoint(timeout_sec)
+        if (self.run_state.breakpoint_number != number):
+            raise GdbBreakpointNotStopped(f"Error measure_cycles: expected breakpoint {number}, "
+                                          f"stopped at breakpoint {self.run_state.breakpoint_number}")
+        return int.from_bytes(self.read_memory(DWT_CYCCNT_ADDRESS, 4), "little")
+
+    def __delete_breakpoints(self, numbers):
+        self.__verify_done_response_bp(self.gdb_controller.write("-break-delete " + " ".join(numbers)))
+        for number in numbers:
+            self.breakpoints.remove(number)
+
+    def trace_variable(self, expression, max_events=DEFAULT_TRACE_EVENTS, trace_file="", timeout_sec=1):
+        """Record every change of a scalar variable with a write watchpoint,
+        continuing the target after each hit."""
+        verify_server_connection(self.connected_to_server)
+        element, dims = self.__object_layout(expression, DEFAULT_GDB_TIMEOUT_SEC)
+        if (element["kind"] != "base" or len(dims) != 0):
+            raise ValueError(f"trace_variable needs a scalar variable. '{expression}' is of type {element['type']}")
+        if (element["type"].startswith("enum")):
+            # gdb reports enum values by enumerator name, which has no numeric value to record.
+            raise ValueError(f"trace_variable can not trace enum '{expression}'. Trace '(int)({expression})' instead")
+        value_dtype = layout_dtype(element)
+        trace_file = trace_file or os.path.join(TRACE_DIR, re.sub(r"\W+", "_", expression) + ".trace")
+        number = self.__insert_watchpoint(expression)
+        writer = WatchTraceWriter(trace_file, expression, value_dtype, max_events)
+        stop = {}
+        running = False
+        try:
+            while (not writer.is_full()):
+                response_list = self.__execute_continue_cmd()
+                self.__verify_continue_execution(response_list)
+                running = True
+                stop = self.__wait_for_stop(response_list, timeout_sec)
+                running = False
+                if (stop.get("reason") != "watchpoint-trigger" or stop["wpt"]["number"] != number):
+                    break
+                writer.append(time.time(), int(stop["frame"]["addr"], 16),
+                              parse_watch_value(stop["value"]["old"], value_dtype),
+                              parse_watch_value(stop["value"]["new"], value_dtype))
+        finally:
+            writer.close()
+            if (running):
+                self.__halt_running_target(
+                    f"Target still running after trace_variable. Watchpoint {number} was not deleted")
+            # gdb deletes watchpoints whose frame went out of scope by itself.
+            if (stop.get("reason") != "watchpoint-scope"):
+                self.__delete_breakpoints([number])
+        return {"trace_file": trace_file, "events": writer.count, "stop_reason": stop.get("reason", "")}
+
+    def __insert_watchpoint(self, expression):
+        response_list = self.gdb_controller.write("-break-watch " + expression)
+        result = result_record(response_list)
+        if (result is None or result["message"] != "done" or "wpt" not in (result["payload"] or {})):
+            raise GdbResponseError(f"Error setting watchpoint on '{expression}': {error_msg(result)}")
+        return result["payload"]["wpt"]["number"]
+
+    def __halt_running_target(self, error_msg):
+        # The all-stop session only deletes breakpoints once the core is halted again.
+        try:
+            self.pause()
+        except GdbResponseError as e:
+            raise GdbResponseError(error_msg) from e
+
+    def __wait_for_stop(self, response_list, timeout_sec):
+        stop = self.__stop_payload(self.__after_running(response_list))
+        if (stop is None):
+            stop = self.__stop_payload(self.gdb_controller.get_gdb_response(timeout_sec, True))
+        if (stop is None):
+            raise GdbResponseError("Target did not stop after continue", self.logfile_dir,
+                                   response_list, "malformed_trace_variable.json")
+        return stop
+
+    def __stop_payload(self, response_list):
+        for r in response_list:
+            if (r["type"] == "notify" and r["message"] == "stopped"):
+                return r["payload"] or {}
+        return None
+
+    def start_live_watch(self, variables, rate_hz=DEFAULT_LIVE_WATCH_RATE_HZ, capacity=DEFAULT_LIVE_WATCH_CAPACITY,
+                         timeout_sec=DEFAULT_GDB_TIMEOUT_SEC, tcl_port=OPENOCD_TCL_PORT):
+        """Sample variables in the background while the target runs.
+
+        Types and addresses are resolved through gdb, so start the watch
+        while the target is halted. Samples are read through OpenOCD's TCL
+        port, as the all-stop gdb session refuses commands while the core
+        runs.
+        """
+        verify_server_connection(self.connected_to_server)
+        if (self.server != OPEN_OCD):
+            raise NotImplementedError("Live watch not implemented for " + str(self.server))
+        if (self.live_watch is not None and self.live_watch.is_running()):
+            raise ValueError("Live watch already running. Use stop_live_watch first.")
+        if (not isinstance(variables, dict)):
+            variables = {expression: expression for expression in variables}
+        addresses, dtypes = {}, {}
+        for name, spec in variables.items():
+            addresses[name], dtypes[name] = self.__live_watch_location(spec, timeout_sec)
+        openocd = self.__openocd_tcl_client(tcl_port, timeout_sec)
+        self.live_watch = LiveWatchSampler(partial(self.__read_live_watch_values, openocd, addresses, dtypes),
+                                           LiveWatchBuffer(dtypes, capacity), rate_hz, openocd.close)
+        self.live_watch.start()
+
+    def stop_live_watch(self):
+        if (self.live_watch is None):
+            raise ValueError("No live watch started. Use start_live_watch first.")
+        self.live_watch.stop()
+        return self.live_watch.buffer.count
+
+    def get_live_watch_samples(self):
+        if (self.live_watch is None):
+            raise ValueError("No live watch started. Use start_live_watch first.")
+        return self.live_watch.buffer.ordered()
+
+    def export_live_watch(self, path):
+        if (self.live_watch is None):
+            raise ValueError("No live watch started. Use start_live_watch first.")
+        self.live_watch.buffer.export(path)
+
+    def __live_watch_location(self, spec, timeout_sec):
+        if (not isinstance(spec, str)):
+            address, dtype = spec
+            return (int(address, 0) if isinstance(address, str) else int(address)), numpy.dtype(dtype)
+        element, dims = self.__object_layout(spec, timeout_sec)
+        dtype = layout_dtype(element)
+        if (len(dims) != 0):
+            dtype = numpy.dtype((dtype, tuple(dims)))
+        symbol = self.__indexed_symbol(spec)
+        if (symbol is not None):
+            return symbol.address, dtype
+        response_list = self.gdb_controller.write(f"-data-evaluate-expression &({spec})")
+        result = result_record(response_list)
+        match = None if result is None or result["message"] != "done" else \
+            re.search(r"0x[0-9a-fA-F]+", result["payload"]["value"])
+        if (match is None):
+            raise GdbResponseError(f"Error resolving the address of '{spec}': {error_msg(result)}")
+        return int(match.group(0), 16), dtype
+
+    def __read_live_watch_values(self, openocd, addresses, dtypes):
+        values = []
+        for name, dtype in dtypes.items():
+            try:
+                reply = openocd.command(build_mdb_cmd(addresses[name], dtype.itemsize))
+            except OpenocdError as e:
+                raise LiveWatchReadError(f"Error reading '{name}': {e}") from e
+            data = parse_mdb_reply(reply, dtype.itemsize)
+            values.append(numpy.frombuffer(data, dtype)[0])
+        return values
+
+    def profile_program_counter(self, duration_sec, rate_hz=DEFAULT_SAMPLE_RATE_HZ, method=PROFILE_METHOD_AUTO,
+                                collapsed_file="", timeout_sec=DEFAULT_GDB_TIMEOUT_SEC, tcl_port=OPENOCD_TCL_PORT):
+        verify_server_connection(self.connected_to_server)
+        symbols = self.get_symbol_index()
+        method = self.__profile_method(method)
+        openocd = self.__openocd_tcl_client(tcl_port, timeout_sec) if method == PROFILE_METHOD_PCSR else None
+        sample = self.__sample_halted_stack if openocd is None else partial(self.__sample_pcsr, openocd)
+        interval = 1.0 / float(rate_hz)
+        address_stacks = []
+        dropped = 0
+        next_sample = time.monotonic()
+        try:
+            for _ in range(int(float(duration_sec) * float(rate_hz))):
+                stack = sample(timeout_sec)
+                if (stack is None):
+                    dropped += 1
+                else:
+                    address_stacks.append(stack)
+                next_sample += interval
+                time.sleep(max(0.0, next_sample - time.monotonic()))
+        finally:
+            if (openocd is not None):
+                openocd.close()
+        stacks = resolve_stacks(address_stacks, symbols.function_at)
+        if (collapsed_file != ""):
+            write_collapsed_stacks(collapsed_file, stacks)
+        return {"method": method, "samples": len(stacks), "dropped": dropped, "functions": flat_profile(stacks)}
+
+    def __profile_method(self, method):
+        if (method == PROFILE_METHOD_AUTO):
+            return PROFILE_METHOD_PCSR if self.server == OPEN_OCD else PROFILE_METHOD_HALT
+        if (method == PROFILE_METHOD_PCSR and self.server != OPEN_OCD):
+            raise NotImplementedError("DWT_PCSR sampling not implemented for " + str(self.server))
+        if (method not in (PROFILE_METHOD_PCSR, PROFILE_METHOD_HALT)):
             raise ValueError(
-                "Invalid value for 'format' parameter. ___extract_type wrongly used")
+                "Invalid value for 'method' parameter. Expected values: 'auto', 'pcsr', or 'halt'. Got: '{}'".format(method))
+        return method
+
+    def __openocd_tcl_client(self, tcl_port, timeout_sec):
+        # The all-stop gdb session refuses commands while the core runs, OpenOCD's TCL port does not.
+        try:
+            return OpenocdTclClient(self.server_address.rsplit(":", 1)[0], tcl_port, timeout_sec)
+        except OpenocdError as e:
+            raise ConnectionError(str(e)) from e
 
-    def __extract_object_string(self, var_response_list):
-        payload = var_response_list[1]["payload"]
-        match = re.search(r"=\s(.*)\n", payload)
-        if (match == None):
-            raise GdbResponseError(
-                "Unexpected GDB response in get_variable_value. Invalid payload format")
-        return match.group(1)
+    def __sample_pcsr(self, openocd, timeout_sec):
+        try:
+            pc = parse_pcsr_reply(openocd.command(build_pcsr_read_cmd()))
+        except OpenocdError as e:
+            raise GdbResponseError(f"Error reading DWT_PCSR: {e}") from e
+        return None if pc is None else (pc,)
+
+    def __sample_halted_stack(self, timeout_sec):
+        self.pause()
+        response_list = self.gdb_controller.write("-stack-list-frames", timeout_sec)
+        result = result_record(response_list)
+        if (result is None or result["message"] != "done" or not isinstance(result["payload"], dict)):
+            raise GdbResponseError("Unexpected GDB response in profile_program_counter", self.logfile_dir,
+                                   response_list, "malformed_stack_list_frames.json")
+        self.__verify_continue_execution(self.__execute_continue_cmd())
+        return tuple(int(frame["addr"], 16) for frame in reversed(result["payload"]["stack"]))
+
+    def load_svd_file(self, path):
+        self.svd_device = SvdDevice.load(path)
+
+    def read_peripheral(self, peripheral_name, registers=None, read_side_effects=False,
+                        timeout_sec=DEFAULT_GDB_TIMEOUT_SEC):
+        if (self.svd_device is None):
+            raise SvdError("No SVD file loaded. Use load_svd_file to load the device description.")
+        peripheral = self.svd_device.peripheral(peripheral_name)
+        readable = peripheral.readable_registers(registers, read_side_effects)
+        if (len(readable) == 0):
+            return {}
+        spans = peripheral.block_spans(readable)
+        base = peripheral.base_address
+        contents = self.__read_regions({offset: (base + offset, base + offset + length) for offset, length in spans},
+                                       timeout_sec)
+        start = spans[0][0]
+        data = bytearray(spans[-1][0] + spans[-1][1] - start)
+        for offset, block in contents.items():
+            data[offset - start:offset - start + len(block)] = block
+        return peripheral.decode(data, start, [r.name for r in readable])
+
+    def send_pipelined_commands(self, commands, timeout_sec=DEFAULT_GDB_TIMEOUT_SEC):
+        return self.gdb_controller.write_pipelined(commands, timeout_sec)
+
+    def subscribe_to_events(self, callback, record_types=None, messages=None):
+        return self.events.subscribe(callback, record_types, messages)
+
+    def unsubscribe_from_events(self, subscription):
+        self.events.unsubscribe(subscription)
+
+    def get_events(self, record_types=None, messages=None):
+        return self.events.get_events(record_types, messages)
+
+    def wait_for_event(self, message, timeout_sec=1):
+        """Wait for an event published after this call. The pygdbmi transport
+        has no background reader, so gdb's output is polled here."""
+        after_sequence = self.events.last_sequence
+        deadline = time.monotonic() + float(timeout_sec)
+        while True:
+            self.gdb_controller.poll_events()
+            remaining_sec = deadline - time.monotonic()
+            try:
+                return self.events.wait_for(messages=[message], timeout_sec=min(max(remaining_sec, 0), EVENT_POLL_SEC),
+                                            after_sequence=after_sequence)
+            except GdbTimeoutError:
+                if (remaining_sec <= EVENT_POLL_SEC):
+                    raise GdbTimeoutError(f"No gdb event ['{message}'] after {timeout_sec} seconds")
 
     def send_command(self, command, response_file):
+        # Raw commands such as monitor reset or halt change the target state behind gdb's back.
+        self.run_state.reset()
+        self.object_values.clear()
+        self.registers.clear()
         response_list = self.gdb_controller.write(command)
         save_as_json(response_list, response_file)
 
     def start_logging(self):
-        response_list = self.gdb_controller.write("-gdb-set logging on")
-        if (self.__is_response_valid(response_list)):
-            return
-        elif (self.__is_msg_in_payload(response_list)):
-            raise GdbResponseError(
-                "Error on start_logging message from gdb. \"msg\" not present in response_list[0][\"payload\"]")
-        else:
-            raise GdbResponseError(
-                "Unexpected GDB response in start_logging", self.logfile_dir, response_list, "malformed_start_logging.json")
+        verify_done_response(self.gdb_controller.write("-gdb-set logging on"), "start_logging", self.logfile_dir)
 
     def stop_logging(self):
-        response_list = self.gdb_controller.write("-gdb-set logging off")
-        if (self.__is_response_valid(response_list)):
-            return
-        elif (self.__is_msg_in_payload(response_list)):
-            raise GdbResponseError(
-                "Error on stop_logging message from gdb. \"msg\" not present in response_list[0][\"payload\"]")
-        else:
-            raise GdbResponseError(
-                "Unexpected GDB response in stop_logging",
-                self.logfile_dir, response_list, "malformed_stop_logging.json")
+        verify_done_response(self.gdb_controller.write("-gdb-set logging off"), "stop_logging", self.logfile_dir)
 
     def __del__(self):
         return
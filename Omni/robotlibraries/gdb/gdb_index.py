@@ -0,0 +1,46 @@
+import os
+import subprocess
+import tempfile
+
+
+GDB_INDEX_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "omni", "gdb-index")
+OBJCOPY_PATH = "arm-none-eabi-objcopy"
+INDEX_CACHE_OFF = "off"
+INDEX_CACHE_HIT = "hit"
+INDEX_CACHE_MISS = "miss"
+
+
+class GdbIndexError(Exception):
+    pass
+
+
+def indexed_elf_path(cache_dir, elf_sha256):
+    return os.path.join(cache_dir, elf_sha256 + ".elf")
+
+
+def build_save_index_cmd(index_dir):
+    return "save gdb-index "+index_dir
+
+
+def add_index_section(elf_path, index_dir, output_path, objcopy_path=OBJCOPY_PATH):
+    """Copy elf_path to output_path with the .gdb_index section that
+    "save gdb-index" wrote to index_dir.
+
+    The copy is written next to output_path first and then renamed, so a
+    concurrent test run never loads a half written file.
+    """
+    index_file = os.path.join(index_dir, os.path.basename(elf_path) + ".gdb-index")
+    if (not os.path.isfile(index_file)):
+        raise GdbIndexError(f"gdb did not write an index for {elf_path}. Expected {index_file}")
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    file_descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(output_path), suffix=".elf")
+    os.close(file_descriptor)
+    objcopy_cmd = [objcopy_path, "--add-section", ".gdb_index="+index_file,
+                   "--set-section-flags", ".gdb_index=readonly", elf_path, temp_path]
+    try:
+        subprocess.run(objcopy_cmd, check=True, capture_output=True, timeout=60)
+        os.replace(temp_path, output_path)
+    except (OSError, subprocess.SubprocessError) as error:
+        if (os.path.exists(temp_path)):
+            os.remove(temp_path)
+        raise GdbIndexError(f"Command '{' '.join(objcopy_cmd)}' failed: {error}")
@@ -0,0 +1,111 @@
+import csv
+import re
+import threading
+import time
+import numpy
+
+
+DEFAULT_LIVE_WATCH_RATE_HZ = 100
+DEFAULT_LIVE_WATCH_CAPACITY = 10000
+TIME_FIELD = "time"
+MDB_LINE_PATTERN = re.compile(r"^0x[0-9a-fA-F]+:((?:\s+[0-9a-fA-F]{2})+)", re.MULTILINE)
+
+
+class LiveWatchReadError(Exception):
+    pass
+
+
+def build_mdb_cmd(address, length):
+    # An OpenOCD TCL command, answered while the core runs.
+    return f"mdb {hex(address)} {length}"
+
+
+def parse_mdb_reply(text, length):
+    data = bytes.fromhex("".join(m.group(1) for m in MDB_LINE_PATTERN.finditer(text)))
+    if (len(data) != length):
+        raise LiveWatchReadError(f"Expected {length} bytes from OpenOCD, got {len(data)}: {text.strip()}")
+    return data
+
+
+class LiveWatchBuffer:
+    """Preallocated ring buffer of timestamped samples.
+
+    Each sample is one record of a structured array with a float64 time
+    field followed by one field per watched variable. Once full, the
+    oldest samples are overwritten.
+    """
+
+    def __init__(self, dtypes, capacity=DEFAULT_LIVE_WATCH_CAPACITY):
+        if (TIME_FIELD in dtypes):
+            raise ValueError(f"'{TIME_FIELD}' is reserved for the sample timestamp")
+        self.names = list(dtypes)
+        self.samples = numpy.zeros(int(capacity), dtype=[(TIME_FIELD, numpy.float64)] +
+                                   [(name, numpy.dtype(dtype)) for name, dtype in dtypes.items()])
+        self.count = 0
+        self.__lock = threading.Lock()
+
+    def append(self, timestamp, values):
+        with self.__lock:
+            self.samples[self.count % len(self.samples)] = (timestamp, *values)
+            self.count += 1
+
+    def ordered(self):
+        """Copy of the stored samples, oldest first."""
+        with self.__lock:
+            if (self.count <= len(self.samples)):
+                return self.samples[:self.count].copy()
+            return numpy.roll(self.samples, -(self.count % len(self.samples)))
+
+    def export(self, path):
+        samples = self.ordered()
+        if (path.endswith(".npy")):
+            numpy.save(path, samples)
+        elif (path.endswith(".csv")):
+            with open(path, "w", newline="") as csv_file:
+                writer = csv.writer(csv_file)
+                writer.writerow(samples.dtype.names)
+                writer.writerows(samples.tolist())
+        else:
+            raise ValueError(f"Unsupported live watch export format '{path}'. Expected a .npy or .csv file")
+
+
+class LiveWatchSampler:
+    """Calls read_values at a fixed rate on a background thread and stores
+    the results in a LiveWatchBuffer. A failing read stops the sampler and
+    is raised again by stop(). close, if given, runs on the sampler thread
+    once sampling ends."""
+
+    def __init__(self, read_values, buffer, rate_hz=DEFAULT_LIVE_WATCH_RATE_HZ, close=None):
+        self.read_values = read_values
+        self.buffer = buffer
+        self.interval = 1.0 / float(rate_hz)
+        self.close = close
+        self.error = None
+        self.__stop = threading.Event()
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+
+    def start(self):
+        self.__thread.start()
+
+    def is_running(self):
+        return self.__thread.is_alive()
+
+    def stop(self):
+        self.__stop.set()
+        self.__thread.join()
+        if (self.error is not None):
+            raise self.error
+
+    def __run(self):
+        start = time.monotonic()
+        next_sample = start
+        try:
+            while (not self.__stop.wait(max(0.0, next_sample - time.monotonic()))):
+                timestamp = time.monotonic() - start
+                self.buffer.append(timestamp, self.read_values())
+                next_sample += self.interval
+        except Exception as e:
+            self.error = e
+        finally:
+            if (self.close is not None):
+                self.close()
@@ -0,0 +1,72 @@
+import binascii
+import re
+
+
+MEMORY_READ_CHUNK_SIZE = 16384
+NUMERIC_ADDRESS_PATTERN = re.compile(r"^(0[xX][0-9a-fA-F]+|\d+)$")
+
+
+class GdbMemoryReadError(Exception):
+    pass
+
+
+def memory_address_expression(address_or_symbol):
+    if (isinstance(address_or_symbol, int)):
+        return hex(address_or_symbol)
+    address_or_symbol = address_or_symbol.strip()
+    if (NUMERIC_ADDRESS_PATTERN.match(address_or_symbol)):
+        return address_or_symbol
+    # Symbols are read from their own storage, not from the address they hold.
+    return "&(" + address_or_symbol + ")"
+
+
+def build_read_memory_cmds(address_expression, length, chunk_size=MEMORY_READ_CHUNK_SIZE):
+    if (length <= 0 or chunk_size <= 0):
+        raise ValueError(
+            f"Invalid memory read length {length} or chunk size {chunk_size}. Both must be positive.")
+    commands = []
+    for offset in range(0, length, chunk_size):
+        count = min(chunk_size, length - offset)
+        commands.append(f"-data-read-memory-bytes -o {offset} {address_expression} {count}")
+    return commands
+
+
+def decode_memory_blocks(chunk_results, length, chunk_size=MEMORY_READ_CHUNK_SIZE):
+    """Decode the ^done results of build_read_memory_cmds into one buffer.
+
+    Each block is unhexed once and stored in its slot of a preallocated
+    bytearray, which numpy can then wrap without a further copy.
+    """
+    data = bytearray(length)
+    view = memoryview(data)
+    bytes_read = 0
+    for index, result in enumerate(chunk_results):
+        chunk_offset = index * chunk_size
+        for block in result["payload"]["memory"]:
+            start = chunk_offset + int(block["offset"], 16)
+            contents = binascii.a2b_hex(block["contents"])
+            view[start:start + len(contents)] = contents
+            bytes_read += len(contents)
+    if (bytes_read != length):
+        raise GdbMemoryReadError(
+            f"Only {bytes_read} of {length} bytes could be read. Part of the range is not readable.")
+    return data
+
+
+def resolve_memory_regions(regions, lookup_symbol):
+    """Turn region specs into {name: (start, end)} addresses.
+
+    A spec is either a (start, end) pair of addresses or symbol names, or
+    the name of a symbol covering the whole region, such as an array.
+    """
+    resolved = {}
+    for name, spec in regions.items():
+        if (isinstance(spec, str)):
+            symbol = lookup_symbol(spec)
+            start, end = symbol.address, symbol.address + symbol.size
+        else:
+            start, end = (bound if isinstance(bound, int) else lookup_symbol(bound).address for bound in spec)
+        if (end <= start):
+            raise ValueError(f"Invalid memory region {name}: end {hex(end)} is not above start {hex(start)}")
+        resolved[name] = (start, end)
+    return resolved
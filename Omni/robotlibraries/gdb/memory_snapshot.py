@@ -0,0 +1,66 @@
+import json
+import os
+import tempfile
+import numpy
+
+
+SNAPSHOT_DIR = os.path.join(tempfile.gettempdir(), "omni-snapshots")
+
+
+def snapshot_paths(snapshot_dir, name):
+    return os.path.join(snapshot_dir, name + ".bin"), os.path.join(snapshot_dir, name + ".json")
+
+
+def write_snapshot(snapshot_dir, name, regions, contents):
+    """Store the contents of every region in one memory-mapped file, next to
+    a JSON index of where each region lives in it."""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    data_path, index_path = snapshot_paths(snapshot_dir, name)
+    index = []
+    offset = 0
+    for region_name, (start, end) in regions.items():
+        index.append({"name": region_name, "start": start, "end": end, "offset": offset})
+        offset += end - start
+    snapshot = numpy.memmap(data_path, dtype=numpy.uint8, mode="w+", shape=(max(offset, 1),))
+    for entry in index:
+        length = entry["end"] - entry["start"]
+        snapshot[entry["offset"]:entry["offset"] + length] = numpy.frombuffer(contents[entry["name"]], dtype=numpy.uint8)
+    snapshot.flush()
+    del snapshot
+    with open(index_path, "w") as index_file:
+        json.dump({"regions": index}, index_file)
+    return data_path
+
+
+def load_snapshot(snapshot_dir, name):
+    data_path, index_path = snapshot_paths(snapshot_dir, name)
+    with open(index_path) as index_file:
+        index = json.load(index_file)["regions"]
+    return {entry["name"]: entry for entry in index}, numpy.memmap(data_path, dtype=numpy.uint8, mode="r")
+
+
+def changed_ranges(before, after):
+    """[start, end) offsets of the runs of bytes that differ."""
+    changed = numpy.flatnonzero(before != after)
+    if (len(changed) == 0):
+        return []
+    breaks = numpy.flatnonzero(numpy.diff(changed) != 1)
+    starts = numpy.concatenate(([changed[0]], changed[breaks + 1]))
+    ends = numpy.concatenate((changed[breaks], [changed[-1]])) + 1
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def diff_snapshot_regions(index_a, data_a, index_b, data_b):
+    """Changed ranges of the regions both snapshots hold at the same addresses."""
+    changes = []
+    for name, entry in index_a.items():
+        other = index_b.get(name)
+        if (other is None or (other["start"], other["end"]) != (entry["start"], entry["end"])):
+            continue
+        length = entry["end"] - entry["start"]
+        before = data_a[entry["offset"]:entry["offset"] + length]
+        after = data_b[other["offset"]:other["offset"] + length]
+        for start, end in changed_ranges(before, after):
+            changes.append({"region": name, "start": entry["start"] + start, "end": entry["start"] + end,
+                            "length": end - start})
+    return changes
@@ -0,0 +1,109 @@
+import itertools
+import threading
+import time
+from collections import deque
+from pygdbmi.constants import GdbTimeoutError
+
+
+MAX_EVENTS = 1024
+
+
+class MiEventStream:
+    """Bounded stream of the async and stream records of a gdb session.
+
+    publish() never blocks: when the buffer is full the oldest event is
+    dropped and counted in dropped_events. Subscribed callbacks run on the
+    publishing thread and should return quickly. Every event carries an
+    increasing sequence number.
+
+    Events only arrive while something reads gdb's output. MiResultTransport
+    has a background reader. The default pygdbmi transport reads only while
+    a keyword talks to gdb or poll_events() is called.
+    """
+
+    def __init__(self, max_events=MAX_EVENTS):
+        self.__events = deque(maxlen=max_events)
+        self.__condition = threading.Condition()
+        self.__subscribers = {}
+        self.__subscription_ids = itertools.count(1)
+        self.__sequence_numbers = itertools.count(1)
+        self.last_sequence = 0
+        self.dropped_events = 0
+        self.callback_errors = 0
+        self.last_callback_error = None
+
+    def publish(self, record):
+        event = dict(record, time=time.monotonic())
+        with self.__condition:
+            self.last_sequence = event["sequence"] = next(self.__sequence_numbers)
+            if (len(self.__events) == self.__events.maxlen):
+                self.dropped_events += 1
+            self.__events.append(event)
+            subscribers = list(self.__subscribers.values())
+            self.__condition.notify_all()
+        for callback, record_types, messages in subscribers:
+            if (is_matching_event(event, record_types, messages)):
+                self.__run_callback(callback, event)
+
+    def subscribe(self, callback, record_types=None, messages=None):
+        with self.__condition:
+            subscription = next(self.__subscription_ids)
+            self.__subscribers[subscription] = (callback, record_types, messages)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.__condition:
+            self.__subscribers.pop(subscription, None)
+
+    def get_events(self, record_types=None, messages=None):
+        events = []
+        with self.__condition:
+            remaining = deque(maxlen=self.__events.maxlen)
+            for event in self.__events:
+                if (is_matching_event(event, record_types, messages)):
+                    events.append(event)
+                else:
+                    remaining.append(event)
+            self.__events = remaining
+        return events
+
+    def wait_for(self, record_types=None, messages=None, timeout_sec=1, after_sequence=None):
+        """First matching event published after the call, or after the
+        event numbered after_sequence. Older buffered events are ignored."""
+        deadline = time.monotonic() + timeout_sec
+        with self.__condition:
+            if (after_sequence is None):
+                after_sequence = self.last_sequence
+            while True:
+                for event in self.__events:
+                    if (event["sequence"] > after_sequence and is_matching_event(event, record_types, messages)):
+                        self.__events.remove(event)
+                        return event
+                remaining_sec = deadline - time.monotonic()
+                if (remaining_sec <= 0):
+                    raise GdbTimeoutError(
+                        f"No gdb event {messages or record_types} after {timeout_sec} seconds")
+                self.__condition.wait(remaining_sec)
+
+    def clear(self):
+        with self.__condition:
+            self.__events.clear()
+
+    def __run_callback(self, callback, event):
+        try:
+            callback(event)
+        except Exception as e:
+            self.callback_errors += 1
+            self.last_callback_error = e
+
+
+def is_matching_event(event, record_types=None, messages=None):
+    if (record_types is not None and event["type"] not in record_types):
+        return False
+    if (messages is not None and event.get("message") not in messages):
+        return False
+    return True
+
+
+def is_event_record(record):
+    return record["type"] != "result"
@@ -0,0 +1,184 @@
+import json
+import os
+import re
+
+
+OPEN_OCD = "Open On-Chip Debugger"
+SEGGER_JLINK = "SEGGER J-Link GDB Server"
+STREAM_RECORD_TYPES = ("console", "log", "target")
+
+
+class GdbResponseError(Exception):
+    def __init__(self, message, folder_path="", malformed_response=[], malformed_file_name="") -> None:
+        if (len(folder_path) != 0 and len(malformed_response) != 0 and malformed_file_name != ""):
+            message = message + "Gdb response saved in {malformed_file_path}"
+            malformed_msg_file_path = os.path.join(
+                folder_path, malformed_file_name)
+            save_as_json(malformed_response, malformed_msg_file_path)
+        else:
+            super().__init__(message)
+
+
+class GdbBreakpointNotStopped(Exception):
+    pass
+
+
+class GdbFlashError(Exception):
+    pass
+
+
+def save_as_json(response, file):
+    with open(file, "w") as log_file:
+        json.dump(response, log_file)
+    return
+
+
+def stream_text(response_list, record_types=STREAM_RECORD_TYPES):
+    return "".join(r["payload"] for r in response_list
+                   if r["type"] in record_types and isinstance(r["payload"], str))
+
+
+def result_record(response_list):
+    for r in reversed(response_list):
+        if (r["type"] == "result"):
+            return r
+    return None
+
+
+def error_msg(result):
+    if (result is None or not isinstance(result["payload"], dict)):
+        return "no result record"
+    return result["payload"].get("msg", result["message"])
+
+
+def verify_server_connection(connected_to_server):
+    if (connected_to_server == False):
+        raise ConnectionError("GDBclient is not connected to any server." +
+                              "Please connect to a GDBserver or OpenOCD for proper functioning.")
+
+
+def verify_elf_loaded(elf_loaded):
+    if (elf_loaded == False):
+        raise GdbFlashError(
+            "No ELF file loaded in GDBclient. Use load_elf_file to load an elf file.")
+
+
+def parse_gdb_version(response_list):
+    match = re.search(r'\b\d+\.\d+-\d+\.\d+\b', stream_text(response_list, ("console",)))
+    if (match == None):
+        return "Not parsed"
+    return match.group(0)
+
+
+def parse_working_dir(response_list):
+    return re.search(r'Working directory (.+).', stream_text(response_list, ("console",))).group(1)
+
+
+def parse_server_type(response_list):
+    """Server named in the output of "monitor version" or "monitor help"."""
+    text = stream_text(response_list)
+    for server in (OPEN_OCD, SEGGER_JLINK):
+        if (server in text):
+            return server
+    return ""
+
+
+def parse_print_value(response_list):
+    match = re.search(r"=\s(.*)\n", stream_text(response_list, ("console",)))
+    if (match == None):
+        raise GdbResponseError(
+            "Unexpected GDB response in get_variable_value. Invalid payload format")
+    return match.group(1)
+
+
+def parse_program_state(response_list, logfile_dir=""):
+    """("running", None) or ("stopped", breakpoint number) from the output
+    of "info program". The breakpoint number is "" for other stops."""
+    text = stream_text(response_list)
+    if ("Selected thread is running" in text):
+        return "running", None
+    elif ("Program stopped" in text):
+        match = re.search(r"stopped at breakpoint (\d+)", text)
+        return "stopped", "" if match is None else match.group(1)
+    raise GdbResponseError("Unexpected GDB response in get_program_state", logfile_dir,
+                           response_list, "malformed_get_program_state.json")
+
+
+def verify_done_response(response_list, keyword, logfile_dir=""):
+    result = result_record(response_list)
+    if (result is not None and result["message"] == "done"):
+        return
+    elif (result is not None and isinstance(result["payload"], dict) and "msg" in result["payload"]):
+        raise GdbResponseError(f"Error on {keyword} message from gdb. " + result["payload"]["msg"])
+    raise GdbResponseError(f"Unexpected GDB response in {keyword}", logfile_dir,
+                           response_list, f"malformed_{keyword}.json")
+
+
+def verify_load_elf_response(response_list, logfile_dir=""):
+    result = response_list[-1]
+    if (result["type"] == "result" and result["message"] == "done"):
+        return
+    elif (is_not_found_error(result)):
+        raise FileNotFoundError(result["payload"]["msg"])
+    raise GdbResponseError("Unexpected GDB response in load_elf_file.", logfile_dir,
+                           response_list, "malformed_load_elf_file.json")
+
+
+def is_not_found_error(result):
+    try:
+        return "No such file or directory" in result["payload"]["msg"]
+    except (KeyError, TypeError):
+        return False
+
+
+def verify_connect_response(response_list, logfile_dir=""):
+    if (response_list[-1]["message"] != "connected"):
+        raise GdbResponseError('Unexpected GDB response in connect.', logfile_dir,
+                               response_list, "malformed_connect.json")
+
+
+def verify_continue_response(response_list, keyword, logfile_dir=""):
+    result = result_record(response_list)
+    if (result is None or result["message"] != "running"):
+        raise GdbResponseError(f"Unexpected GDB response in {keyword}", logfile_dir,
+                               response_list, f"malformed_{keyword}.json")
+
+
+def verify_reset_halt_response(response_list, logfile_dir=""):
+    if ("target halted due to debug-request" not in stream_text(response_list)):
+        raise GdbResponseError("Unexpected GDB response in reset_halt", logfile_dir,
+                               response_list, "malformed_reset_halt.json")
+
+
+def verify_break_insert_response(response_list, logfile_dir=""):
+    """The bkpt payload of a -break-insert response."""
+    results = [r for r in response_list if r["type"] == "result"]
+    if (len(results) != 1):
+        raise GdbResponseError("Unexpected GDB response in insert_breakpoint", logfile_dir,
+                               response_list, "malformed_insert_bp.json")
+    result = results[0]
+    if ("error" in result["message"]):
+        payload_error_msg = result["payload"]["msg"]
+        if ("No line" in payload_error_msg or "No source file named" in payload_error_msg):
+            raise GdbResponseError(payload_error_msg+" defined in the elf file")
+        raise GdbResponseError("Unexpected result_msg in insert_breakpoint", logfile_dir,
+                               result, "malformed_bp_cmd_response.json")
+    return (result["payload"] or {}).get("bkpt")
+
+
+def verify_break_delete_response(response_list, logfile_dir=""):
+    result = result_record(response_list)
+    if (result is None or "done" not in result["message"]):
+        raise GdbResponseError("Unexpected GDB response in delete_all_breakpoints", logfile_dir,
+                               response_list, "malformed_delete_all_breakpoints.json")
+
+
+def verify_change_working_dir_response(response_list, logfile_dir=""):
+    result = result_record(response_list)
+    if ("Working directory" in stream_text(response_list, ("console",))):
+        return
+    elif (result is not None and result["message"] == "error" and
+          "No such file or directory" in result["payload"]["msg"]):
+        raise FileNotFoundError(result["payload"]["msg"])
+    raise GdbResponseError("Unexpected GDB response in change_working_dir", logfile_dir,
+                           response_list, "malformed_change_working_dir.json")
@@ -0,0 +1,312 @@
+import itertools
+import os
+import select
+import threading
+import time
+from collections import deque
+from pygdbmi import gdbmiparser
+from pygdbmi.constants import DEFAULT_GDB_TIMEOUT_SEC, GdbTimeoutError
+from .mi_events import MiEventStream, is_event_record
+
+
+READ_CHUNK_SIZE = 65536
+MAX_QUEUED_RECORDS = 4096
+SETTLE_TIME_SEC = 0.2
+READER_POLL_SEC = 0.1
+
+# Commands whose response is only complete once the target stopped again.
+STOPPING_COMMANDS = ("-exec-next", "-exec-step", "-exec-finish",
+                     "-exec-interrupt", "-exec-until", "-exec-return")
+
+
+class TokenResponseCollector:
+    """Groups MI records into per-command responses using result record tokens.
+
+    GDB executes commands in order, so every stream or async record read
+    before a result record belongs to the command owning that result.
+    Untagged result records are matched to the oldest pending token.
+    """
+
+    def __init__(self, tokens):
+        self.tokens = list(tokens)
+        self.responses = {token: [] for token in self.tokens}
+        self.unassigned = []
+        self.__pending_tokens = list(self.tokens)
+
+    def add(self, record):
+        self.unassigned.append(record)
+        if (record["type"] != "result"):
+            return
+        token = record.get("token")
+        if (token is None and len(self.__pending_tokens) != 0):
+            token = self.__pending_tokens[0]
+        if (token in self.__pending_tokens):
+            self.__pending_tokens.remove(token)
+            self.responses[token] += self.unassigned
+            self.unassigned = []
+
+    def is_complete(self):
+        return len(self.__pending_tokens) == 0
+
+    def response_lists(self):
+        return [self.responses[token] for token in self.tokens]
+
+
+def tag_commands(commands, token_sequence):
+    tokens = []
+    tagged_commands = []
+    for command in commands:
+        token = next(token_sequence)
+        tokens.append(token)
+        tagged_commands.append(str(token) + command)
+    return tokens, tagged_commands
+
+
+def read_token_responses(read_records, tokens, timeout_sec, raise_error_on_timeout=True):
+    collector = TokenResponseCollector(tokens)
+    deadline = time.monotonic() + timeout_sec
+    while (collector.is_complete() == False):
+        remaining_sec = deadline - time.monotonic()
+        if (remaining_sec <= 0):
+            if (raise_error_on_timeout):
+                raise GdbTimeoutError(
+                    "Did not get result record from gdb after %s seconds" % timeout_sec)
+            break
+        for record in read_records(remaining_sec):
+            collector.add(record)
+    return collector
+
+
+class PygdbmiTransport:
+    """Forwards to a pygdbmi GdbController and publishes the async and
+    stream records of every response to an MiEventStream."""
+
+    def __init__(self, gdb_controller):
+        self.gdb_controller = gdb_controller
+        self.events = MiEventStream()
+        self.__token_sequence = itertools.count(1)
+        # Keeps a command and the reads of its response together, as MiResultTransport does.
+        self.__lock = threading.RLock()
+
+    def write(self, *args, **kwargs):
+        with self.__lock:
+            return self.__publish(self.gdb_controller.write(*args, **kwargs))
+
+    def get_gdb_response(self, *args, **kwargs):
+        with self.__lock:
+            return self.__publish(self.gdb_controller.get_gdb_response(*args, **kwargs))
+
+    def poll_events(self):
+        # pygdbmi only reads gdb's output when asked, so pending records are
+        # read without blocking. They only go to the event stream, replaying
+        # them into a later command response would pass off old stops as new.
+        with self.__lock:
+            self.__publish(self.gdb_controller.get_gdb_response(0, False))
+
+    def write_pipelined(self, commands, timeout_sec=DEFAULT_GDB_TIMEOUT_SEC, raise_error_on_timeout=True):
+        with self.__lock:
+            tokens, tagged_commands = tag_commands(commands, self.__token_sequence)
+            self.gdb_controller.write(tagged_commands, timeout_sec, read_response=False)
+            collector = read_token_responses(
+                self.__read_available_records, tokens, timeout_sec, raise_error_on_timeout)
+            return collector.response_lists()
+
+    def exit(self):
+        return self.gdb_controller.exit()
+
+    def __read_available_records(self, timeout_sec):
+        return self.get_gdb_response(timeout_sec, False)
+
+    def __publish(self, response_list):
+        for record in response_list:
+            if (is_event_record(record)):
+                self.events.publish(record)
+        return response_list
+
+
+class MiResultTransport:
+    """Drop-in replacement for GdbController.write/get_gdb_response.
+
+    A background reader thread parses gdb's output continuously and
+    publishes async and stream records to an MiEventStream. write()
+    returns as soon as the result record (^done, ^error, ^running,
+    ^connected) of the command arrives instead of waiting for pygdbmi's
+    additional output window. Every command is tagged with a numeric MI
+    token and its response is matched by that token. Records that do not
+    belong to a command are handed out by get_gdb_response().
+    """
+
+    def __init__(self, gdb_controller):
+        self.gdb_controller = gdb_controller
+        io_manager = gdb_controller.io_manager
+        self.stdin = io_manager.stdin
+        self.stdout_fileno = io_manager.stdout.fileno()
+        self.read_list = [self.stdout_fileno]
+        self.stderr_fileno = -1
+        if io_manager.stderr is not None:
+            self.stderr_fileno = io_manager.stderr.fileno()
+            self.read_list.append(self.stderr_fileno)
+        for fileno in self.read_list:
+            os.set_blocking(fileno, False)
+        self.events = MiEventStream()
+        self.queued_records = deque(maxlen=MAX_QUEUED_RECORDS)
+        self.__incomplete_output = {"stdout": b"", "stderr": b""}
+        self.__token_sequence = itertools.count(1)
+        self.__inbox = deque(maxlen=MAX_QUEUED_RECORDS)
+        self.__inbox_condition = threading.Condition()
+        self.__write_lock = threading.RLock()
+        self.__reader_error = None
+        self.__stop_reader = False
+        self.__reader = threading.Thread(target=self.__read_output, daemon=True)
+        self.__reader.start()
+
+    def write(self, mi_cmd_to_write, timeout_sec=DEFAULT_GDB_TIMEOUT_SEC,
+              raise_error_on_timeout=True, read_response=True):
+        commands = self.__as_command_list(mi_cmd_to_write)
+        with self.__write_lock:
+            tokens = self.__send(commands)
+            if (read_response == False):
+                return []
+            start = time.monotonic()
+            collector = read_token_responses(
+                self.__read_records, tokens, timeout_sec, raise_error_on_timeout)
+            responses = [r for response in collector.response_lists() for r in response]
+            if (collector.is_complete() == False):
+                responses += collector.unassigned
+            elif (self.__must_wait_for_stop(commands[-1], responses)):
+                responses += self.__read_until_stopped(
+                    collector.unassigned, timeout_sec - (time.monotonic() - start), raise_error_on_timeout)
+            else:
+                self.__unread(collector.unassigned)
+            return responses
+
+    def write_pipelined(self, commands, timeout_sec=DEFAULT_GDB_TIMEOUT_SEC, raise_error_on_timeout=True):
+        with self.__write_lock:
+            tokens = self.__send(commands)
+            collector = read_token_responses(
+                self.__read_records, tokens, timeout_sec, raise_error_on_timeout)
+            self.__unread(collector.unassigned)
+            return collector.response_lists()
+
+    def get_gdb_response(self, timeout_sec=DEFAULT_GDB_TIMEOUT_SEC, raise_error_on_timeout=True):
+        with self.__write_lock:
+            responses = list(self.queued_records)
+            self.queued_records.clear()
+            deadline = time.monotonic() + timeout_sec
+            while True:
+                records = self.__read_records(deadline - time.monotonic())
+                responses += records
+                if (len(records) != 0):
+                    deadline = min(deadline, time.monotonic() + SETTLE_TIME_SEC)
+                elif (len(responses) != 0 or time.monotonic() >= deadline):
+                    break
+        if (len(responses) == 0 and raise_error_on_timeout):
+            raise GdbTimeoutError(
+                "Did not get response from gdb after %s seconds" % timeout_sec)
+        return responses
+
+    def poll_events(self):
+        # The reader thread publishes records as soon as gdb prints them.
+        return
+
+    def exit(self):
+        self.__stop_reader = True
+        result = self.gdb_controller.exit()
+        self.__reader.join()
+        return result
+
+    def __as_command_list(self, mi_cmd_to_write):
+        if (isinstance(mi_cmd_to_write, str)):
+            return [mi_cmd_to_write]
+        elif (isinstance(mi_cmd_to_write, list)):
+            return mi_cmd_to_write
+        raise TypeError(
+            "The gdb mi command must a be str or list. Got " + str(type(mi_cmd_to_write)))
+
+    def __send(self, commands):
+        tokens, tagged_commands = tag_commands(commands, self.__token_sequence)
+        data = "".join(cmd.rstrip("\n") + "\n" for cmd in tagged_commands)
+        self.stdin.write(data.encode())
+        self.stdin.flush()
+        return tokens
+
+    def __unread(self, records):
+        self.queued_records.extend(records)
+
+    def __must_wait_for_stop(self, command, responses):
+        if (command.startswith(STOPPING_COMMANDS) == False):
+            return False
+        return any(r["type"] == "result" and r["message"] != "error" for r in responses) and \
+            not any(self.__is_stopped_record(r) for r in responses)
+
+    def __read_until_stopped(self, records, timeout_sec, raise_error_on_timeout):
+        responses = []
+        deadline = time.monotonic() + timeout_sec
+        while True:
+            for index, record in enumerate(records):
+                responses.append(record)
+                if (self.__is_stopped_record(record)):
+                    self.__unread(records[index + 1:])
+                    return responses
+            remaining_sec = deadline - time.monotonic()
+            if (remaining_sec <= 0):
+                if (raise_error_on_timeout):
+                    raise GdbTimeoutError(
+                        "Did not get *stopped record from gdb after %s seconds" % timeout_sec)
+                return responses
+            records = self.__read_records(remaining_sec)
+
+    def __is_stopped_record(self, record):
+        return record["type"] == "notify" and record["message"] == "stopped"
+
+    def __read_records(self, timeout_sec):
+        with self.__inbox_condition:
+            if (len(self.__inbox) == 0 and self.__reader_error is None):
+                self.__inbox_condition.wait(max(timeout_sec, 0))
+            if (len(self.__inbox) == 0 and self.__reader_error is not None):
+                raise self.__reader_error
+            records = list(self.__inbox)
+            self.__inbox.clear()
+        return records
+
+    def __read_output(self):
+        try:
+            while (self.__stop_reader == False):
+                self.__deliver(self.__read_available_output())
+        except (ConnectionError, OSError, ValueError) as e:
+            with self.__inbox_condition:
+                self.__reader_error = ConnectionError(str(e))
+                self.__inbox_condition.notify_all()
+
+    def __deliver(self, records):
+        if (len(records) == 0):
+            return
+        for record in records:
+            if (is_event_record(record)):
+                self.events.publish(record)
+        with self.__inbox_condition:
+            self.__inbox.extend(records)
+            self.__inbox_condition.notify_all()
+
+    def __read_available_output(self):
+        events, _, _ = select.select(self.read_list, [], [], READER_POLL_SEC)
+        records = []
+        for fileno in events:
+            stream = "stdout" if fileno == self.stdout_fileno else "stderr"
+            raw_output = os.read(fileno, READ_CHUNK_SIZE)
+            if (len(raw_output) == 0):
+                raise ConnectionError("gdb process closed its " + stream)
+            records += self.__parse_output(raw_output, stream)
+        return records
+
+    def __parse_output(self, raw_output, stream):
+        raw_output = self.__incomplete_output[stream] + raw_output
+        complete_output, _, self.__incomplete_output[stream] = raw_output.rpartition(b"\n")
+        records = []
+        for line in complete_output.decode(errors="replace").split("\n"):
+            if (line.strip() == "" or gdbmiparser.response_is_finished(line)):
+                continue
+            record = gdbmiparser.parse_response(line)
+            record["stream"] = stream
+            records.append(record)
+        return records
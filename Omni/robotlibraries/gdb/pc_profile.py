@@ -0,0 +1,65 @@
+import re
+from collections import Counter
+
+
+DWT_PCSR_ADDRESS = 0xe000101c
+# DWT_PCSR reads as all ones while the core is halted or sleeping.
+PCSR_NO_SAMPLE = 0xffffffff
+DEFAULT_SAMPLE_RATE_HZ = 100
+PROFILE_METHOD_AUTO = "auto"
+PROFILE_METHOD_PCSR = "pcsr"
+PROFILE_METHOD_HALT = "halt"
+UNKNOWN_FUNCTION = "[unknown]"
+MDW_REPLY_PATTERN = re.compile(r"0x[0-9a-fA-F]+:\s+([0-9a-fA-F]+)")
+
+
+def build_pcsr_read_cmd():
+    # An OpenOCD TCL command. OpenOCD reads the DWT through the debug port without halting the core.
+    return f"mdw {hex(DWT_PCSR_ADDRESS)}"
+
+
+def parse_pcsr_reply(text):
+    """Sampled PC from the output of build_pcsr_read_cmd, None if the core
+    was not running or the reply could not be parsed."""
+    match = MDW_REPLY_PATTERN.search(text)
+    if (match is None):
+        return None
+    pc = int(match.group(1), 16)
+    return None if pc == PCSR_NO_SAMPLE else pc
+
+
+def resolve_stacks(address_stacks, function_at):
+    """Map stacks of addresses, outermost frame first, to function names.
+    Every distinct address is looked up once."""
+    names = {}
+    stacks = []
+    for stack in address_stacks:
+        for address in stack:
+            if (address not in names):
+                function = function_at(address)
+                names[address] = UNKNOWN_FUNCTION if function is None else function.name
+        stacks.append(tuple(names[address] for address in stack))
+    return stacks
+
+
+def flat_profile(stacks):
+    """Self and total sample counts per function, hottest first."""
+    self_samples = Counter(stack[-1] for stack in stacks)
+    total_samples = Counter(function for stack in stacks for function in set(stack))
+    sample_count = len(stacks)
+    profile = []
+    for function, total in total_samples.items():
+        profile.append({"function": function, "self_samples": self_samples[function],
+                        "self_percent": 100.0 * self_samples[function] / sample_count,
+                        "total_samples": total, "total_percent": 100.0 * total / sample_count})
+    return sorted(profile, key=lambda entry: (-entry["self_samples"], -entry["total_samples"], entry["function"]))
+
+
+def collapsed_stacks(stacks):
+    """Stacks in the folded format read by flamegraph.pl and speedscope."""
+    return "".join(f"{';'.join(stack)} {count}\n" for stack, count in sorted(Counter(stacks).items()))
+
+
+def write_collapsed_stacks(path, stacks):
+    with open(path, "w") as collapsed_file:
+        collapsed_file.write(collapsed_stacks(stacks))
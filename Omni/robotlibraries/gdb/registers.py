@@ -0,0 +1,38 @@
+class RegisterFile:
+    """Register names of the target and a snapshot of their values.
+
+    The names only change with the target description, so they are kept
+    until reset_names. The snapshot is valid for one stop and must be
+    cleared whenever the target resumes.
+    """
+
+    def __init__(self):
+        self.names = None
+        self.snapshot = None
+
+    def set_names(self, register_names):
+        self.names = list(register_names)
+
+    def store(self, register_values):
+        snapshot = {}
+        for register in register_values:
+            number = int(register["number"])
+            if (number < len(self.names) and self.names[number] != ""):
+                snapshot[self.names[number]] = register_value(register["value"])
+        self.snapshot = snapshot
+        return dict(snapshot)
+
+    def clear(self, event=None):
+        self.snapshot = None
+
+    def reset_names(self):
+        self.names = None
+        self.snapshot = None
+
+
+def register_value(value):
+    # Vector and floating point registers come back as gdb structs.
+    try:
+        return int(value, 16)
+    except ValueError:
+        return value
@@ -0,0 +1,90 @@
+import threading
+import time
+
+
+STATE_UNKNOWN = "unknown"
+STATE_RUNNING = "running"
+STATE_STOPPED = "stopped"
+
+
+class TargetRunState:
+    """Run state of the target tracked from gdb's *running/*stopped records.
+
+    Fed as an MiEventStream subscriber, so queries are answered from memory
+    instead of sending "info program" to gdb.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.__lock:
+            self.state = STATE_UNKNOWN
+            self.__clear_stop()
+
+    def set_state(self, state):
+        with self.__lock:
+            self.state = state
+            self.__clear_stop()
+
+    def confirm_stopped(self, breakpoint_number=""):
+        """The target was found stopped without a *stopped record, e.g. by
+        info program. The details of a stop already tracked are kept."""
+        with self.__lock:
+            if (self.state == STATE_STOPPED):
+                return
+            self.state = STATE_STOPPED
+            self.__clear_stop()
+            if (breakpoint_number != ""):
+                self.reason = "breakpoint-hit"
+                self.breakpoint_number = str(breakpoint_number)
+
+    def update(self, event):
+        if (event["type"] != "notify"):
+            return
+        if (event["message"] == "running"):
+            self.set_state(STATE_RUNNING)
+        elif (event["message"] == "stopped"):
+            self.__update_stop(event["payload"] or {})
+
+    def is_known(self):
+        return self.state != STATE_UNKNOWN
+
+    def is_stopped_at_breakpoint(self):
+        with self.__lock:
+            return self.state == STATE_STOPPED and self.reason == "breakpoint-hit"
+
+    def stop_info(self):
+        with self.__lock:
+            return {"state": self.state, "reason": self.reason,
+                    "breakpoint_number": self.breakpoint_number,
+                    "signal_name": self.signal_name, "thread_id": self.thread_id,
+                    "frame": dict(self.frame), "file": self.file,
+                    "fullname": self.fullname, "line": self.line,
+                    "stop_time": self.stop_time}
+
+    def __update_stop(self, payload):
+        frame = payload.get("frame") or {}
+        with self.__lock:
+            self.state = STATE_STOPPED
+            self.reason = payload.get("reason", "")
+            self.breakpoint_number = payload.get("bkptno", "")
+            self.signal_name = payload.get("signal-name", "")
+            self.thread_id = payload.get("thread-id", "")
+            self.frame = frame
+            self.file = frame.get("file", "")
+            self.fullname = frame.get("fullname", "")
+            self.line = int(frame.get("line", -1))
+            self.stop_time = time.monotonic()
+
+    def __clear_stop(self):
+        self.reason = ""
+        self.breakpoint_number = ""
+        self.signal_name = ""
+        self.thread_id = ""
+        self.frame = {}
+        self.file = ""
+        self.fullname = ""
+        self.line = -1
+        self.stop_time = None
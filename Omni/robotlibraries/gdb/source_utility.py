@@ -1,4 +1,5 @@
 import os
+import linecache
 
 
 class TagNotFoundError(Exception):
@@ -10,11 +11,21 @@ class TagError(Exception):
 
 
 def line_of_test_tag(test_tag, file):
-    match_in_line = []
+    match_in_line = scan_test_tags([test_tag], file)[test_tag]
+    return line_from_tag_matches(test_tag, file, match_in_line)
+
+
+def scan_test_tags(test_tags, file):
+    match_in_line = {tag: [] for tag in test_tags}
     with open(file) as SourceFile:
         for num, line in enumerate(SourceFile, 1):
-            if test_tag in line:
-                match_in_line.append(num)
+            for tag in match_in_line:
+                if tag in line:
+                    match_in_line[tag].append(num)
+    return match_in_line
+
+
+def line_from_tag_matches(test_tag, file, match_in_line):
     if (len(match_in_line) == 0):
         raise TagNotFoundError("Tag \""+test_tag+"\" not found in file "+file)
     elif (len(match_in_line) == 1):
@@ -26,3 +37,30 @@ def line_of_test_tag(test_tag, file):
 
 def src_name_from_path(src_path):
     return str(os.path.basename(src_path).split('/')[-1])
+
+
+def verify_source_file(source_file_path):
+    if (not os.path.isfile(source_file_path)):
+        raise FileNotFoundError(
+            f"""The specified source file path '{source_file_path}' does not exist or is not a file. Please provide 
+                a valid path to the source file where you want to set the breakpoint.""")
+
+
+def resolve_line_number(source_file_path, tag="", line_number=-1):
+    if (tag != "" and line_number != -1):
+        verify_line_and_tag(source_file_path, line_number, tag)
+        return line_number
+    elif (tag != "" and line_number == -1):
+        return line_of_test_tag(tag, source_file_path)
+    elif (tag == "" and line_number != -1):
+        return line_number
+    else:
+        raise ValueError(
+            "Invalid arguments. line_number or tag or both must be defined")
+
+
+def verify_line_and_tag(source_file_path, line_number, tag):
+    target_line = linecache.getline(source_file_path, line_number)
+    if (not (tag in target_line)):
+        raise ValueError(
+            f"Invalid line or tag value. Line {line_number} does not contain \"{tag}\".")
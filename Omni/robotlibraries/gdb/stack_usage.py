@@ -0,0 +1,18 @@
+import numpy
+
+
+STACK_PAINT_PATTERN = 0xa5
+DEFAULT_STACK_REGIONS = {"main": ("_sstack", "_estack")}
+
+
+def build_paint_cmd(start, length, pattern=STACK_PAINT_PATTERN):
+    # gdb repeats the contents until count bytes are written.
+    return f"-data-write-memory-bytes {hex(start)} {pattern:02x} {length}"
+
+
+def stack_usage(data, start, pattern=STACK_PAINT_PATTERN):
+    """Usage of a descending stack painted with pattern, read back as data."""
+    changed = numpy.flatnonzero(numpy.frombuffer(data, dtype=numpy.uint8) != pattern)
+    used = 0 if len(changed) == 0 else len(data) - int(changed[0])
+    return {"start": start, "size": len(data), "used": used, "free": len(data) - used,
+            "high_water_address": start + len(data) - used}
@@ -0,0 +1,211 @@
+import copy
+import pickle
+import xml.etree.ElementTree as ElementTree
+from collections import namedtuple
+from .elf_symbols import file_sha256
+
+
+SVD_CACHE_SUFFIX = ".omni-cache.pickle"
+SVD_CACHE_VERSION = 2
+DEFAULT_REGISTER_SIZE = 32
+DEFAULT_ACCESS = "read-write"
+WRITE_ONLY_ACCESS = ("write-only", "writeOnce")
+
+SvdField = namedtuple("SvdField", ["name", "bit_offset", "bit_width"])
+SvdRegister = namedtuple("SvdRegister", ["name", "offset", "size", "reset_value", "fields", "access", "read_action"])
+
+
+class SvdError(Exception):
+    pass
+
+
+class SvdPeripheral:
+    def __init__(self, name, base_address, registers):
+        self.name = name
+        self.base_address = base_address
+        self.registers = sorted(registers, key=lambda r: r.offset)
+        self.__by_name = {r.name: r for r in self.registers}
+
+    def register(self, name):
+        if (name not in self.__by_name):
+            raise SvdError(f"Peripheral {self.name} has no register {name}")
+        return self.__by_name[name]
+
+    def readable_registers(self, register_names=None, read_side_effects=False):
+        """Registers that can be read without changing the peripheral.
+
+        Write-only registers, and registers whose readAction changes them
+        unless read_side_effects is set, are skipped when reading the
+        whole peripheral and raise SvdError when named.
+        """
+        if (register_names is None):
+            return [r for r in self.registers if self.__unreadable_reason(r, read_side_effects) is None]
+        registers = [self.register(n) for n in register_names]
+        for register in registers:
+            reason = self.__unreadable_reason(register, read_side_effects)
+            if (reason is not None):
+                raise SvdError(f"Register {self.name}.{register.name} {reason}")
+        return registers
+
+    def block_spans(self, registers):
+        """(offset, length) of the blocks of adjacent registers. Reserved
+        gaps between registers are not read."""
+        spans = []
+        for register in sorted(registers, key=lambda r: r.offset):
+            end = register.offset + register.size // 8
+            if (len(spans) != 0 and register.offset <= spans[-1][0] + spans[-1][1]):
+                spans[-1] = (spans[-1][0], max(spans[-1][1], end - spans[-1][0]))
+            else:
+                spans.append((register.offset, end - register.offset))
+        return spans
+
+    def __unreadable_reason(self, register, read_side_effects):
+        if (register.access in WRITE_ONLY_ACCESS):
+            return "is write-only"
+        if (register.read_action is not None and not read_side_effects):
+            return f"has a read side effect ({register.read_action}). Use read_side_effects to read it"
+        return None
+
+    def decode(self, data, block_offset, register_names=None):
+        registers = self.registers if register_names is None else [self.register(n) for n in register_names]
+        values = {}
+        for register in registers:
+            start = register.offset - block_offset
+            value = int.from_bytes(data[start:start + register.size // 8], "little")
+            values[register.name] = {"value": value, "fields": decode_fields(register, value)}
+        return values
+
+
+class SvdDevice:
+    """Peripherals, registers and fields of a CMSIS-SVD file."""
+
+    def __init__(self, name, peripherals):
+        self.name = name
+        self.peripherals = {p.name: p for p in peripherals}
+
+    @classmethod
+    def load(cls, svd_path, cache_path=None):
+        cache_path = cache_path or svd_path + SVD_CACHE_SUFFIX
+        svd_sha256 = file_sha256(svd_path)
+        try:
+            with open(cache_path, "rb") as cache_file:
+                cache = pickle.load(cache_file)
+            if (cache["version"] == SVD_CACHE_VERSION and cache["sha256"] == svd_sha256):
+                return cache["device"]
+        except (OSError, pickle.UnpicklingError, EOFError, KeyError, AttributeError):
+            pass
+        device = parse_svd(ElementTree.parse(svd_path).getroot())
+        try:
+            with open(cache_path, "wb") as cache_file:
+                pickle.dump({"version": SVD_CACHE_VERSION, "sha256": svd_sha256, "device": device}, cache_file)
+        except OSError:
+            pass
+        return device
+
+    def peripheral(self, name):
+        if (name not in self.peripherals):
+            raise SvdError(f"Peripheral {name} not found in device {self.name}")
+        return self.peripherals[name]
+
+
+def decode_fields(register, value):
+    return {f.name: (value >> f.bit_offset) & ((1 << f.bit_width) - 1) for f in register.fields}
+
+
+def svd_int(text, default=None):
+    if (text is None):
+        return default
+    text = text.strip().lower()
+    if (text.startswith("#")):
+        return int(text[1:].replace("x", "0"), 2)
+    return int(text, 0)
+
+
+def child_int(element, tag, default=None):
+    return svd_int(element.findtext(tag), default)
+
+
+def parse_svd(root):
+    default_size = child_int(root, "size", DEFAULT_REGISTER_SIZE)
+    default_access = root.findtext("access", DEFAULT_ACCESS)
+    elements = {p.findtext("name"): p for p in root.iter("peripheral")}
+    peripherals = []
+    for name, element in elements.items():
+        base = elements.get(element.get("derivedFrom"))
+        registers_element = element.find("registers")
+        if (registers_element is None and base is not None):
+            registers_element = base.find("registers")
+        size = child_int(element, "size", child_int(base, "size", default_size) if base is not None else default_size)
+        access = element.findtext("access", default_access if base is None else base.findtext("access", default_access))
+        registers = parse_registers(registers_element, 0, size, access) if registers_element is not None else []
+        peripherals.append(SvdPeripheral(name, child_int(element, "baseAddress"), registers))
+    return SvdDevice(root.findtext("name", ""), peripherals)
+
+
+def parse_registers(parent, base_offset, default_size, default_access=DEFAULT_ACCESS, name_prefix=""):
+    registers = []
+    for element in parent:
+        if (element.tag == "cluster"):
+            for cluster in expand_dim(element):
+                registers += parse_registers(cluster, base_offset + child_int(cluster, "addressOffset", 0),
+                                             child_int(cluster, "size", default_size),
+                                             cluster.findtext("access", default_access),
+                                             name_prefix + cluster.findtext("name") + "_")
+        elif (element.tag == "register"):
+            for register in expand_dim(element):
+                registers.append(SvdRegister(
+                    name_prefix + register.findtext("name"),
+                    base_offset + child_int(register, "addressOffset", 0),
+                    child_int(register, "size", default_size),
+                    child_int(register, "resetValue", 0),
+                    tuple(parse_field(f) for f in register.iter("field")),
+                    register.findtext("access", default_access),
+                    read_action(register)))
+    return registers
+
+
+def read_action(register):
+    """readAction of the register, or of its first field that has one."""
+    action = register.findtext("readAction")
+    if (action is None):
+        action = next((f.findtext("readAction") for f in register.iter("field")
+                       if f.find("readAction") is not None), None)
+    return None if action is None else action.strip()
+
+
+def expand_dim(element):
+    """Unroll an SVD array or list (dim, dimIncrement, dimIndex)."""
+    dim = child_int(element, "dim")
+    if (dim is None):
+        return [element]
+    increment = child_int(element, "dimIncrement", 0)
+    index_text = element.findtext("dimIndex")
+    if (index_text is None):
+        indexes = [str(i) for i in range(dim)]
+    elif ("-" in index_text and "," not in index_text):
+        first, last = index_text.split("-")
+        indexes = [str(i) for i in range(int(first), int(last) + 1)]
+    else:
+        indexes = index_text.split(",")
+    expanded = []
+    for i, index in enumerate(indexes[:dim]):
+        copied = copy.deepcopy(element)
+        copied.find("name").text = element.findtext("name").replace("[%s]", index).replace("%s", index)
+        offset = copied.find("addressOffset")
+        offset.text = hex(child_int(element, "addressOffset", 0) + i * increment)
+        expanded.append(copied)
+    return expanded
+
+
+def parse_field(element):
+    name = element.findtext("name")
+    if (element.find("bitOffset") is not None):
+        return SvdField(name, child_int(element, "bitOffset"), child_int(element, "bitWidth", 1))
+    if (element.find("lsb") is not None):
+        lsb, msb = child_int(element, "lsb"), child_int(element, "msb")
+        return SvdField(name, lsb, msb - lsb + 1)
+    bit_range = element.findtext("bitRange")
+    if (bit_range is None):
+        raise SvdError(f"Field {name} has no bit position")
+    msb, lsb = (int(b) for b in bit_range.strip("[] ").split(":"))
+    return SvdField(name, lsb, msb - lsb + 1)
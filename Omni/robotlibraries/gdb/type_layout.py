@@ -0,0 +1,242 @@
+import json
+import math
+import re
+import struct
+import numpy
+from .value_format import integer_type_is_signed
+
+
+TYPE_CACHE_SUFFIX = ".omni-types.json"
+TYPE_CACHE_VERSION = 1
+
+MEMBER_LINE_PATTERN = re.compile(r"^/\*\s*(?:(\d+)(?::\s*(\d+))?)?\s*\|?\s*(\d+)\s*\*/\s*(.*)$")
+TOTAL_SIZE_PATTERN = re.compile(r"^/\*\s*total size \(bytes\):\s*(\d+)\s*\*/$")
+CLOSING_LINE_PATTERN = re.compile(r"^}\s*(\w*)\s*((?:\[\d+\]\s*)*);?$")
+DECLARATION_PATTERN = re.compile(r"^(?P<type>.*?)\s*(?P<pointer>\*[\s*]*)?(?P<name>\w+)\s*(?P<dims>(?:\[\d+\]\s*)*)$")
+FUNCTION_POINTER_PATTERN = re.compile(r"\(\*\s*(\w+)\)")
+ARRAY_DIMS_PATTERN = re.compile(r"\[(\d+)\]")
+FLOAT_TYPE_WORDS = {"float", "double"}
+
+
+class GdbTypeLayoutError(Exception):
+    pass
+
+
+def split_array_type(type_name):
+    """Split "struct sample [2][500]" into ("struct sample", [2, 500])."""
+    type_name = type_name.strip()
+    base = type_name.split("[", 1)[0].strip()
+    return base, [int(d) for d in ARRAY_DIMS_PATTERN.findall(type_name[len(base):])]
+
+
+def base_layout(type_name, size):
+    type_name = " ".join(w for w in type_name.split() if w not in ("const", "volatile"))
+    words = set(type_name.split())
+    if (words & FLOAT_TYPE_WORDS):
+        encoding = "float"
+    elif (words & {"_Bool", "bool"}):
+        encoding = "bool"
+    elif (type_name.startswith("enum ")):
+        encoding = "signed"
+    else:
+        signed = integer_type_is_signed(type_name)
+        if (signed is None and words != {"char"}):
+            return None
+        # Plain char is unsigned on the ARM EABI targets this library drives.
+        encoding = "signed" if signed else "unsigned"
+    return {"kind": "base", "type": type_name, "size": int(size), "encoding": encoding}
+
+
+def pointer_layout(type_name, size):
+    return {"kind": "base", "type": type_name, "size": int(size), "encoding": "pointer"}
+
+
+def array_layout(element, dims):
+    for count in reversed(dims):
+        element = {"kind": "array", "type": element["type"] + f" [{count}]",
+                   "size": element["size"] * count, "count": count, "element": element}
+    return element
+
+
+def parse_type_layout(type_name, ptype_text, size, resolve_type):
+    """Build the layout of type_name from the output of "ptype /o type_name".
+
+    Member types that gdb prints by name only, typedefs for example, are
+    looked up through resolve_type(type_name).
+    """
+    lines = [line.strip() for line in ptype_text.splitlines() if line.strip()]
+    header = next((line for line in lines if "type = " in line), None)
+    if (header is None):
+        raise GdbTypeLayoutError(f"Unexpected ptype output for type '{type_name}'")
+    declaration = header.split("type = ", 1)[1]
+    if (not declaration.endswith("{") or declaration.startswith("enum")):
+        base_name, dims = split_array_type(declaration.split("{", 1)[0])
+        if (len(dims) != 0):
+            return array_layout(resolve_type(base_name), dims)
+        layout = base_layout(base_name, size)
+        if (layout is None):
+            if (base_name.endswith("*") or "(*)" in base_name):
+                return pointer_layout(base_name, size)
+            raise GdbTypeLayoutError(f"Can not decode values of type '{type_name}'")
+        return layout
+    root = {"kind": aggregate_kind(declaration), "type": type_name, "size": int(size), "fields": []}
+    stack = [(root, 0)]
+    for line in lines[lines.index(header) + 1:]:
+        member = MEMBER_LINE_PATTERN.match(line)
+        total_size = TOTAL_SIZE_PATTERN.match(line)
+        closing = CLOSING_LINE_PATTERN.match(line)
+        if (member is not None):
+            stack = parse_member(member, stack, resolve_type)
+        elif (total_size is not None):
+            stack[-1][0]["size"] = int(total_size.group(1))
+        elif (closing is not None and len(stack) > 1):
+            nested, _ = stack.pop()
+            field = stack[-1][0]["fields"][-1]
+            field["name"] = closing.group(1)
+            field["layout"] = array_layout(nested, [int(d) for d in ARRAY_DIMS_PATTERN.findall(closing.group(2))])
+    return root
+
+
+def aggregate_kind(declaration):
+    return "union" if declaration.startswith("union") else "struct"
+
+
+def parse_member(member, stack, resolve_type):
+    container, container_offset = stack[-1]
+    offset_text, bit_offset, size, declaration = member.groups()
+    offset = container_offset
+    if (offset_text is not None):
+        # gdb prints offsets from the start of the outermost type, but
+        # restarts them for aggregates nested in a union.
+        offset = int(offset_text)
+        if (offset < container_offset):
+            offset += container_offset
+    field = {"name": "", "offset": offset - container_offset}
+    container["fields"].append(field)
+    if (declaration.endswith("{")):
+        nested = {"kind": aggregate_kind(declaration), "type": declaration[:-1].strip(),
+                  "size": int(size), "fields": []}
+        field["layout"] = nested
+        return stack + [(nested, offset)]
+    declaration = declaration.rstrip(";").strip()
+    if (bit_offset is not None):
+        declaration, bit_size = declaration.rsplit(":", 1)
+        field["bit_offset"] = int(bit_offset)
+        field["bit_size"] = int(bit_size)
+    field["name"], field["layout"] = parse_declaration(declaration.strip(), int(size), resolve_type)
+    return stack
+
+
+def parse_declaration(declaration, size, resolve_type):
+    function_pointer = FUNCTION_POINTER_PATTERN.search(declaration)
+    if (function_pointer is not None):
+        return function_pointer.group(1), pointer_layout(declaration, size)
+    match = DECLARATION_PATTERN.match(declaration)
+    if (match is None):
+        raise GdbTypeLayoutError(f"Can not parse member declaration '{declaration}'")
+    dims = [int(d) for d in ARRAY_DIMS_PATTERN.findall(match.group("dims"))]
+    element_size = size // max(math.prod(dims), 1)
+    type_name = match.group("type")
+    if (match.group("pointer")):
+        element = pointer_layout(type_name + " " + match.group("pointer").replace(" ", ""), element_size)
+    else:
+        element = base_layout(type_name, element_size) or resolve_type(type_name)
+    return match.group("name"), array_layout(element, dims)
+
+
+def layout_dtype(layout, endian="<"):
+    """NumPy dtype of a layout. Bitfields have no NumPy representation and
+    are left out of structured dtypes."""
+    if (layout["kind"] == "base"):
+        kind = {"signed": "i", "float": "f"}.get(layout["encoding"], "u")
+        if (layout["size"] not in (1, 2, 4, 8) or (kind == "f" and layout["size"] < 4)):
+            return numpy.dtype(f"V{layout['size']}")
+        return numpy.dtype(f"{endian}{kind}{layout['size']}")
+    elif (layout["kind"] == "array"):
+        return numpy.dtype((layout_dtype(layout["element"], endian), (layout["count"],)))
+    names, formats, offsets = [], [], []
+    for index, field in enumerate(layout["fields"]):
+        if ("bit_size" in field):
+            continue
+        names.append(field["name"] or f"_anonymous{index}")
+        formats.append(layout_dtype(field["layout"], endian))
+        offsets.append(field["offset"])
+    return numpy.dtype({"names": names, "formats": formats, "offsets": offsets, "itemsize": layout["size"]})
+
+
+def decode_value(layout, data, offset=0, endian="<"):
+    """Decode the object at data[offset:] into Python dicts, lists and scalars."""
+    if (layout["kind"] == "array"):
+        element = layout["element"]
+        return [decode_value(element, data, offset + i * element["size"], endian) for i in range(layout["count"])]
+    elif (layout["kind"] in ("struct", "union")):
+        value = {}
+        for field in layout["fields"]:
+            if ("bit_size" in field):
+                value[field["name"]] = decode_bitfield(field, data, offset, endian)
+            else:
+                value[field["name"]] = decode_value(field["layout"], data, offset + field["offset"], endian)
+        return value
+    raw = bytes(data[offset:offset + layout["size"]])
+    if (layout["encoding"] == "float"):
+        return struct.unpack(endian + {4: "f", 8: "d"}[layout["size"]], raw)[0]
+    value = int.from_bytes(raw, "little" if endian == "<" else "big", signed=layout["encoding"] == "signed")
+    return bool(value) if layout["encoding"] == "bool" else value
+
+
+def decode_bitfield(field, data, offset, endian):
+    byte_count = (field["bit_offset"] + field["bit_size"] + 7) // 8
+    start = offset + field["offset"]
+    storage = int.from_bytes(bytes(data[start:start + byte_count]), "little" if endian == "<" else "big")
+    shift = field["bit_offset"] if endian == "<" else byte_count * 8 - field["bit_offset"] - field["bit_size"]
+    value = (storage >> shift) & ((1 << field["bit_size"]) - 1)
+    if (field["layout"]["encoding"] == "signed" and value >> (field["bit_size"] - 1)):
+        value -= 1 << field["bit_size"]
+    return value
+
+
+class TypeLayoutCache:
+    """Type layouts of one ELF file, persisted next to it.
+
+    The cache file is keyed by the sha256 of the ELF, so layouts read from
+    a previous build are discarded instead of decoding memory wrongly.
+    """
+
+    def __init__(self, cache_path=None, elf_sha256=""):
+        self.cache_path = cache_path
+        self.elf_sha256 = elf_sha256
+        self.__layouts = {}
+        if (cache_path is not None):
+            self.__load()
+
+    def get(self, type_name):
+        return self.__layouts.get(type_name)
+
+    def store(self, type_name, layout):
+        self.__layouts[type_name] = layout
+        self.save()
+
+    def save(self):
+        if (self.cache_path is None):
+            return
+        cache = {"version": TYPE_CACHE_VERSION, "elf_sha256": self.elf_sha256, "types": self.__layouts}
+        try:
+            with open(self.cache_path, "w") as cache_file:
+                json.dump(cache, cache_file)
+        except OSError:
+            pass
+
+    def __load(self):
+        try:
+            with open(self.cache_path) as cache_file:
+                cache = json.load(cache_file)
+        except (OSError, ValueError):
+            return
+        if (cache.get("version") == TYPE_CACHE_VERSION and cache.get("elf_sha256") == self.elf_sha256):
+            self.__layouts = cache["types"]
+
+    def __contains__(self, type_name):
+        return type_name in self.__layouts
+
+    def __len__(self):
+        return len(self.__layouts)
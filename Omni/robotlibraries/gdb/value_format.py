@@ -0,0 +1,75 @@
+import re
+
+
+INTEGER_TYPE_WORDS = {"unsigned", "signed", "char", "short", "int", "long", "_Bool", "bool"}
+HEX_VALUE_PATTERN = re.compile(r"^0x[0-9a-fA-F]+$")
+
+
+def integer_type_is_signed(type_name):
+    """Signedness of a scalar C type as printed by ptype, or None if values
+    of the type can not be rendered on the host."""
+    type_name = type_name.strip()
+    if (type_name.endswith("*")):
+        return False
+    words = set(type_name.split())
+    if (len(words) == 0 or not words.issubset(INTEGER_TYPE_WORDS)):
+        return None
+    if (words == {"char"}):
+        # Plain char signedness depends on the target ABI.
+        return None
+    if ("unsigned" in words or "_Bool" in words or "bool" in words):
+        return False
+    return True
+
+
+def render_integer(raw_value, size, signed, format):
+    bits = size * 8
+    raw_value &= (1 << bits) - 1
+    if (format == "hex"):
+        return hex(raw_value)
+    elif (format == "bin"):
+        return f"{raw_value:b}"
+    if (signed and raw_value >= 1 << (bits - 1)):
+        return str(raw_value - (1 << bits))
+    return str(raw_value)
+
+
+class ObjectValueCache:
+    """Values printed by gdb during the current stop.
+
+    Scalars whose raw value and type are known are formatted on the host, so
+    every format of an object costs one gdb request per stop. The cache must
+    be cleared whenever the target resumes or its memory is written.
+    """
+
+    def __init__(self):
+        self.__rendered = {}
+        self.__raw = {}
+
+    def get(self, expression, format):
+        rendered = self.__rendered.get(expression, {})
+        if (format in rendered):
+            return rendered[format]
+        if (expression in self.__raw):
+            raw_value, size, signed = self.__raw[expression]
+            value = render_integer(raw_value, size, signed, format)
+            rendered[format] = value
+            self.__rendered[expression] = rendered
+            return value
+        return None
+
+    def store(self, expression, format, value):
+        self.__rendered.setdefault(expression, {})[format] = value
+
+    def store_raw(self, expression, hex_value, type_name, size):
+        signed = integer_type_is_signed(type_name)
+        if (signed is None or not HEX_VALUE_PATTERN.match(hex_value) or not size.isdigit()):
+            return
+        self.__raw[expression] = (int(hex_value, 16), int(size), signed)
+
+    def clear(self, event=None):
+        self.__rendered = {}
+        self.__raw = {}
+
+    def __contains__(self, expression):
+        return expression in self.__rendered or expression in self.__raw
@@ -0,0 +1,78 @@
+import itertools
+
+
+VAR_FORMATS = {"natural": "natural", "dec": "decimal", "hex": "hexadecimal", "bin": "binary"}
+
+
+def var_format(format):
+    if (format not in VAR_FORMATS):
+        raise ValueError(
+            "Invalid value for 'format' parameter. Expected values: 'natural', 'dec', 'hex', or 'bin'. Got: '{}'".format(format))
+    return VAR_FORMATS[format]
+
+
+class VariableWatchSet:
+    """Bookkeeping for a set of persistent gdb variable objects.
+
+    Each watched expression owns one variable object, so after a stop a
+    single "-var-update --all-values *" returns only the values that
+    changed.
+    """
+
+    def __init__(self, name_prefix="omni_watch"):
+        self.name_prefix = name_prefix
+        self.__name_sequence = itertools.count(1)
+        self.__by_expression = {}
+        self.__by_name = {}
+        self.__values = {}
+
+    def create_cmds(self, expressions, format="natural"):
+        format_name = var_format(format)
+        names = []
+        commands = []
+        for expression in expressions:
+            name = f"{self.name_prefix}{next(self.__name_sequence)}"
+            names.append(name)
+            commands.append(f"-var-create {name} * {expression}")
+            if (format_name != "natural"):
+                commands.append(f"-var-set-format {name} {format_name}")
+        return names, commands
+
+    def add(self, expression, name, value):
+        if (expression in self.__by_expression):
+            self.remove(expression)
+        self.__by_expression[expression] = name
+        self.__by_name[name] = expression
+        self.__values[expression] = value
+
+    def remove(self, expression):
+        name = self.__by_expression.pop(expression)
+        self.__by_name.pop(name)
+        self.__values.pop(expression)
+        return name
+
+    def name_of(self, expression):
+        return self.__by_expression[expression]
+
+    def apply_changes(self, changelist):
+        changes = {}
+        for change in changelist:
+            expression = self.__by_name.get(change["name"])
+            if (expression is None):
+                continue
+            value = change.get("value") if change.get("in_scope", "true") == "true" else None
+            self.__values[expression] = value
+            changes[expression] = value
+        return changes
+
+    def expressions(self):
+        return list(self.__by_expression)
+
+    def values(self):
+        return dict(self.__values)
+
+    def __contains__(self, expression):
+        return expression in self.__by_expression
+
+    def __len__(self):
+        return len(self.__by_expression)
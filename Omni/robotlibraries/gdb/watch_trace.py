@@ -0,0 +1,72 @@
+import json
+import os
+import re
+import tempfile
+import numpy
+
+
+TRACE_DIR = os.path.join(tempfile.gettempdir(), "omni-traces")
+DEFAULT_TRACE_EVENTS = 1000
+# gdb prefixes pointer values with their type, "(int *) " or "(void (*)(void)) ".
+POINTER_TYPE_PATTERN = re.compile(r"^\((?:[^()]|\([^()]*\))*\)\s*")
+
+
+def trace_dtype(value_dtype):
+    """One fixed-size record per value change of the traced variable."""
+    value_dtype = numpy.dtype(value_dtype)
+    return numpy.dtype([("timestamp", "<f8"), ("pc", "<u8"), ("old", value_dtype), ("new", value_dtype)])
+
+
+def trace_index_path(trace_path):
+    return trace_path + ".json"
+
+
+def parse_watch_value(text, dtype):
+    """Value of a gdb watchpoint record ("42", "65 'A'", "true", "1.5",
+    "(int *) 0x20000010 <buffer>") as a scalar of dtype."""
+    token = POINTER_TYPE_PATTERN.sub("", text.strip()).split(" ", 1)[0]
+    if (token in ("true", "false")):
+        return token == "true"
+    if (numpy.dtype(dtype).kind == "f"):
+        return float(token)
+    return int(token, 0)
+
+
+class WatchTraceWriter:
+    """Writes trace records into a preallocated memory-mapped file. The
+    JSON index next to it holds the record layout and the record count."""
+
+    def __init__(self, path, expression, value_dtype, capacity=DEFAULT_TRACE_EVENTS):
+        directory = os.path.dirname(path)
+        if (directory != ""):
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.expression = expression
+        self.capacity = int(capacity)
+        self.count = 0
+        self.records = numpy.memmap(path, dtype=trace_dtype(value_dtype), mode="w+", shape=(max(self.capacity, 1),))
+
+    def append(self, timestamp, pc, old, new):
+        self.records[self.count] = (timestamp, pc, old, new)
+        self.count += 1
+
+    def is_full(self):
+        return self.count >= self.capacity
+
+    def close(self):
+        dtype = self.records.dtype
+        self.records.flush()
+        del self.records
+        os.truncate(self.path, self.count * dtype.itemsize)
+        with open(trace_index_path(self.path), "w") as index_file:
+            json.dump({"expression": self.expression, "value_dtype": dtype["old"].str, "count": self.count}, index_file)
+
+
+def load_trace(path):
+    """Records of a trace file as a read-only structured memmap."""
+    with open(trace_index_path(path)) as index_file:
+        index = json.load(index_file)
+    dtype = trace_dtype(index["value_dtype"])
+    if (index["count"] == 0):
+        return numpy.zeros(0, dtype=dtype)
+    return numpy.memmap(path, dtype=dtype, mode="r", shape=(index["count"],))
@@ -0,0 +1,52 @@
+import socket
+
+
+OPENOCD_TCL_PORT = 6666
+OPENOCD_TCL_TERMINATOR = b"\x1a"
+DEFAULT_OPENOCD_TIMEOUT_SEC = 5
+READ_CHUNK_SIZE = 65536
+
+
+class OpenocdError(Exception):
+    pass
+
+
+class OpenocdTimeout(OpenocdError):
+    pass
+
+
+class OpenocdTclClient:
+    """Runs commands on a running OpenOCD through its TCL RPC port. Every
+    command and reply is terminated by 0x1a."""
+
+    def __init__(self, host="localhost", port=OPENOCD_TCL_PORT, timeout_sec=DEFAULT_OPENOCD_TIMEOUT_SEC):
+        try:
+            self.socket = socket.create_connection((host, int(port)), timeout=float(timeout_sec))
+        except OSError as e:
+            raise OpenocdError(f"Unable to connect to the OpenOCD TCL server on {host}:{port}") from e
+        self.__pending = b""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def command(self, command):
+        try:
+            self.socket.sendall(command.encode() + OPENOCD_TCL_TERMINATOR)
+            while (OPENOCD_TCL_TERMINATOR not in self.__pending):
+                chunk = self.socket.recv(READ_CHUNK_SIZE)
+                if (len(chunk) == 0):
+                    raise OpenocdError("OpenOCD closed the TCL connection")
+                self.__pending += chunk
+        except socket.timeout as e:
+            raise OpenocdTimeout(f"No reply from OpenOCD to '{command}'") from e
+        reply, _, self.__pending = self.__pending.partition(OPENOCD_TCL_TERMINATOR)
+        reply = reply.decode(errors="replace")
+        if ("invalid command name" in reply or reply.startswith("Error")):
+            raise OpenocdError(f"OpenOCD rejected '{command}': {reply.strip()}")
+        return reply
+
+    def close(self):
+        self.socket.close()
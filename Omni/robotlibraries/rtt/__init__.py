@@ -0,0 +1,5 @@
+from .rtt_stream import (
+    Rtt,
+    RttError,
+    RttTimeout,
+)
@@ -0,0 +1,236 @@
+import re
+import select
+import socket
+import threading
+import time
+from ..openocd_tcl import OpenocdTclClient, OpenocdError, OpenocdTimeout, OPENOCD_TCL_PORT
+
+
+DEFAULT_RTT_PORT = 9090
+DEFAULT_RTT_ID = "SEGGER RTT"
+DEFAULT_SEARCH_SIZE = 0x10000
+DEFAULT_RTT_TIMEOUT_SEC = 5
+MAX_BUFFER_BYTES = 1 << 20
+READ_CHUNK_SIZE = 65536
+READER_POLL_SEC = 0.1
+
+
+class RttError(Exception):
+    pass
+
+
+class RttTimeout(RttError):
+    pass
+
+
+def build_rtt_setup_cmds(control_block_address, search_size=DEFAULT_SEARCH_SIZE, block_id=DEFAULT_RTT_ID,
+                         channel=0, rtt_port=DEFAULT_RTT_PORT, polling_interval_ms=None):
+    commands = [f'rtt setup {hex(control_block_address)} {hex(search_size)} "{block_id}"']
+    if (polling_interval_ms is not None):
+        commands.append(f"rtt polling_interval {int(polling_interval_ms)}")
+    return commands + ["rtt start", f"rtt server start {rtt_port} {channel}"]
+
+
+def build_rtt_stop_cmds(rtt_port=DEFAULT_RTT_PORT):
+    return [f"rtt server stop {rtt_port}", "rtt stop"]
+
+
+class RttBuffer:
+    """Bounded buffer of received RTT bytes. Once full, the oldest unread
+    bytes are dropped. Waiters consume the bytes up to their match."""
+
+    def __init__(self, max_bytes=MAX_BUFFER_BYTES):
+        self.max_bytes = int(max_bytes)
+        self.data = bytearray()
+        self.bytes_received = 0
+        self.bytes_dropped = 0
+        self.first_receive_time = None
+        self.last_receive_time = None
+        self.match_latencies = []
+        self.error = None
+        self.__condition = threading.Condition()
+
+    def feed(self, chunk):
+        with self.__condition:
+            now = time.monotonic()
+            if (self.first_receive_time is None):
+                self.first_receive_time = now
+            self.last_receive_time = now
+            self.data += chunk
+            self.bytes_received += len(chunk)
+            overflow = len(self.data) - self.max_bytes
+            if (overflow > 0):
+                del self.data[:overflow]
+                self.bytes_dropped += overflow
+            self.__condition.notify_all()
+
+    def close(self, error):
+        with self.__condition:
+            self.error = error
+            self.__condition.notify_all()
+
+    def read(self):
+        with self.__condition:
+            text = self.data.decode(errors="replace")
+            self.data.clear()
+            return text
+
+    def wait_for_line(self, pattern, timeout_sec=DEFAULT_RTT_TIMEOUT_SEC):
+        """First complete line matching the regex pattern. Lines before it
+        are consumed."""
+        regex = re.compile(pattern)
+
+        def find_line():
+            position = 0
+            while True:
+                end = self.data.find(b"\n", position)
+                if (end < 0):
+                    del self.data[:position]
+                    return None
+                text = self.data[position:end].decode(errors="replace").rstrip("\r")
+                position = end + 1
+                if (regex.search(text) is not None):
+                    del self.data[:position]
+                    return text
+        return self.__wait(find_line, pattern, timeout_sec)
+
+    def wait_for_match(self, pattern, timeout_sec=DEFAULT_RTT_TIMEOUT_SEC):
+        """First match of the regex pattern in the unread text, which is
+        consumed up to the end of the match."""
+        regex = re.compile(pattern.encode() if isinstance(pattern, str) else pattern)
+
+        def find_match():
+            match = regex.search(self.data)
+            if (match is None):
+                return None
+            text = match.group(0).decode(errors="replace")
+            del self.data[:match.end()]
+            return text
+        return self.__wait(find_match, pattern, timeout_sec)
+
+    def metrics(self):
+        with self.__condition:
+            duration = 0.0 if self.first_receive_time is None else self.last_receive_time - self.first_receive_time
+            latencies = self.match_latencies
+            return {"bytes_received": self.bytes_received, "bytes_dropped": self.bytes_dropped,
+                    "buffered_bytes": len(self.data), "duration_sec": duration,
+                    "throughput_bytes_per_sec": self.bytes_received / duration if duration > 0 else 0.0,
+                    "matches": len(latencies),
+                    "match_latency_sec": {"min": min(latencies), "mean": sum(latencies) / len(latencies),
+                                          "max": max(latencies)} if len(latencies) != 0 else None}
+
+    def __wait(self, find, pattern, timeout_sec):
+        start = time.monotonic()
+        deadline = start + float(timeout_sec)
+        with self.__condition:
+            while True:
+                found = find()
+                if (found is not None):
+                    # Delay between the bytes completing the match arriving and the match returning.
+                    self.match_latencies.append(time.monotonic() - max(start, self.last_receive_time or start))
+                    return found
+                if (self.error is not None):
+                    raise self.error
+                remaining = deadline - time.monotonic()
+                if (remaining <= 0):
+                    raise RttTimeout(f"No RTT output matching '{pattern}' after {timeout_sec} seconds")
+                self.__condition.wait(remaining)
+
+
+class RttStream:
+    """Reads an OpenOCD RTT server port on a background thread into an
+    RttBuffer without blocking the caller."""
+
+    def __init__(self, buffer, host="localhost", port=DEFAULT_RTT_PORT, timeout_sec=DEFAULT_RTT_TIMEOUT_SEC):
+        try:
+            self.socket = socket.create_connection((host, int(port)), timeout=float(timeout_sec))
+        except OSError as e:
+            raise RttError(f"Unable to connect to the RTT server on {host}:{port}") from e
+        self.socket.setblocking(False)
+        self.buffer = buffer
+        self.__stop = False
+        self.__reader = threading.Thread(target=self.__read, daemon=True)
+        self.__reader.start()
+
+    def stop(self):
+        self.__stop = True
+        self.__reader.join()
+        self.socket.close()
+
+    def __read(self):
+        try:
+            while (self.__stop == False):
+                readable, _, _ = select.select([self.socket], [], [], READER_POLL_SEC)
+                if (len(readable) == 0):
+                    continue
+                chunk = self.socket.recv(READ_CHUNK_SIZE)
+                if (len(chunk) == 0):
+                    raise ConnectionError("RTT server closed the connection")
+                self.buffer.feed(chunk)
+        except (ConnectionError, OSError) as e:
+            self.buffer.close(RttError(str(e)))
+
+
+class Rtt:
+    ROBOT_LIBRARY_SCOPE = 'GLOBAL'
+
+    def __init__(self):
+        self.host = "localhost"
+        self.tcl_port = OPENOCD_TCL_PORT
+        self.rtt_port = DEFAULT_RTT_PORT
+        self.buffer = None
+        self.stream = None
+
+    def start_rtt(self, control_block_address, search_size=DEFAULT_SEARCH_SIZE, block_id=DEFAULT_RTT_ID, channel=0,
+                  rtt_port=DEFAULT_RTT_PORT, host="localhost", tcl_port=OPENOCD_TCL_PORT,
+                  max_buffer_bytes=MAX_BUFFER_BYTES, polling_interval_ms=None, timeout_sec=DEFAULT_RTT_TIMEOUT_SEC):
+        if (self.stream is not None):
+            raise RttError("RTT already started. Use stop_rtt first.")
+        control_block_address = int(control_block_address, 0) if isinstance(
+            control_block_address, str) else int(control_block_address)
+        search_size = int(search_size, 0) if isinstance(search_size, str) else int(search_size)
+        self.__openocd_commands(host, tcl_port, build_rtt_setup_cmds(
+            control_block_address, search_size, block_id, int(channel), int(rtt_port), polling_interval_ms), timeout_sec)
+        self.host, self.tcl_port, self.rtt_port = host, int(tcl_port), int(rtt_port)
+        self.buffer = RttBuffer(max_buffer_bytes)
+        self.stream = RttStream(self.buffer, host, rtt_port, timeout_sec)
+
+    def stop_rtt(self, timeout_sec=DEFAULT_RTT_TIMEOUT_SEC):
+        self.__verify_started()
+        self.stream.stop()
+        self.stream = None
+        self.__openocd_commands(self.host, self.tcl_port, build_rtt_stop_cmds(self.rtt_port), timeout_sec)
+
+    def read_rtt(self):
+        self.__verify_buffer()
+        return self.buffer.read()
+
+    def wait_for_rtt_line(self, pattern, timeout_sec=DEFAULT_RTT_TIMEOUT_SEC):
+        self.__verify_buffer()
+        return self.buffer.wait_for_line(pattern, timeout_sec)
+
+    def wait_for_rtt_match(self, pattern, timeout_sec=DEFAULT_RTT_TIMEOUT_SEC):
+        self.__verify_buffer()
+        return self.buffer.wait_for_match(pattern, timeout_sec)
+
+    def get_rtt_metrics(self):
+        self.__verify_buffer()
+        return self.buffer.metrics()
+
+    def __openocd_commands(self, host, tcl_port, commands, timeout_sec):
+        try:
+            with OpenocdTclClient(host, tcl_port, timeout_sec) as openocd:
+                for command in commands:
+                    openocd.command(command)
+        except OpenocdTimeout as e:
+            raise RttTimeout(str(e)) from e
+        except OpenocdError as e:
+            raise RttError(str(e)) from e
+
+    def __verify_started(self):
+        if (self.stream is None):
+            raise RttError("RTT not started. Use start_rtt first.")
+
+    def __verify_buffer(self):
+        if (self.buffer is None):
+            raise RttError("RTT not started. Use start_rtt first.")
@@ -0,0 +1,40 @@
+import argparse
+import tempfile
+from Omni.robotlibraries.gdb.gdb_control import gdb
+
+
+def load_once(gdb_path, elf_path, use_index_cache, index_cache_dir):
+    client = gdb(gdb_path)
+    client.load_elf_file(elf_path, timeout_sec=120, use_index_cache=use_index_cache,
+                         index_cache_dir=index_cache_dir)
+    client.gdb_controller.exit()
+    return client.elf_load_stats
+
+
+def run(gdb_path, elf_path, index_cache_dir):
+    plain = load_once(gdb_path, elf_path, False, index_cache_dir)
+    miss = load_once(gdb_path, elf_path, True, index_cache_dir)
+    hit = load_once(gdb_path, elf_path, True, index_cache_dir)
+    print(f"no cache   load={plain['load_sec']:8.3f} s")
+    print(f"cache miss load={miss['load_sec']:8.3f} s  index build={miss.get('index_build_sec', 0):8.3f} s"
+          f"  {miss.get('index_error', '')}")
+    print(f"cache {hit['index_cache']:<4} load={hit['load_sec']:8.3f} s")
+    print(f"speedup    x{plain['load_sec'] / hit['load_sec']:.1f}")
+
+
+# Call from folder: embedded-integration-test-framework
+# Example Call: python3 -m Omni.tests.benchmarks.elf_load_time --elf build/firmware.elf --gdb /usr/local/bin/arm-none-eabi-gdb
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--gdb', type=str, default='/usr/local/bin/arm-none-eabi-gdb',
+                        help='Path to the gdb executable')
+    parser.add_argument('--elf', type=str, required=True,
+                        help='ELF file to load')
+    parser.add_argument('--cache-dir', type=str, default='',
+                        help='Index cache directory. A fresh temporary directory if omitted')
+    args = parser.parse_args()
+    if (args.cache_dir != ''):
+        run(args.gdb, args.elf, args.cache_dir)
+    else:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            run(args.gdb, args.elf, cache_dir)
@@ -0,0 +1,62 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+from pygdbmi.gdbcontroller import GdbController
+from Omni.robotlibraries.gdb.mi_transport import MiResultTransport
+
+FAKE_GDB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fake_gdb_mi.py")
+BENCH_COMMANDS = ["-gdb-show version", "pwd", "-list-features"]
+
+
+def launch_command(gdb_path):
+    if (gdb_path == ""):
+        return [sys.executable, FAKE_GDB, "--interpreter=mi3"]
+    return [gdb_path, "--nx", "--quiet", "--interpreter=mi3"]
+
+
+def measure(controller, iterations):
+    controller.get_gdb_response(timeout_sec=2, raise_error_on_timeout=False)
+    latencies_ms = []
+    for i in range(iterations):
+        command = BENCH_COMMANDS[i % len(BENCH_COMMANDS)]
+        start = time.perf_counter()
+        controller.write(command, timeout_sec=5)
+        latencies_ms.append((time.perf_counter() - start) * 1000)
+    return latencies_ms
+
+
+def summary(name, latencies_ms):
+    ordered = sorted(latencies_ms)
+    p95 = ordered[int(0.95 * (len(ordered) - 1))]
+    return (f"{name:<10} n={len(ordered):<5} mean={statistics.mean(ordered):8.3f} ms  "
+            f"median={statistics.median(ordered):8.3f} ms  p95={p95:8.3f} ms  "
+            f"total={sum(ordered) / 1000:7.3f} s")
+
+
+def run(gdb_path, iterations):
+    pygdbmi_controller = GdbController(command=launch_command(gdb_path))
+    pygdbmi_latency = measure(pygdbmi_controller, iterations)
+    pygdbmi_controller.exit()
+
+    result_transport = MiResultTransport(
+        GdbController(command=launch_command(gdb_path)))
+    result_latency = measure(result_transport, iterations)
+    result_transport.exit()
+
+    print(summary("pygdbmi", pygdbmi_latency))
+    print(summary("result", result_latency))
+    print(f"speedup    x{statistics.mean(pygdbmi_latency) / statistics.mean(result_latency):.1f}")
+
+
+# Call from folder: embedded-integration-test-framework
+# Example Call: python3 -m Omni.tests.benchmarks.mi_write_latency --iterations 50 --gdb /usr/local/bin/arm-none-eabi-gdb
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--gdb', type=str, default="",
+                        help='Path to a gdb executable. Uses the fake_gdb_mi.py stub if omitted')
+    parser.add_argument('--iterations', type=int, default=50,
+                        help='Number of MI commands written per transport')
+    args = parser.parse_args()
+    run(args.gdb, args.iterations)
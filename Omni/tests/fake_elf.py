@@ -0,0 +1,98 @@
+import struct
+
+
+STT_OBJECT = 1
+STT_FUNC = 2
+STB_LOCAL = 0
+STB_GLOBAL = 1
+EM_ARM = 40
+EM_X86_64 = 62
+SHF_ALLOC = 2
+SHT_PROGBITS = 1
+SHT_NOBITS = 8
+
+
+def build_elf(symbols, is_64_bit=False, big_endian=False, machine=EM_ARM, sections=()):
+    """Build a minimal ELF file with a .symtab, a .strtab and a .shstrtab.
+
+    symbols is a list of (name, value, size, type, binding) tuples. Every
+    symbol is placed in section 1 so none of them counts as undefined.
+    sections is a list of (name, address, contents[, load_address]) tuples.
+    Each becomes an allocated PROGBITS section in its own PT_LOAD segment,
+    or a NOBITS section when contents is an int size.
+    """
+    endian = ">" if big_endian else "<"
+    strtab = b"\0"
+    name_offsets = []
+    for name, *_ in symbols:
+        name_offsets.append(len(strtab))
+        strtab += name.encode() + b"\0"
+    shstrtab = b"\0.symtab\0.strtab\0.shstrtab\0"
+    section_name_offsets = []
+    for name, *_ in sections:
+        section_name_offsets.append(len(shstrtab))
+        shstrtab += name.encode() + b"\0"
+
+    if (is_64_bit):
+        entry_format = endian + "IBBHQQ"
+        entries = [struct.pack(entry_format, 0, 0, 0, 0, 0, 0)]
+        for offset, (name, value, size, symbol_type, binding) in zip(name_offsets, symbols):
+            entries.append(struct.pack(entry_format, offset, (binding << 4) | symbol_type, 0, 1, value, size))
+        header_size, section_format, segment_format = 64, endian + "IIQQQQIIQQ", endian + "IIQQQQQQ"
+    else:
+        entry_format = endian + "IIIBBH"
+        entries = [struct.pack(entry_format, 0, 0, 0, 0, 0, 0)]
+        for offset, (name, value, size, symbol_type, binding) in zip(name_offsets, symbols):
+            entries.append(struct.pack(entry_format, offset, value, size, (binding << 4) | symbol_type, 0, 1))
+        header_size, section_format, segment_format = 52, endian + "IIIIIIIIII", endian + "IIIIIIII"
+    symtab = b"".join(entries)
+    entry_size = len(entries[0])
+    section_header_size = struct.calcsize(section_format)
+    segment_header_size = struct.calcsize(segment_format)
+
+    segment_offset = header_size
+    symtab_offset = segment_offset + segment_header_size * len(sections)
+    strtab_offset = symtab_offset + len(symtab)
+    shstrtab_offset = strtab_offset + len(strtab)
+    contents_offset = shstrtab_offset + len(shstrtab)
+    section_headers = [
+        struct.pack(section_format, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0),
+        struct.pack(section_format, 1, 2, 0, 0, symtab_offset, len(symtab), 2, 1, 4, entry_size),
+        struct.pack(section_format, 9, 3, 0, 0, strtab_offset, len(strtab), 0, 0, 1, 0),
+        struct.pack(section_format, 17, 3, 0, 0, shstrtab_offset, len(shstrtab), 0, 0, 1, 0),
+    ]
+    segment_headers = []
+    contents = b""
+    for name_offset, (name, address, data, *load_address) in zip(section_name_offsets, sections):
+        load_address = load_address[0] if load_address else address
+        offset = contents_offset + len(contents)
+        if (isinstance(data, int)):
+            section_headers.append(struct.pack(section_format, name_offset, SHT_NOBITS, SHF_ALLOC, address,
+                                               offset, data, 0, 0, 4, 0))
+            segment_headers.append(pack_segment(segment_format, is_64_bit, offset, address, load_address, 0, data))
+            continue
+        section_headers.append(struct.pack(section_format, name_offset, SHT_PROGBITS, SHF_ALLOC, address,
+                                           offset, len(data), 0, 0, 4, 0))
+        segment_headers.append(pack_segment(segment_format, is_64_bit, offset, address, load_address,
+                                            len(data), len(data)))
+        contents += data
+    section_offset = contents_offset + len(contents)
+
+    ident = b"\x7fELF" + bytes([2 if is_64_bit else 1, 2 if big_endian else 1, 1]) + bytes(9)
+    phoff = segment_offset if len(sections) != 0 else 0
+    if (is_64_bit):
+        header = ident + struct.pack(endian + "HHIQQQIHHHHHH", 1, machine, 1, 0, phoff, section_offset,
+                                     0, header_size, segment_header_size, len(segment_headers),
+                                     section_header_size, len(section_headers), 3)
+    else:
+        header = ident + struct.pack(endian + "HHIIIIIHHHHHH", 1, machine, 1, 0, phoff, section_offset,
+                                     0, header_size, segment_header_size, len(segment_headers),
+                                     section_header_size, len(section_headers), 3)
+    return (header + b"".join(segment_headers) + symtab + strtab + shstrtab + contents
+            + b"".join(section_headers))
+
+
+def pack_segment(segment_format, is_64_bit, offset, address, load_address, file_size, memory_size):
+    if (is_64_bit):
+        return struct.pack(segment_format, 1, 5, offset, address, load_address, file_size, memory_size, 4)
+    return struct.pack(segment_format, 1, offset, address, load_address, file_size, memory_size, 5, 4)
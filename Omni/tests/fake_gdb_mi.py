@@ -0,0 +1,195 @@
+import os
+import re
+import sys
+
+# Minimal stand-in for "gdb --interpreter=mi3" connected to a halted target.
+# Every command is answered at once, so it can be used to exercise the MI
+# clients and to measure their host-side cost without hardware.
+
+COMMAND_PATTERN = re.compile(r"^(\d*)(.*)$")
+SYMBOLS = {"my_var": 3}
+ADDRESSES = {"my_var": 0x20000000, "my_buffer": 0x20000100}
+UNREADABLE_ADDRESS = 0x40000000
+
+
+def c_string(text):
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+
+
+def emit(line):
+    sys.stdout.write(line + "\n")
+
+
+class FakeTarget:
+    def __init__(self):
+        self.breakpoints = []
+        self.running = False
+        self.stop_record = ""
+        self.handlers = [
+            ("-exec-continue", self.exec_continue),
+            ("-exec-next", self.exec_next),
+            ("-exec-interrupt", self.exec_interrupt),
+            ("-break-insert", self.break_insert),
+            ("-break-delete", self.break_delete),
+            ("-file-exec-and-symbols", self.file_exec_and_symbols),
+            ("-target-select", self.target_select),
+            ("-target-download", self.target_download),
+            ("-gdb-version", self.gdb_version),
+            ("monitor version", self.monitor_version),
+            ("monitor reset halt", self.monitor_reset_halt),
+            ("info program", self.info_program),
+            ("-data-read-memory-bytes", self.read_memory_bytes),
+            ("print", self.print_value),
+            ("pwd", self.pwd),
+            ("cd ", self.cd),
+        ]
+
+    def answer(self, token, command):
+        for prefix, handler in self.handlers:
+            if (command.startswith(prefix)):
+                handler(token, command)
+                break
+        else:
+            emit(token + "^done")
+        emit("(gdb) ")
+        sys.stdout.flush()
+
+    def stop(self, reason_fields, file_name="main.c", fullname="/src/main.c", line="24"):
+        self.running = False
+        self.stop_record = (f'*stopped,{reason_fields},frame={{addr="0x08000a74",func="main",args=[],'
+                            f'file="{file_name}",fullname="{fullname}",line="{line}",arch="armv7e-m"}},'
+                            'thread-id="1",stopped-threads="all"')
+        emit(self.stop_record)
+
+    def exec_continue(self, token, command):
+        emit(token + "^running")
+        emit('*running,thread-id="all"')
+        self.running = True
+        if (len(self.breakpoints) != 0):
+            number, fullname, line = self.breakpoints[0]
+            self.stop(f'reason="breakpoint-hit",disp="keep",bkptno="{number}"',
+                      os.path.basename(fullname), fullname, line)
+
+    def exec_next(self, token, command):
+        emit(token + "^running")
+        emit('*running,thread-id="all"')
+        self.stop('reason="end-stepping-range"')
+
+    def exec_interrupt(self, token, command):
+        emit(token + "^done")
+        emit('~"\\nProgram"')
+        emit('~" received signal SIGINT, Interrupt.\\n"')
+        self.stop('reason="signal-received",signal-name="SIGINT",signal-meaning="Interrupt"')
+
+    def break_insert(self, token, command):
+        source = re.search(r"--source (\S+)", command).group(1)
+        line = re.search(r"--line (\d+)", command).group(1)
+        if (source.startswith("Unknown")):
+            emit(token + "^error,msg=" + c_string(f"No source file named {source}."))
+            return
+        number = str(len(self.breakpoints) + 1)
+        fullname = "/src/" + source
+        self.breakpoints.append((number, fullname, line))
+        emit(token + f'^done,bkpt={{number="{number}",type="breakpoint",disp="keep",enabled="y",'
+             f'addr="0x08000a72",func="main",file="{source}",fullname="{fullname}",line="{line}",'
+             f'thread-groups=["i1"],times="0"}}')
+
+    def break_delete(self, token, command):
+        self.breakpoints = []
+        emit(token + "^done")
+
+    def file_exec_and_symbols(self, token, command):
+        path = command.split(" ", 1)[1]
+        if ("missing" in path):
+            emit(token + "^error,msg=" + c_string(f"{path}: No such file or directory."))
+        else:
+            emit(token + "^done")
+
+    def target_select(self, token, command):
+        emit('=thread-group-started,id="i1",pid="42000"')
+        emit('~"0x00000000 in ?? ()\\n"')
+        emit('*stopped,frame={addr="0x00000000",func="??",args=[],arch="armv7e-m"},thread-id="1",stopped-threads="all"')
+        emit(token + "^connected")
+
+    def target_download(self, token, command):
+        emit(token + '+download,{section=".text",section-size="11168",total-size="66106"}')
+        emit(token + '^done,address="0x08001ba8",load-size="11168",transfer-rate="154808",write-rate="1686"')
+
+    def gdb_version(self, token, command):
+        emit('~"GNU gdb (GNU Arm Embedded Toolchain 10.3-2021.10) 10.2.90.20210621-git\\n"')
+        emit(token + "^done")
+
+    def monitor_version(self, token, command):
+        emit('@"Open On-Chip Debugger 0.12.0"')
+        emit('@"\\n"')
+        emit(token + "^done")
+
+    def monitor_reset_halt(self, token, command):
+        emit('@"target halted due to debug-request, current mode: Thread \\n"')
+        emit(token + "^done")
+
+    def info_program(self, token, command):
+        if (self.running):
+            emit('&"Selected thread is running.\\n"')
+            emit(token + '^error,msg="Selected thread is running."')
+        else:
+            emit('~"Program stopped at 0x8000a72.\\n"')
+            emit(token + "^done")
+
+    def read_memory_bytes(self, token, command):
+        offset, expression, count = re.match(
+            r"-data-read-memory-bytes -o (\d+) (\S+) (\d+)", command).groups()
+        symbol = re.match(r"&\((\w+)\)", expression)
+        if (symbol is not None and symbol.group(1) not in ADDRESSES):
+            emit(token + "^error,msg=" + c_string(f'No symbol "{symbol.group(1)}" in current context.'))
+            return
+        address = ADDRESSES[symbol.group(1)] if symbol else int(expression, 0)
+        begin = address + int(offset)
+        end = min(begin + int(count), max(begin, UNREADABLE_ADDRESS))
+        if (end == begin):
+            emit(token + '^error,msg="Unable to read memory."')
+            return
+        contents = "".join(format(a & 0xFF, "02x") for a in range(begin, end))
+        emit(token + f'^done,memory=[{{begin="{hex(begin)}",offset="0x0",'
+             f'end="{hex(end)}",contents="{contents}"}}]')
+
+    def print_value(self, token, command):
+        name = command.split()[-1]
+        if (name not in SYMBOLS):
+            emit(token + "^error,msg=" + c_string(f'No symbol "{name}" in current context.'))
+            return
+        value = SYMBOLS[name]
+        rendered = {"/x": hex(value), "/t": format(value, "b")}.get(command.split()[1], str(value))
+        emit("~" + c_string(f"$1 = {rendered}\n"))
+        emit(token + "^done")
+
+    def pwd(self, token, command):
+        emit('~"Working directory /tmp.\\n"')
+        emit(token + "^done")
+
+    def cd(self, token, command):
+        directory = command.split(" ", 1)[1]
+        if (os.path.isdir(directory)):
+            emit("~" + c_string(f"Working directory {directory}.\n"))
+            emit(token + "^done")
+        else:
+            emit(token + "^error,msg=" + c_string(f"{directory}: No such file or directory."))
+
+
+def main():
+    target = FakeTarget()
+    emit('=thread-group-added,id="i1"')
+    emit('~"GNU gdb (GNU Arm Embedded Toolchain 10.3-2021.10) 10.2.90.20210621-git\\n"')
+    emit("(gdb) ")
+    sys.stdout.flush()
+    for line in sys.stdin:
+        token, command = COMMAND_PATTERN.match(line.strip()).groups()
+        if (command in ("-gdb-exit", "quit")):
+            emit(token + "^exit")
+            sys.stdout.flush()
+            return
+        target.answer(token, command)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import socket
+import threading
+
+
+class FakeOpenocd:
+    """Answers OpenOCD TCL RPC commands and serves RTT output on a second port.
+
+    replies maps a command to its reply text, or to a callable returning
+    the reply for that command. Unknown commands get an empty reply.
+    """
+
+    def __init__(self, replies=None):
+        self.commands = []
+        self.replies = replies or {}
+        self.tcl_server = socket.create_server(("localhost", 0))
+        self.rtt_server = socket.create_server(("localhost", 0))
+        self.tcl_port = self.tcl_server.getsockname()[1]
+        self.rtt_port = self.rtt_server.getsockname()[1]
+        self.rtt_client = None
+        self.rtt_connected = threading.Event()
+        threading.Thread(target=self.__serve_tcl, daemon=True).start()
+        threading.Thread(target=self.__serve_rtt, daemon=True).start()
+
+    def send(self, data):
+        self.rtt_connected.wait(1)
+        self.rtt_client.sendall(data)
+
+    def close_rtt(self):
+        self.rtt_connected.wait(1)
+        self.rtt_client.close()
+
+    def close(self):
+        self.tcl_server.close()
+        self.rtt_server.close()
+
+    def __serve_tcl(self):
+        while True:
+            try:
+                connection, _ = self.tcl_server.accept()
+            except OSError:
+                return
+            with connection:
+                pending = b""
+                while True:
+                    chunk = connection.recv(4096)
+                    if (len(chunk) == 0):
+                        break
+                    pending += chunk
+                    while (b"\x1a" in pending):
+                        command, _, pending = pending.partition(b"\x1a")
+                        self.commands.append(command.decode())
+                        connection.sendall(self.__reply(command.decode()).encode() + b"\x1a")
+
+    def __reply(self, command):
+        reply = self.replies.get(command, "")
+        return reply(command) if callable(reply) else reply
+
+    def __serve_rtt(self):
+        try:
+            self.rtt_client, _ = self.rtt_server.accept()
+        except OSError:
+            return
+        self.rtt_connected.set()
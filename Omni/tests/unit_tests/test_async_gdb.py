@@ -0,0 +1,198 @@
+import asyncio
+import os
+import sys
+import pytest
+from Omni.robotlibraries.gdb.async_gdb import *
+from Omni.robotlibraries.gdb.mi_responses import GdbResponseError, GdbBreakpointNotStopped, GdbFlashError
+from Omni.robotlibraries.gdb.memory import GdbMemoryReadError
+
+current_file_path = os.path.abspath(__file__)
+test_dir = os.path.dirname(current_file_path)
+fake_gdb_path = os.path.join(os.path.dirname(test_dir), "fake_gdb_mi.py")
+source_file_path = test_dir+"/gdb_responses/MySourceFile.cpp"
+
+
+def fake_async_gdb():
+    return AsyncGdb(gdb_path=sys.executable, gdb_args=(fake_gdb_path, "--interpreter=mi3"))
+
+
+def run(scenario):
+    async def with_target():
+        async with fake_async_gdb() as target:
+            return await scenario(target)
+    return asyncio.run(with_target())
+
+
+async def connected_target(target):
+    await target.connect("localhost", "3333")
+    await target.load_elf_file("/path/to/elf/file")
+    await target.flash()
+
+
+def test_async_gdb_saves_version_and_working_dir():
+    async def scenario(target):
+        return target.version, target.working_dir
+    assert run(scenario) == ("10.3-2021.10", "/tmp")
+
+
+def test_async_gdb_connect_to_openocd():
+    async def scenario(target):
+        await target.connect("localhost", 3333)
+        return target.connected_to_server, target.server
+    assert run(scenario) == (True, "Open On-Chip Debugger")
+
+
+def test_async_gdb_load_elf_raise_exception_if_file_not_valid():
+    async def scenario(target):
+        await target.load_elf_file("/path/to/missing.elf")
+    with pytest.raises(FileNotFoundError, match=r".*No such file or directory.*"):
+        run(scenario)
+
+
+def test_async_gdb_flash_raise_exception_if_not_connected():
+    async def scenario(target):
+        await target.load_elf_file("/path/to/elf/file")
+        await target.flash()
+    with pytest.raises(ConnectionError, match=r".*GDBclient is not connected to any server.*"):
+        run(scenario)
+
+
+def test_async_gdb_flash_raise_exception_if_elf_not_loaded():
+    async def scenario(target):
+        await target.connect("localhost", "3333")
+        await target.flash()
+    with pytest.raises(GdbFlashError, match=r".*No ELF file loaded in GDBclient.*"):
+        run(scenario)
+
+
+def test_async_gdb_continue_until_breakpoint_with_tag():
+    async def scenario(target):
+        await connected_target(target)
+        bkpt = await target.insert_breakpoint(source_file_path, tag="TEST TAG A")
+        await target.continue_until_breakpoint(timeout_sec=5)
+        return bkpt["line"], await target.stopped_at_breakpoint_with_tag(source_file_path, "TEST TAG A")
+    assert run(scenario) == ("16", True)
+
+
+def test_async_gdb_stopped_at_breakpoint_false_for_other_tag():
+    async def scenario(target):
+        await connected_target(target)
+        await target.insert_breakpoint(source_file_path, tag="TEST TAG A")
+        await target.continue_until_breakpoint(timeout_sec=5)
+        return await target.stopped_at_breakpoint_with_tag(source_file_path, "TEST TAG B")
+    assert run(scenario) == False
+
+
+def test_async_gdb_stopped_at_breakpoint_raises_exception_if_not_stopped():
+    async def scenario(target):
+        await connected_target(target)
+        await target.continue_execution()
+        await target.stopped_at_breakpoint_with_tag(source_file_path, "TEST TAG A")
+    with pytest.raises(GdbBreakpointNotStopped, match=r".*Program is not stopped at breakpoint.*"):
+        run(scenario)
+
+
+def test_async_gdb_continue_until_breakpoint_raise_exception_if_timeout():
+    async def scenario(target):
+        await connected_target(target)
+        await target.continue_until_breakpoint(timeout_sec=0.2)
+    with pytest.raises(GdbTimeoutError):
+        run(scenario)
+
+
+def test_async_gdb_insert_breakpoint_unknown_source_raise_exception(tmp_path):
+    unknown_source = tmp_path / "UnknownSource.cpp"
+    unknown_source.write_text("int main() {}\n")
+
+    async def scenario(target):
+        await target.insert_breakpoint(str(unknown_source), 1)
+    with pytest.raises(GdbResponseError, match=r".*No source file named.*defined in the elf file"):
+        run(scenario)
+
+
+def test_async_gdb_pause_next_and_program_state():
+    async def scenario(target):
+        await connected_target(target)
+        await target.continue_execution()
+        running = await target.get_program_state()
+        await target.pause()
+        await target.next()
+        return running, await target.get_program_state()
+    assert run(scenario) == ("running", "stopped")
+
+
+def test_async_gdb_get_object_value_formats():
+    async def scenario(target):
+        return [await target.get_object_value("my_var", f) for f in ("dec", "hex", "bin")]
+    assert run(scenario) == ["3", "0x3", "11"]
+
+
+def test_async_gdb_get_object_value_symbol_not_found_raise_exception():
+    async def scenario(target):
+        await target.get_variable_value("non_existent_var", "hex")
+    with pytest.raises(GdbResponseError, match=r".*Invalid payload format.*"):
+        run(scenario)
+
+
+def test_async_gdb_change_working_dir_raise_exception_if_dir_does_not_exist():
+    async def scenario(target):
+        await target.change_working_dir("/a/bad/dir")
+    with pytest.raises(FileNotFoundError, match=r".*No such file or directory.*"):
+        run(scenario)
+
+
+def test_async_gdb_reset_halt_openocd():
+    async def scenario(target):
+        await target.connect("localhost", "3333")
+        await target.reset_halt()
+    run(scenario)
+
+
+def test_async_gdb_reset_halt_forgets_run_state():
+    async def scenario(target):
+        await connected_target(target)
+        await target.continue_execution()
+        running = target.run_state.state
+        await target.reset_halt()
+        return running, target.get_stop_info()["state"]
+    assert run(scenario) == ("running", "unknown")
+
+
+def test_async_gdb_drives_several_targets_from_one_loop():
+    async def scenario():
+        async with fake_async_gdb() as board_a, fake_async_gdb() as board_b:
+            await asyncio.gather(connected_target(board_a), connected_target(board_b))
+            return await asyncio.gather(board_a.get_object_value("my_var", "hex"),
+                                        board_b.get_object_value("my_var", "dec"))
+    assert asyncio.run(scenario()) == ["0x3", "3"]
+
+
+def test_async_gdb_concurrent_commands_matched_by_token():
+    async def scenario(target):
+        return await asyncio.gather(*[target.write("pwd") for _ in range(20)])
+    responses = run(scenario)
+    assert all(r[-1]["message"] == "done" for r in responses)
+    assert len({r[-1]["token"] for r in responses}) == 20
+
+
+def test_async_gdb_publishes_stop_events():
+    async def scenario(target):
+        await connected_target(target)
+        await target.insert_breakpoint(source_file_path, tag="TEST TAG A")
+        target.events.clear()
+        await target.continue_until_breakpoint(timeout_sec=5)
+        return [e["message"] for e in target.events.get_events(record_types=["notify"])]
+    assert run(scenario) == ["running", "stopped"]
+
+
+def test_async_gdb_read_memory_in_chunks():
+    async def scenario(target):
+        return await target.read_memory("my_buffer", 1000, dtype="u1", chunk_size=256)
+    assert run(scenario).tolist() == [i & 0xFF for i in range(1000)]
+
+
+def test_async_gdb_read_memory_unreadable_range_raise_exception():
+    async def scenario(target):
+        await target.read_memory(0x3FFFFFFC, 8)
+    with pytest.raises(GdbMemoryReadError, match=r".*Only 4 of 8 bytes could be read.*"):
+        run(scenario)
@@ -0,0 +1,68 @@
+import os
+from Omni.robotlibraries.gdb.breakpoint_table import *
+
+
+def bkpt(number, line, fullname="/src/main.c"):
+    return {"number": number, "type": "breakpoint", "enabled": "y",
+            "file": os.path.basename(fullname), "fullname": fullname, "line": str(line), "times": "0"}
+
+
+def notify(message, payload):
+    return {"type": "notify", "message": message, "payload": payload, "token": None}
+
+
+def test_breakpoint_table_indexes_by_number_and_location():
+    table = BreakpointTable()
+    table.add(bkpt("1", 16))
+    table.add(bkpt("2", 16))
+    table.add(bkpt("3", 20, "/src/other.c"))
+    assert table.get(3)["fullname"] == "/src/other.c"
+    assert table.numbers_at("/work/main.c", 16) == ["1", "2"]
+    assert table.numbers_at("main.c", 20) == []
+    assert len(table) == 3
+
+
+def test_breakpoint_table_remove_updates_location_index():
+    table = BreakpointTable()
+    table.add(bkpt("1", 16))
+    table.remove("1")
+    assert table.get("1") is None
+    assert table.numbers_at("main.c", 16) == []
+
+
+def test_breakpoint_table_readding_number_moves_location():
+    table = BreakpointTable()
+    table.add(bkpt("1", 16))
+    table.add(bkpt("1", 18))
+    assert table.numbers_at("main.c", 16) == []
+    assert table.numbers_at("main.c", 18) == ["1"]
+
+
+def test_breakpoint_table_follows_breakpoint_notifications():
+    table = BreakpointTable()
+    table.update(notify("breakpoint-created", {"bkpt": bkpt("4", 30)}))
+    modified = dict(bkpt("4", 30), times="2")
+    table.update(notify("breakpoint-modified", {"bkpt": modified}))
+    assert table.get("4")["times"] == "2"
+    table.update(notify("breakpoint-deleted", {"id": "4"}))
+    assert len(table) == 0
+
+
+def test_breakpoint_table_ignores_modification_of_unknown_breakpoint():
+    table = BreakpointTable()
+    table.update(notify("breakpoint-modified", {"bkpt": bkpt("7", 30)}))
+    assert table.get("7") is None
+
+
+def test_breakpoint_location_uses_first_location_of_multi_location_breakpoint():
+    multi = {"number": "5", "type": "breakpoint", "addr": "<MULTIPLE>",
+             "locations": [{"number": "5.1", "fullname": "/src/inline.h", "line": "8"}]}
+    assert breakpoint_location(multi) == ("inline.h", 8)
+
+
+def test_breakpoint_table_remembers_tag_lines_after_clear():
+    table = BreakpointTable()
+    table.remember_tag("/src/main.c", "TAG A", 16)
+    table.clear()
+    assert table.tag_line("/src/main.c", "TAG A") == 16
+    assert table.tag_line("/src/main.c", "TAG B") is None
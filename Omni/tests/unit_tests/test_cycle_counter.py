@@ -0,0 +1,29 @@
+import pytest
+from Omni.robotlibraries.gdb.cycle_counter import *
+
+
+def test_build_enable_cyccnt_cmds_sets_trcena_and_cyccntena():
+    assert build_enable_cyccnt_cmds() == [
+        '-data-evaluate-expression "*(unsigned int *)0xe000edfc |= 0x1000000"',
+        '-data-evaluate-expression "*(unsigned int *)0xe0001000 |= 0x1"']
+
+
+def test_cycle_delta_handles_counter_wrap():
+    assert cycle_delta(100, 350) == 250
+    assert cycle_delta(0xffffff00, 0x10) == 0x110
+
+
+def test_cycle_statistics():
+    statistics = cycle_statistics([100, 120, 110, 130])
+    assert statistics["iterations"] == 4
+    assert statistics["min"] == 100
+    assert statistics["max"] == 130
+    assert statistics["mean"] == 115.0
+    assert statistics["p50"] == 115.0
+    assert statistics["p90"] == pytest.approx(127.0)
+    assert statistics["cycles"] == [100, 120, 110, 130]
+
+
+def test_cycle_statistics_needs_measurements():
+    with pytest.raises(ValueError, match=r".*No cycle counts measured.*"):
+        cycle_statistics([])
@@ -0,0 +1,117 @@
+import json
+import pytest
+from Omni.robotlibraries.gdb.elf_symbols import *
+from Omni.tests.fake_elf import build_elf, STB_GLOBAL, EM_X86_64
+
+
+SYMBOLS = [
+    ("main", 0x08000101, 0x40, STT_FUNC, STB_GLOBAL),
+    ("helper", 0x08000201, 0x10, STT_FUNC, STB_LOCAL),
+    ("my_buffer", 0x20000100, 64, STT_OBJECT, STB_GLOBAL),
+    ("counter", 0x20000000, 4, STT_OBJECT, STB_LOCAL),
+    ("counter", 0x20000040, 4, STT_OBJECT, STB_GLOBAL),
+]
+
+
+@pytest.fixture
+def elf_path(tmp_path):
+    path = tmp_path / "firmware.elf"
+    path.write_bytes(build_elf(SYMBOLS))
+    return str(path)
+
+
+def test_read_elf_symbols_clears_thumb_bit_of_functions():
+    symbols = {s.name: s for s in read_elf_symbols(build_elf(SYMBOLS[:3]))}
+    assert symbols["main"].address == 0x08000100
+    assert symbols["main"].size == 0x40
+    assert symbols["my_buffer"].address == 0x20000100
+
+
+@pytest.mark.parametrize("is_64_bit,big_endian", [(True, False), (False, True), (True, True)])
+def test_read_elf_symbols_decodes_all_classes_and_byte_orders(is_64_bit, big_endian):
+    data = build_elf(SYMBOLS[:3], is_64_bit, big_endian, EM_X86_64)
+    symbols = {s.name: s for s in read_elf_symbols(data)}
+    assert symbols["main"].address == 0x08000101
+    assert symbols["my_buffer"] == ElfSymbol("my_buffer", 0x20000100, 64, STT_OBJECT, STB_GLOBAL)
+
+
+def test_read_elf_symbols_raise_exception_if_not_elf():
+    with pytest.raises(ElfFormatError, match=r".*Not an ELF file.*"):
+        read_elf_symbols(b"not an elf file")
+
+
+def test_symbol_index_prefers_global_symbols():
+    index = ElfSymbolIndex(read_elf_symbols(build_elf(SYMBOLS)))
+    assert index.lookup("counter").address == 0x20000040
+    assert index.lookup("missing") is None
+    assert "my_buffer" in index
+    assert len(index) == 4
+
+
+def test_symbol_index_global_symbol_only_for_unique_globals(elf_path):
+    for index in (ElfSymbolIndex(read_elf_symbols(build_elf(SYMBOLS))), ElfSymbolIndex.load(elf_path),
+                  ElfSymbolIndex.load(elf_path)):
+        assert index.global_symbol("my_buffer").address == 0x20000100
+        assert index.global_symbol("counter") is None
+        assert index.global_symbol("helper") is None
+        assert index.global_symbol("missing") is None
+
+
+def test_symbol_index_finds_function_at_address():
+    index = ElfSymbolIndex(read_elf_symbols(build_elf(SYMBOLS)))
+    assert index.function_at(0x08000100).name == "main"
+    assert index.function_at(0x0800013f).name == "main"
+    assert index.function_at(0x08000140) is None
+    assert index.function_at(0x0800020a).name == "helper"
+    assert index.function_at(0x08000000) is None
+
+
+def test_symbol_index_load_writes_cache_next_to_elf(elf_path):
+    index = ElfSymbolIndex.load(elf_path)
+    with open(elf_path + SYMBOL_CACHE_SUFFIX) as cache_file:
+        cache = json.load(cache_file)
+    assert cache["elf_sha256"] == file_sha256(elf_path) == index.elf_sha256
+    assert len(cache["symbols"]) == 5
+
+
+def test_symbol_index_load_uses_cache_of_same_elf(elf_path, mocker):
+    ElfSymbolIndex.load(elf_path)
+    parse = mocker.patch("Omni.robotlibraries.gdb.elf_symbols.read_elf_symbols")
+    index = ElfSymbolIndex.load(elf_path)
+    parse.assert_not_called()
+    assert index.lookup("main").address == 0x08000100
+
+
+def test_symbol_index_load_rebuilds_stale_cache(elf_path):
+    ElfSymbolIndex.load(elf_path)
+    with open(elf_path, "wb") as elf_file:
+        elf_file.write(build_elf([("main", 0x08000401, 0x20, STT_FUNC, STB_GLOBAL)]))
+    index = ElfSymbolIndex.load(elf_path)
+    assert index.lookup("main").address == 0x08000400
+    assert index.lookup("my_buffer") is None
+
+
+@pytest.mark.parametrize("is_64_bit", [False, True])
+def test_read_elf_sections_returns_loadable_sections(is_64_bit):
+    data = build_elf(SYMBOLS, is_64_bit, sections=[
+        (".text", 0x08000000, b"\x01\x02\x03\x04"),
+        (".data", 0x20000000, b"\xaa\xbb", 0x08000004),
+        (".bss", 0x20000100, 64)])
+    sections = read_elf_sections(data)
+    assert [(s.name, s.address, s.load_address, s.size) for s in sections] == [
+        (".text", 0x08000000, 0x08000000, 4), (".data", 0x20000000, 0x08000004, 2)]
+    assert data[sections[1].offset:sections[1].offset + 2] == b"\xaa\xbb"
+
+
+def test_read_elf_symbols_keeps_global_linker_symbols():
+    symbols = {s.name for s in read_elf_symbols(build_elf([("_estack", 0x20020000, 0, STT_NOTYPE, STB_GLOBAL),
+                                                          ("$t", 0x08000000, 0, STT_NOTYPE, STB_LOCAL)]))}
+    assert symbols == {"_estack"}
+
+
+def test_symbol_index_finds_symbols_in_range():
+    index = ElfSymbolIndex(read_elf_symbols(build_elf(SYMBOLS)))
+    assert [s.name for s in index.symbols_in(0x20000000, 0x20000004)] == []
+    assert [s.name for s in index.symbols_in(0x20000040, 0x20000044)] == ["counter"]
+    assert [s.name for s in index.symbols_in(0x20000120, 0x20000200)] == ["my_buffer"]
+    assert [s.name for s in index.symbols_in(0x08000000, 0x08000300)] == ["main", "helper"]
@@ -0,0 +1,68 @@
+import pytest
+from Omni.robotlibraries.gdb.flash_delta import *
+from Omni.tests.fake_elf import build_elf
+
+
+FLASH_BANKS_OUTPUT = "#0 : stm32f2x.flash (stm32f2x) at 0x08000000, size 0x00100000, buswidth 0, chipwidth 0\n"
+FLASH_INFO_OUTPUT = (
+    "#0 : stm32f2x at 0x08000000, size 0x00100000, buswidth 0, chipwidth 0\n"
+    "\t#  0: 0x00000000 (0x4000 16kB) not protected\n"
+    "\t#  1: 0x00004000 (0x4000 16kB) not protected\n"
+    "\t#  2: 0x00008000 (0x10000 64kB) not protected\n"
+    "\t#  3: 0x00018000 (0x20000 128kB) not protected\n"
+    "STM32F4xx - Rev: Z\n")
+LAYOUT = [(0x08000000, 0x4000), (0x08004000, 0x4000), (0x08008000, 0x10000), (0x08018000, 0x20000)]
+
+
+def test_parse_flash_banks():
+    assert parse_flash_banks(FLASH_BANKS_OUTPUT + FLASH_BANKS_OUTPUT.replace("#0", "#1")) == [0, 1]
+    assert parse_flash_banks("") == []
+
+
+def test_parse_flash_info_returns_absolute_sectors():
+    assert parse_flash_info(FLASH_INFO_OUTPUT) == LAYOUT
+    assert parse_flash_info("invalid command name") == []
+
+
+def test_uniform_sectors_cover_image():
+    data = build_elf([], sections=[(".text", 0x08000ffe, b"\x01\x02\x03\x04"),
+                                   (".data", 0x20000000, b"\xaa", 0x08002000)])
+    assert uniform_sectors(data, 0x1000) == [(0x08000000, 0x1000), (0x08001000, 0x1000), (0x08002000, 0x1000)]
+
+
+def test_image_sectors_pad_uncovered_bytes_as_erased():
+    data = build_elf([], sections=[(".text", 0x08003ffe, b"\x01\x02\x03\x04"),
+                                   (".data", 0x20000000, b"\xaa", 0x08008000)])
+    sectors = image_sectors(data, LAYOUT)
+    assert sorted(sectors) == [0x08000000, 0x08004000, 0x08008000]
+    assert sectors[0x08000000][-2:] == b"\x01\x02"
+    assert sectors[0x08004000][:3] == b"\x03\x04\xff"
+    assert sectors[0x08008000][:2] == b"\xaa\xff"
+    assert len(sectors[0x08008000]) == 0x10000
+
+
+def test_image_sectors_raise_exception_outside_flash():
+    data = build_elf([], sections=[(".ramfunc", 0x20000000, b"\x01\x02")])
+    with pytest.raises(FlashLayoutError, match=r".*\.ramfunc at 0x20000000 is outside the flash sectors.*"):
+        image_sectors(data, LAYOUT)
+
+
+def test_changed_sectors_include_new_sectors():
+    old = {0: b"a", 0x1000: b"b"}
+    new = {0: b"a", 0x1000: b"c", 0x2000: b"d"}
+    assert changed_sectors(old, new) == [0x1000, 0x2000]
+
+
+def test_sector_runs_merge_adjacent_sectors_of_any_size():
+    sectors = {0x1000: b"a" * 0x1000, 0x2000: b"b" * 0x2000, 0x4000: b"c" * 0x4000, 0x9000: b"d" * 0x1000}
+    assert sector_runs(sectors, [0x4000, 0x1000, 0x2000, 0x9000]) == [(0x1000, 0x7000), (0x9000, 0x1000)]
+
+
+def test_run_contents_joins_sectors():
+    sectors = {0: b"ab", 2: b"cdef", 6: b"gh"}
+    assert run_contents(sectors, (0, 6)) == b"abcdef"
+
+
+def test_build_write_image_cmd():
+    assert build_write_image_cmd("/tmp/run.bin", 0x08004000) == \
+        "monitor flash write_image erase /tmp/run.bin 0x8004000 bin"
@@ -0,0 +1,32 @@
+from Omni.robotlibraries.gdb.flash_ledger import *
+from Omni.tests.fake_elf import build_elf
+
+
+COMPARE_SECTIONS_OUTPUT = (
+    "Section .isr_vector, range 0x8000000 -- 0x8000188: matched.\n"
+    "Section .text, range 0x8000188 -- 0x8003abc: MIS-MATCHED!\n"
+    "warning: One or more sections of the target image does not match\nthe loaded file\n")
+
+
+def test_section_hashes_cover_loadable_sections():
+    data = build_elf([], sections=[(".text", 0x08000000, b"\x01\x02"), (".bss", 0x20000000, 16)])
+    hashes = section_hashes(data)
+    assert list(hashes) == [".text"]
+    assert hashes[".text"]["load_address"] == 0x08000000
+    assert hashes[".text"]["size"] == 2
+    assert section_hashes(data) == hashes
+    assert section_hashes(build_elf([], sections=[(".text", 0x08000000, b"\x01\x03")])) != hashes
+
+
+def test_parse_compare_sections():
+    assert parse_compare_sections(COMPARE_SECTIONS_OUTPUT) == {".isr_vector": True, ".text": False}
+
+
+def test_flash_ledger_records_per_board(tmp_path):
+    ledger = FlashLedger(str(tmp_path))
+    assert ledger.get("localhost:3333") is None
+    ledger.record("localhost:3333", {".text": {"sha256": "abc"}})
+    assert FlashLedger(str(tmp_path)).get("localhost:3333") == {".text": {"sha256": "abc"}}
+    assert ledger.get("localhost:3334") is None
+    ledger.forget("localhost:3333")
+    assert ledger.get("localhost:3333") is None
@@ -0,0 +1,17 @@
+from Omni.robotlibraries.gdb.flash_verify import *
+
+
+def test_target_crc32_matches_gdb_crc():
+    # CRC-32/MPEG-2 check value, the variant used by gdb's xcrc32.
+    assert target_crc32(b"123456789") == 0x0376e6e7
+    assert target_crc32(b"") == 0xffffffff
+
+
+def test_build_crc_cmd():
+    assert build_crc_cmd(0x08000000, 0x188) == "maint packet qCRC:8000000,188"
+
+
+def test_parse_crc_reply():
+    assert parse_crc_reply('sending: "qCRC:8000000,188"\nreceived: "C1a2b3c4d"\n') == 0x1a2b3c4d
+    assert parse_crc_reply('sending: "qCRC:8000000,188"\nreceived: "E01"\n') is None
+    assert parse_crc_reply("") is None
@@ -1,9 +1,19 @@
 import subprocess
 import pytest
 from Omni.robotlibraries.gdb.gdb_control import *
+from Omni.robotlibraries.gdb.mi_events import MiEventStream
+from Omni.robotlibraries.gdb import gdb_control
+from Omni.robotlibraries.gdb.flash_verify import target_crc32
+from Omni.robotlibraries.gdb.watch_trace import load_trace
+from Omni.tests.fake_elf import build_elf, STT_FUNC, STT_OBJECT, STB_GLOBAL, STB_LOCAL
+from Omni.tests.fake_openocd import FakeOpenocd
 import json
 import os
 import shutil
+import socket
+import time
+import re
+from unittest.mock import DEFAULT
 
 current_file_path = os.path.abspath(__file__)
 test_dir = os.path.dirname(current_file_path)
@@ -61,12 +71,27 @@ valid_response_mapping = {
     "print /x non_existent_var":  "print_var_symbol_n_found.json",
     "print /x no_exist_struct":  "print_struct_bad2.json",
     "print /x my_struct":  "print_struct_hex.json",
+    "ptype my_struct":  "ptype_struct.json",
+    "ptype":  "ptype_int.json",
+    "print sizeof":  "print_sizeof_int.json",
     "my_command":  "my_command.json",
+    "save gdb-index":  "save_gdb_index.json",
+    "compare-sections":  "compare_sections_matched.json",
+    "monitor flash banks":  "monitor_flash_banks.json",
+    "monitor flash info":  "monitor_flash_info.json",
+    "-data-list-register-names":  "mi_register_names.json",
+    "-data-list-register-values":  "mi_register_values.json",
+    "-data-write-memory-bytes":  "mi_write_memory_done.json",
+    "-stack-list-frames":  "mi_stack_list_frames.json",
+    "-data-evaluate-expression":  "mi_evaluate_expression_done.json",
+    "-break-watch":  "mi_break_watch.json",
+    "whatis counter":  "whatis_counter.json",
     "-gdb-set logging on":  "mi_set_log_file_cmd.json",
     "-gdb-set logging off":  "mi_set_log_file_cmd.json",
 }
 
 response_mapping = dict(valid_response_mapping)
+pipelined_responses = []
 
 
 @pytest.fixture(scope="function")
@@ -78,6 +103,8 @@ def reset_response_mapping():
 
 
 def gdb_write_responses(mi_cmd_to_write, timeout_sec=1, *args, **kwargs):
+    if (isinstance(mi_cmd_to_write, list)):
+        return queue_pipelined_responses(mi_cmd_to_write)
     for key, filename in response_mapping.items():
         if (key in mi_cmd_to_write):
             responses_file_path = os.path.join(responses_dir, filename)
@@ -85,6 +112,24 @@ def gdb_write_responses(mi_cmd_to_write, timeout_sec=1, *args, **kwargs):
     raise Exception("ERROR IN STUB for param: "+mi_cmd_to_write)
 
 
+def queue_pipelined_responses(tagged_commands):
+    for tagged_command in tagged_commands:
+        token, command = re.match(r"^(\d+)(.*)$", tagged_command).groups()
+        for record in gdb_write_responses(command):
+            if (record["type"] == "result"):
+                record["token"] = int(token)
+            pipelined_responses.append(record)
+    return []
+
+
+def gdb_pipelined_responses(*args, **kwargs):
+    if (len(pipelined_responses) == 0):
+        return DEFAULT
+    responses = list(pipelined_responses)
+    pipelined_responses.clear()
+    return responses
+
+
 @pytest.fixture(scope="session", autouse=True)
 def setup_and_teardown():
     setup_session()
@@ -98,11 +143,20 @@ def mock_gdb_controller(mocker):
     mock_instance.get_gdb_response.return_value = read_from_json(
         os.path.join(responses_dir, "initial_resp.json"))
     mock_instance.write.side_effect = gdb_write_responses
+    mock_instance.get_gdb_response.side_effect = gdb_pipelined_responses
+    pipelined_responses.clear()
     mocker.patch('Omni.robotlibraries.gdb.gdb_control.GdbController',
                  return_value=mock_instance)
     yield mock_instance
 
 
+@pytest.fixture
+def fake_openocd():
+    server = FakeOpenocd()
+    yield server
+    server.close()
+
+
 @pytest.fixture
 def gdb_not_installed_mock(mocker):
     side_effect = subprocess.CalledProcessError(
@@ -252,6 +306,275 @@ def test_gdb_flash_raise_exception_if_not_connected(mock_gdb_controller, gdb_ins
         my_instance.flash()
 
 
+def write_flash_elf(tmp_path, text=b"\x01\x02\x03\x04"):
+    elf_path = tmp_path / "firmware.elf"
+    elf_path.write_bytes(build_elf([("main", 0x08000001, 0x4, STT_FUNC, STB_GLOBAL)], sections=[
+        (".text", 0x08000000, text), (".data", 0x20000000, b"\xaa\xbb", 0x08000004)]))
+    return str(elf_path)
+
+
+def written_commands(mock_gdb_controller):
+    return [c.args[0] for c in mock_gdb_controller.write.call_args_list]
+
+
+def test_gdb_flash_skips_download_if_target_holds_image(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.load_elf_file(write_flash_elf(tmp_path))
+    my_instance.flash(skip_if_unchanged=True, ledger_dir=str(tmp_path / "ledger"))
+    assert "compare-sections" in written_commands(mock_gdb_controller)
+    assert "-target-download" not in written_commands(mock_gdb_controller)
+    assert my_instance.flash_report["skipped"] == True
+    assert my_instance.flash_report["sections"] == {".text": True, ".data": True}
+    assert sorted(os.listdir(tmp_path / "ledger")) == ["localhost_3333.elf", "localhost_3333.json"]
+
+
+def test_gdb_flash_downloads_if_target_sections_mismatch(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    response_mapping["compare-sections"] = "compare_sections_mismatched.json"
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.load_elf_file(write_flash_elf(tmp_path))
+    my_instance.flash(skip_if_unchanged=True, ledger_dir=str(tmp_path / "ledger"))
+    mock_gdb_controller.write.assert_any_call("-target-download")
+    assert my_instance.flash_report["skipped"] == False
+    assert my_instance.flash_report["sections"] == {".text": False, ".data": True}
+    assert sorted(os.listdir(tmp_path / "ledger")) == ["localhost_3333.elf", "localhost_3333.json"]
+
+
+def test_gdb_flash_downloads_without_compare_if_ledger_differs(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    ledger_dir = str(tmp_path / "ledger")
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.load_elf_file(write_flash_elf(tmp_path))
+    response_mapping["compare-sections"] = "compare_sections_mismatched.json"
+    my_instance.flash(skip_if_unchanged=True, board_id="board-1", ledger_dir=ledger_dir)
+    my_instance.load_elf_file(write_flash_elf(tmp_path, b"\x05\x06\x07\x08"))
+    mock_gdb_controller.write.reset_mock()
+    my_instance.flash(skip_if_unchanged=True, board_id="board-1", ledger_dir=ledger_dir)
+    assert written_commands(mock_gdb_controller) == ["-target-download"]
+
+
+def write_delta_elf(tmp_path, text):
+    elf_path = tmp_path / "firmware.elf"
+    elf_path.write_bytes(build_elf([], sections=[(".text", 0x08000000, text)]))
+    return str(elf_path)
+
+
+def delta_target(previous_text, written_bins):
+    """write side effect of an OpenOCD target holding previous_text at the
+    start of flash. The binaries written by delta runs go to written_bins."""
+    def write(mi_cmd_to_write, *args, **kwargs):
+        if (isinstance(mi_cmd_to_write, list) and "qCRC" in mi_cmd_to_write[0]):
+            return crc_replies(["C%08x" % target_crc32(previous_text)])(mi_cmd_to_write)
+        if (isinstance(mi_cmd_to_write, str) and "write_image" in mi_cmd_to_write):
+            with open(mi_cmd_to_write.split()[4], "rb") as bin_file:
+                written_bins[mi_cmd_to_write.split()[5]] = bin_file.read()
+        return gdb_write_responses(mi_cmd_to_write)
+    return write
+
+
+def test_gdb_flash_delta_writes_only_changed_erase_sectors(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    response_mapping["monitor flash write_image"] = "monitor_flash_write_image.json"
+    ledger_dir = str(tmp_path / "ledger")
+    text = bytearray(range(256)) * 0x120
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.load_elf_file(write_delta_elf(tmp_path, bytes(text)))
+    my_instance.flash(delta=True, ledger_dir=ledger_dir)
+    assert my_instance.flash_report["mode"] == "full"
+    previous_text = bytes(text)
+    text[0x4004] = 0
+    text[0x11001] = 0
+    my_instance.load_elf_file(write_delta_elf(tmp_path, bytes(text)))
+    mock_gdb_controller.write.reset_mock()
+    written_bins = {}
+    mock_gdb_controller.write.side_effect = delta_target(previous_text, written_bins)
+    my_instance.flash(delta=True, ledger_dir=ledger_dir)
+    assert written_commands(mock_gdb_controller)[:3] == [
+        ["1maint packet qCRC:8000000,12000"], "monitor flash banks", ["2monitor flash info 0"]]
+    assert [c.split()[5] for c in written_commands(mock_gdb_controller)[3:]] == ["0x8004000", "0x8010000"]
+    assert written_bins["0x8004000"] == bytes(text[0x4000:0x8000])
+    assert written_bins["0x8010000"] == bytes(text[0x10000:0x12000]) + b"\xff" * 0xe000
+    assert my_instance.flash_report["runs"] == [("0x8004000", 0x4000), ("0x8010000", 0x10000)]
+    assert (my_instance.flash_report["bytes_written"], my_instance.flash_report["bytes_saved"]) == (0x14000, 0xc000)
+    assert FlashLedger(ledger_dir).image("localhost:3333") == open(tmp_path / "firmware.elf", "rb").read()
+
+
+def test_gdb_flash_delta_uses_given_sector_size(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    response_mapping["monitor flash write_image"] = "monitor_flash_write_image.json"
+    ledger_dir = str(tmp_path / "ledger")
+    text = bytearray(range(256)) * 64
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.load_elf_file(write_delta_elf(tmp_path, bytes(text)))
+    my_instance.flash(delta=True, ledger_dir=ledger_dir)
+    previous_text = bytes(text)
+    text[0x1004] = 0
+    my_instance.load_elf_file(write_delta_elf(tmp_path, bytes(text)))
+    mock_gdb_controller.write.reset_mock()
+    mock_gdb_controller.write.side_effect = delta_target(previous_text, {})
+    my_instance.flash(delta=True, ledger_dir=ledger_dir, sector_size=0x1000)
+    assert "monitor flash banks" not in written_commands(mock_gdb_controller)
+    assert my_instance.flash_report["runs"] == [("0x8001000", 0x1000)]
+
+
+def test_gdb_flash_delta_downloads_if_target_lost_previous_image(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    ledger_dir = str(tmp_path / "ledger")
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.load_elf_file(write_delta_elf(tmp_path, b"\x01" * 16))
+    my_instance.flash(delta=True, ledger_dir=ledger_dir)
+    my_instance.load_elf_file(write_delta_elf(tmp_path, b"\x02" * 16))
+    mock_gdb_controller.write.reset_mock()
+    mock_gdb_controller.write.side_effect = delta_target(b"\x03" * 16, {})
+    my_instance.flash(delta=True, ledger_dir=ledger_dir)
+    assert written_commands(mock_gdb_controller) == [["1maint packet qCRC:8000000,10"], "-target-download"]
+    assert my_instance.flash_report["mode"] == "full"
+    assert my_instance.flash_report["delta_fallback"] == "target does not hold the previous image"
+    assert FlashLedger(ledger_dir).image("localhost:3333") == open(tmp_path / "firmware.elf", "rb").read()
+
+
+def test_gdb_flash_delta_downloads_if_image_outside_flash_sectors(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    ledger_dir = str(tmp_path / "ledger")
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.load_elf_file(write_delta_elf(tmp_path, b"\x01" * 16))
+    my_instance.flash(delta=True, ledger_dir=ledger_dir)
+    elf_path = tmp_path / "firmware.elf"
+    elf_path.write_bytes(build_elf([], sections=[(".text", 0x08000000, b"\x02" * 16),
+                                                 (".ramfunc", 0x20000000, b"\x03" * 4)]))
+    my_instance.load_elf_file(str(elf_path))
+    mock_gdb_controller.write.reset_mock()
+    mock_gdb_controller.write.side_effect = delta_target(b"\x01" * 16, {})
+    my_instance.flash(delta=True, ledger_dir=ledger_dir)
+    assert written_commands(mock_gdb_controller)[-1] == "-target-download"
+    assert my_instance.flash_report["delta_fallback"].startswith("Section .ramfunc at 0x20000000")
+
+
+def test_gdb_flash_delta_write_error_raise_exception_and_forgets_ledger(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    response_mapping["monitor flash write_image"] = "monitor_flash_write_image_error.json"
+    ledger_dir = str(tmp_path / "ledger")
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.load_elf_file(write_delta_elf(tmp_path, b"\x01" * 16))
+    my_instance.flash(delta=True, ledger_dir=ledger_dir)
+    my_instance.load_elf_file(write_delta_elf(tmp_path, b"\x02" * 16))
+    mock_gdb_controller.write.side_effect = delta_target(b"\x01" * 16, {})
+    with pytest.raises(GdbFlashError, match=r".*Error writing flash at 0x8000000.*"):
+        my_instance.flash(delta=True, ledger_dir=ledger_dir)
+    assert FlashLedger(ledger_dir).get("localhost:3333") is None
+    assert FlashLedger(ledger_dir).image("localhost:3333") is None
+
+
+def test_gdb_flash_without_ledger_forgets_recorded_image(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    ledger_dir = str(tmp_path / "ledger")
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.load_elf_file(write_delta_elf(tmp_path, b"\x01" * 16))
+    my_instance.flash(delta=True, ledger_dir=ledger_dir)
+    my_instance.flash(ledger_dir=ledger_dir)
+    assert os.listdir(ledger_dir) == []
+
+
+def crc_replies(replies):
+    def write(mi_cmd_to_write, *args, **kwargs):
+        if (not isinstance(mi_cmd_to_write, list)):
+            return gdb_write_responses(mi_cmd_to_write)
+        for tagged_command, reply in zip(mi_cmd_to_write, replies):
+            token, command = re.match(r"^(\d+)(.*)$", tagged_command).groups()
+            pipelined_responses.append({"type": "console", "message": None, "stream": "stdout",
+                                        "payload": f'sending: "{command.split()[-1]}"\nreceived: "{reply}"\n'})
+            pipelined_responses.append({"type": "result", "message": "done", "payload": None,
+                                        "token": int(token), "stream": "stdout"})
+        return []
+    return write
+
+
+def test_gdb_verify_flash_compares_target_crcs(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.load_elf_file(write_flash_elf(tmp_path))
+    mock_gdb_controller.write.side_effect = crc_replies(
+        ["C%08x" % target_crc32(b"\x01\x02\x03\x04"), "C%08x" % target_crc32(b"\xaa\xbb")])
+    my_instance.flash(verify=True)
+    mock_gdb_controller.write.assert_called_with(
+        ["1maint packet qCRC:8000000,4", "2maint packet qCRC:8000004,2"], 30, read_response=False)
+    assert my_instance.flash_report["verified"] == True
+
+
+def test_gdb_verify_flash_raise_exception_with_mismatching_ranges(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.load_elf_file(write_flash_elf(tmp_path))
+    mock_gdb_controller.write.side_effect = crc_replies(["C00000000", "C%08x" % target_crc32(b"\xaa\xbb")])
+    with pytest.raises(GdbFlashError, match=r".*Mismatching ranges: .text 0x8000000-0x8000004$"):
+        my_instance.verify_flash()
+    assert my_instance.flash_report["verified"] == False
+
+
+def test_gdb_flash_verify_failure_forgets_ledger(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    ledger_dir = str(tmp_path / "ledger")
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.load_elf_file(write_flash_elf(tmp_path))
+    my_instance.flash(skip_if_unchanged=True, ledger_dir=ledger_dir)
+    assert FlashLedger(ledger_dir).get("localhost:3333") is not None
+    mock_gdb_controller.write.side_effect = crc_replies(["C00000000", "C%08x" % target_crc32(b"\xaa\xbb")])
+    with pytest.raises(GdbFlashError, match=r".*Flash verification failed.*"):
+        my_instance.flash(skip_if_unchanged=True, ledger_dir=ledger_dir, verify=True)
+    assert FlashLedger(ledger_dir).get("localhost:3333") is None
+
+
+def test_gdb_verify_flash_raise_exception_if_target_has_no_crc(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.load_elf_file(write_flash_elf(tmp_path))
+    mock_gdb_controller.write.side_effect = crc_replies(["E01", "E01"])
+    with pytest.raises(GdbFlashError, match=r".*did not return a CRC for section .text.*"):
+        my_instance.verify_flash()
+
+
+def test_gdb_load_elf_loads_indexed_copy_from_cache(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    elf_path = tmp_path / "firmware.elf"
+    elf_path.write_bytes(build_elf([("main", 0x08000101, 0x40, STT_FUNC, STB_GLOBAL)]))
+    cache_dir = str(tmp_path / "cache")
+    cached_path = gdb_control.indexed_elf_path(cache_dir, gdb_control.file_sha256(str(elf_path)))
+    os.makedirs(cache_dir)
+    shutil.copy(elf_path, cached_path)
+    my_instance = gdb()
+    my_instance.load_elf_file(str(elf_path), use_index_cache=True, index_cache_dir=cache_dir)
+    mock_gdb_controller.write.assert_called_with("-file-exec-and-symbols "+cached_path, 10)
+    assert my_instance.elf_load_stats["index_cache"] == "hit"
+    assert my_instance.elf_file_path == str(elf_path)
+
+
+def test_gdb_load_elf_builds_index_cache_on_miss(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path, mocker):
+    elf_path = tmp_path / "firmware.elf"
+    elf_path.write_bytes(build_elf([("main", 0x08000101, 0x40, STT_FUNC, STB_GLOBAL)]))
+    cache_dir = str(tmp_path / "cache")
+    add_index_section = mocker.patch("Omni.robotlibraries.gdb.gdb_control.add_index_section")
+    my_instance = gdb()
+    my_instance.load_elf_file(str(elf_path), use_index_cache=True, index_cache_dir=cache_dir)
+    written = [c.args[0] for c in mock_gdb_controller.write.call_args_list[-2:]]
+    assert written[0] == "-file-exec-and-symbols "+str(elf_path)
+    assert written[1].startswith("save gdb-index ")
+    index_dir = written[1].split(" ", 2)[2]
+    add_index_section.assert_called_once_with(
+        str(elf_path), index_dir, gdb_control.indexed_elf_path(cache_dir, gdb_control.file_sha256(str(elf_path))))
+    assert my_instance.elf_load_stats["index_cache"] == "miss"
+    assert "index_build_sec" in my_instance.elf_load_stats
+
+
+def test_gdb_load_elf_keeps_elf_loaded_if_index_build_fails(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    response_mapping["save gdb-index"] = "print_var_symbol_n_found.json"
+    elf_path = tmp_path / "firmware.elf"
+    elf_path.write_bytes(build_elf([("main", 0x08000101, 0x40, STT_FUNC, STB_GLOBAL)]))
+    my_instance = gdb()
+    my_instance.load_elf_file(str(elf_path), use_index_cache=True, index_cache_dir=str(tmp_path / "cache"))
+    assert my_instance.elf_loaded
+    assert "save gdb-index failed" in my_instance.elf_load_stats["index_error"]
+
+
 def test_gdb_flash_raise_exception_if_elf_not_loaded(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
     my_instance = gdb()
     my_instance.connect("localhost", "3333")
@@ -392,7 +715,7 @@ def test_gdb_get_program_state_malformed_msg_raise_exception_and_saves_rsp(mock_
     my_instance.flash()
     my_instance.pause()
     with pytest.raises(GdbResponseError, match=r".*Unexpected GDB response in get_program_state.*"):
-        my_instance.get_program_state()
+        my_instance.get_program_state(refresh=True)
     assert os.path.isfile(
         temp_folder_path+'/malformed_get_program_state.json')
 
@@ -724,14 +1047,14 @@ def test_gdb_stopped_at_breakpoint_raises_exception_if_not_stopped(mock_gdb_cont
 
 
 def test_gdb_stopped_at_breakpoint_with_tag_returns_true_if_tag_hit_breakpoint_index_1(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
-    response_mapping["-exec-continue"] = "mi_continue_stop_break_no_hit_write.json"
-    response_mapping["info program"] = "info_prog_stoped_bp.json"
+    response_mapping["-exec-continue"] = "mi_continue_stop_break_my_source_file_write.json"
+    response_mapping["-break-insert"] = "mi_break_insert_my_source_file.json"
     my_instance = gdb()
     my_instance.connect("localhost", "3333")
     my_instance.load_elf_file("/path/to/elf/file")
     my_instance.flash()
     my_instance.insert_breakpoint(
-        test_dir+"/gdb_responses/MySourceFile.cpp", 20)
+        test_dir+"/gdb_responses/MySourceFile.cpp", tag="TEST TAG A")
     mock_gdb_controller.get_gdb_response.return_value = read_from_json(
         os.path.join(responses_dir, "mi_continue_stop_break_hit_read.json"))
     my_instance.continue_until_breakpoint(timeout_sec=5)
@@ -740,9 +1063,36 @@ def test_gdb_stopped_at_breakpoint_with_tag_returns_true_if_tag_hit_breakpoint_i
     assert tag_hit == True
 
 
+def test_gdb_stopped_at_breakpoint_with_tag_after_program_state_refresh(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    response_mapping["-exec-continue"] = "mi_continue_stop_break_my_source_file_write.json"
+    response_mapping["-break-insert"] = "mi_break_insert_my_source_file.json"
+    response_mapping["info program"] = "info_prog_stoped_bp.json"
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.load_elf_file("/path/to/elf/file")
+    my_instance.insert_breakpoint(
+        test_dir+"/gdb_responses/MySourceFile.cpp", tag="TEST TAG A")
+    mock_gdb_controller.get_gdb_response.return_value = read_from_json(
+        os.path.join(responses_dir, "mi_continue_stop_break_hit_read.json"))
+    my_instance.continue_until_breakpoint(timeout_sec=5)
+    assert my_instance.get_program_state(refresh=True) == "stopped"
+    assert my_instance.stopped_at_breakpoint_with_tag(
+        test_dir+"/gdb_responses/MySourceFile.cpp", "TEST TAG A") == True
+
+
+def test_gdb_program_state_refresh_reads_breakpoint_from_info_program(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    response_mapping["info program"] = "info_prog_stoped_bp.json"
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.send_command("my_command", os.path.join(temp_folder_path, "my_command.json"))
+    assert my_instance.get_stop_info()["state"] == "unknown"
+    assert my_instance.get_program_state(refresh=True) == "stopped"
+    assert my_instance.get_stop_info()["breakpoint_number"] == "1"
+    assert my_instance.run_state.is_stopped_at_breakpoint()
+
+
 def test_gdb_stopped_at_breakpoint_with_tag_returns_true_if_tag_hit_breakpoint_index_2(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
     response_mapping["-exec-continue"] = "mi_continue_stop_break_no_hit_write.json"
-    response_mapping["info program"] = "info_prog_stoped_bp2.json"
     response_mapping["-break-list"] = "mi_bp_list2.json"
     my_instance = gdb()
     my_instance.connect("localhost", "3333")
@@ -751,7 +1101,7 @@ def test_gdb_stopped_at_breakpoint_with_tag_returns_true_if_tag_hit_breakpoint_i
     my_instance.insert_breakpoint(
         test_dir+"/gdb_responses/MySourceFile.cpp", 20)
     mock_gdb_controller.get_gdb_response.return_value = read_from_json(
-        os.path.join(responses_dir, "mi_continue_stop_break_hit_read.json"))
+        os.path.join(responses_dir, "mi_continue_stop_break_hit_read_bp2.json"))
     my_instance.continue_until_breakpoint(timeout_sec=5)
     tag_hit = my_instance.stopped_at_breakpoint_with_tag(
         test_dir+"/gdb_responses/MySourceFile.cpp", "TEST TAG E")
@@ -760,7 +1110,6 @@ def test_gdb_stopped_at_breakpoint_with_tag_returns_true_if_tag_hit_breakpoint_i
 
 def test_gdb_stopped_at_breakpoint_with_tag_raise_exception_if_invalid_index(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
     response_mapping["-exec-continue"] = "mi_continue_stop_break_no_hit_write.json"
-    response_mapping["info program"] = "info_prog_stoped_bp3.json"
     my_instance = gdb()
     my_instance.connect("localhost", "3333")
     my_instance.load_elf_file("/path/to/elf/file")
@@ -768,7 +1117,7 @@ def test_gdb_stopped_at_breakpoint_with_tag_raise_exception_if_invalid_index(moc
     my_instance.insert_breakpoint(
         test_dir+"/gdb_responses/MySourceFile.cpp", 20)
     mock_gdb_controller.get_gdb_response.return_value = read_from_json(
-        os.path.join(responses_dir, "mi_continue_stop_break_hit_read.json"))
+        os.path.join(responses_dir, "mi_continue_stop_break_hit_read_bp100000.json"))
     my_instance.continue_until_breakpoint(timeout_sec=5)
     with pytest.raises(GdbResponseError, match=r".*Invalid breakpoint index.*in breakpoints list.*"):
         my_instance.stopped_at_breakpoint_with_tag(
@@ -894,7 +1243,8 @@ def test_gdb_get_variable_dec_value_correct_call(mock_gdb_controller, gdb_instal
     my_instance.stopped_at_breakpoint_with_tag(
         test_dir+"/gdb_responses/MySourceFile.cpp", "TEST TAG A")
     a = my_instance.get_variable_value("my_var", "dec")
-    mock_gdb_controller.write.assert_called_with('print /d my_var')
+    mock_gdb_controller.write.assert_called_with(
+        ["1print /d my_var", "2print /x my_var", "3ptype my_var", "4print sizeof(my_var)"], 1, read_response=False)
 
 
 def test_gdb_get_variable_hex_value_correct_call(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
@@ -912,7 +1262,8 @@ def test_gdb_get_variable_hex_value_correct_call(mock_gdb_controller, gdb_instal
     my_instance.stopped_at_breakpoint_with_tag(
         test_dir+"/gdb_responses/MySourceFile.cpp", "TEST TAG A")
     a = my_instance.get_variable_value("my_var", "hex")
-    mock_gdb_controller.write.assert_called_with('print /x my_var')
+    mock_gdb_controller.write.assert_called_with(
+        ["1print /x my_var", "2ptype my_var", "3print sizeof(my_var)"], 1, read_response=False)
 
 
 def test_gdb_get_variable_bin_value_correct_call(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
@@ -930,7 +1281,8 @@ def test_gdb_get_variable_bin_value_correct_call(mock_gdb_controller, gdb_instal
     my_instance.stopped_at_breakpoint_with_tag(
         test_dir+"/gdb_responses/MySourceFile.cpp", "TEST TAG A")
     a = my_instance.get_variable_value("my_var", "bin")
-    mock_gdb_controller.write.assert_called_with('print /t my_var')
+    mock_gdb_controller.write.assert_called_with(
+        ["1print /t my_var", "2print /x my_var", "3ptype my_var", "4print sizeof(my_var)"], 1, read_response=False)
 
 
 def test_gdb_get_variable_invalid_format_raise_exception(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
@@ -1174,3 +1526,1026 @@ def test_gdb_log_file_stop_raise_exception_on_malformed_rsp(mock_gdb_controller,
         my_instance.stop_logging()
         assert os.path.isfile(
             temp_folder_path + '/malformed_stop_logging.json')
+
+
+def test_gdb_default_transport_uses_pygdbmi_controller(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    assert isinstance(my_instance.gdb_controller, PygdbmiTransport)
+    assert my_instance.gdb_controller.gdb_controller is mock_gdb_controller
+
+
+def test_gdb_result_transport_wraps_controller(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, mocker):
+    mock_transport = mocker.patch(
+        'Omni.robotlibraries.gdb.gdb_control.MiResultTransport', return_value=mock_gdb_controller)
+    gdb(transport="result")
+    mock_transport.assert_called_once_with(mock_gdb_controller)
+
+
+def test_gdb_invalid_transport_raise_exception(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    with pytest.raises(ValueError, match=r".*Invalid transport argument.*"):
+        gdb(transport="not_a_transport")
+
+
+def test_gdb_send_pipelined_commands_tags_commands_with_tokens(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    mock_gdb_controller.write.side_effect = None
+    mock_gdb_controller.get_gdb_response.return_value = read_from_json(
+        os.path.join(responses_dir, "mi_pipelined_cmds.json"))
+    responses = my_instance.send_pipelined_commands(
+        ["-break-delete", "pwd"], timeout_sec=5)
+    mock_gdb_controller.write.assert_called_with(
+        ["1-break-delete", "2pwd"], 5, read_response=False)
+    assert len(responses) == 2
+    assert responses[0][0]["token"] == 1
+    assert responses[1][1]["payload"] == "Working directory /tmp.\n"
+
+
+def test_gdb_send_pipelined_commands_uses_result_transport(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, mocker):
+    mock_transport = mocker.MagicMock(spec=MiResultTransport)
+    mock_transport.events = MiEventStream()
+    mock_transport.get_gdb_response.return_value = read_from_json(
+        os.path.join(responses_dir, "initial_resp.json"))
+    mock_transport.write.side_effect = gdb_write_responses
+    mock_transport.write_pipelined.return_value = [[], []]
+    mocker.patch('Omni.robotlibraries.gdb.gdb_control.MiResultTransport',
+                 return_value=mock_transport)
+    my_instance = gdb(transport="result")
+    assert my_instance.send_pipelined_commands(["-break-delete", "pwd"]) == [[], []]
+    mock_transport.write_pipelined.assert_called_once_with(
+        ["-break-delete", "pwd"], 1)
+
+
+def test_gdb_pause_accepts_sigint_stop_record(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    response_mapping["-exec-interrupt"] = "mi_exec_interrupt_stopped_only.json"
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.pause()
+
+
+def test_gdb_flash_accepts_download_result_record(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    response_mapping["-target-download"] = "mi_load_open_ocd_done.json"
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.load_elf_file("/path/to/elf/file")
+    my_instance.flash()
+
+
+def test_gdb_publishes_async_records_as_events(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    stop_events = my_instance.get_events(messages=["stopped"])
+    assert len(stop_events) == 1
+    assert stop_events[0]["payload"]["stopped-threads"] == "all"
+    assert my_instance.get_events(messages=["stopped"]) == []
+
+
+def test_gdb_event_subscriber_called_for_matching_records(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    notified = []
+    subscription = my_instance.subscribe_to_events(
+        notified.append, record_types=["notify"])
+    my_instance.connect("localhost", "3333")
+    assert [e["message"] for e in notified] == [
+        "thread-group-started", "thread-created", "stopped"]
+    my_instance.unsubscribe_from_events(subscription)
+    my_instance.connect("localhost", "3333")
+    assert len(notified) == 3
+
+
+def test_gdb_wait_for_event_raise_exception_if_timeout(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    with pytest.raises(GdbTimeoutError, match=r".*No gdb event.*"):
+        my_instance.wait_for_event("stopped", timeout_sec=0.01)
+
+
+def test_gdb_wait_for_event_ignores_stop_before_the_call(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    with pytest.raises(GdbTimeoutError, match=r".*No gdb event.*stopped.*"):
+        my_instance.wait_for_event("stopped", timeout_sec=0.1)
+
+
+def test_gdb_wait_for_event_polls_gdb_output(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    mock_gdb_controller.get_gdb_response.side_effect = None
+    mock_gdb_controller.get_gdb_response.return_value = [
+        {"type": "notify", "message": "stopped", "payload": {"reason": "breakpoint-hit", "bkptno": "1"}}]
+    event = my_instance.wait_for_event("stopped", timeout_sec=1)
+    assert event["payload"]["bkptno"] == "1"
+    mock_gdb_controller.get_gdb_response.assert_called_with(0, False)
+
+
+def test_gdb_get_program_state_answers_from_run_state(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.load_elf_file("/path/to/elf/file")
+    my_instance.flash()
+    my_instance.pause()
+    assert my_instance.get_program_state() == "stopped"
+    assert [c.args[0] for c in mock_gdb_controller.write.call_args_list].count("info program") == 0
+
+
+def test_gdb_get_program_state_polls_events_while_running(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.load_elf_file("/path/to/elf/file")
+    my_instance.flash()
+    my_instance.continue_execution()
+    assert my_instance.get_program_state() == "running"
+    mock_gdb_controller.get_gdb_response.return_value = read_from_json(
+        os.path.join(responses_dir, "mi_continue_stop_break_hit_read.json"))
+    assert my_instance.get_program_state() == "stopped"
+    mock_gdb_controller.get_gdb_response.assert_called_with(0, False)
+    assert [c.args[0] for c in mock_gdb_controller.write.call_args_list].count("info program") == 0
+
+
+def test_gdb_continue_until_breakpoint_ignores_stop_seen_by_program_state(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.load_elf_file("/path/to/elf/file")
+    my_instance.flash()
+    my_instance.continue_execution()
+    mock_gdb_controller.get_gdb_response.return_value = read_from_json(
+        os.path.join(responses_dir, "mi_continue_stop_break_hit_read.json"))
+    assert my_instance.get_program_state() == "stopped"
+    mock_gdb_controller.get_gdb_response.side_effect = GdbTimeoutError
+    with pytest.raises(GdbTimeoutError):
+        my_instance.continue_until_breakpoint(timeout_sec=1)
+    mock_gdb_controller.get_gdb_response.side_effect = None
+    mock_gdb_controller.get_gdb_response.return_value = []
+    assert my_instance.get_program_state() == "running"
+
+
+def test_gdb_continue_until_breakpoint_ignores_stop_before_running(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.load_elf_file("/path/to/elf/file")
+    my_instance.flash()
+    stale_stop = read_from_json(os.path.join(responses_dir, "mi_continue_stop_break_hit_read.json"))
+    running = read_from_json(os.path.join(responses_dir, "mi_continue.json"))
+    mock_gdb_controller.write.side_effect = lambda *args, **kwargs: stale_stop + running
+    mock_gdb_controller.get_gdb_response.side_effect = GdbTimeoutError
+    with pytest.raises(GdbTimeoutError):
+        my_instance.continue_until_breakpoint(timeout_sec=1)
+
+
+def test_gdb_get_program_state_queries_gdb_after_reset_halt(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    response_mapping["info program"] = "info_program_stopped.json"
+    response_mapping["monitor reset halt"] = "mi_monitor_reset_halt_openocd.json"
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.reset_halt()
+    assert my_instance.get_program_state() == "stopped"
+    assert [c.args[0] for c in mock_gdb_controller.write.call_args_list].count("info program") == 1
+
+
+def test_gdb_get_stop_info_returns_breakpoint_stop(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    response_mapping["-exec-continue"] = "mi_continue_stop_break_hit_write.json"
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.load_elf_file("/path/to/elf/file")
+    my_instance.flash()
+    my_instance.continue_until_breakpoint(timeout_sec=5)
+    stop_info = my_instance.get_stop_info()
+    assert (stop_info["reason"], stop_info["breakpoint_number"], stop_info["line"]) == \
+        ("breakpoint-hit", "1", 23)
+    assert stop_info["file"] == "src/GPIO_integration_test.cpp"
+
+
+def test_gdb_stopped_at_breakpoint_with_tag_uses_breakpoint_mirror(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, mocker):
+    response_mapping["-exec-continue"] = "mi_continue_stop_break_my_source_file_write.json"
+    response_mapping["-break-insert"] = "mi_break_insert_my_source_file.json"
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.load_elf_file("/path/to/elf/file")
+    my_instance.flash()
+    my_instance.insert_breakpoint(
+        test_dir+"/gdb_responses/MySourceFile.cpp", tag="TEST TAG A")
+    mock_gdb_controller.get_gdb_response.return_value = read_from_json(
+        os.path.join(responses_dir, "mi_continue_stop_break_hit_read.json"))
+    my_instance.continue_until_breakpoint(timeout_sec=5)
+    mock_gdb_controller.write.reset_mock()
+    tag_scan = mocker.patch('Omni.robotlibraries.gdb.gdb_control.line_of_test_tag')
+    assert my_instance.stopped_at_breakpoint_with_tag(
+        test_dir+"/gdb_responses/MySourceFile.cpp", "TEST TAG A") == True
+    mock_gdb_controller.write.assert_not_called()
+    tag_scan.assert_not_called()
+
+
+def test_gdb_stopped_at_breakpoint_with_tag_caches_listed_breakpoint(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    response_mapping["-exec-continue"] = "mi_continue_stop_break_no_hit_write.json"
+    response_mapping["-break-list"] = "mi_bp_list2.json"
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.load_elf_file("/path/to/elf/file")
+    my_instance.flash()
+    mock_gdb_controller.get_gdb_response.return_value = read_from_json(
+        os.path.join(responses_dir, "mi_continue_stop_break_hit_read_bp2.json"))
+    my_instance.continue_until_breakpoint(timeout_sec=5)
+    for tag in ("TEST TAG E", "TEST TAG D"):
+        my_instance.stopped_at_breakpoint_with_tag(
+            test_dir+"/gdb_responses/MySourceFile.cpp", tag)
+    assert [c.args[0] for c in mock_gdb_controller.write.call_args_list].count("-break-list") == 1
+    assert my_instance.breakpoints.numbers_at("MySourceFile.cpp", 26) == ["2"]
+
+
+def test_gdb_insert_breakpoint_adds_breakpoint_to_mirror(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.load_elf_file("/path/to/elf/file")
+    my_instance.flash()
+    my_instance.insert_breakpoint(
+        test_dir+"/gdb_responses/MySourceFile.cpp", 20)
+    assert my_instance.breakpoints.get(1)["line"] == "23"
+    assert my_instance.breakpoints.numbers_at("GPIO_integration_test.cpp", 23) == ["1"]
+    my_instance.delete_all_breakpoints()
+    assert len(my_instance.breakpoints) == 0
+
+
+def test_gdb_insert_breakpoints_pipelines_all_locations(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, mocker):
+    source_file_path = test_dir+"/gdb_responses/MySourceFile.cpp"
+    my_instance = gdb()
+    mock_gdb_controller.write.side_effect = None
+    mock_gdb_controller.get_gdb_response.return_value = read_from_json(
+        os.path.join(responses_dir, "mi_break_insert_pipelined.json"))
+    tag_scan = mocker.spy(gdb_control, "scan_test_tags")
+    results = my_instance.insert_breakpoints(
+        [(source_file_path, "TEST TAG A"), (source_file_path, "20", "hardware"),
+         {"source_file_path": source_file_path, "line_number": 300}], timeout_sec=5)
+    mock_gdb_controller.write.assert_called_with(
+        ["1-break-insert --source MySourceFile.cpp --line 16",
+         "2-break-insert --source MySourceFile.cpp --line 20 -h",
+         "3-break-insert --source MySourceFile.cpp --line 300"], 5, read_response=False)
+    tag_scan.assert_called_once()
+    assert [r["number"] for r in results] == ["1", "2", None]
+    assert results[2]["error"] == "GdbResponseError: No line 300 in file \"MySourceFile.cpp\". defined in the elf file"
+    assert my_instance.breakpoints.numbers_at("MySourceFile.cpp", 20) == ["2"]
+    assert my_instance.breakpoints.tag_line(source_file_path, "TEST TAG A") == 16
+
+
+def test_gdb_insert_breakpoints_scans_each_source_file_once(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, mocker):
+    source_file_path = test_dir+"/gdb_responses/MySourceFile.cpp"
+    my_instance = gdb()
+    mock_gdb_controller.write.side_effect = None
+    mock_gdb_controller.get_gdb_response.return_value = read_from_json(
+        os.path.join(responses_dir, "mi_break_insert_pipelined.json"))
+    tag_scan = mocker.spy(gdb_control, "scan_test_tags")
+    my_instance.insert_breakpoints(
+        [(source_file_path, "TEST TAG " + t) for t in "ABC"], timeout_sec=5)
+    tag_scan.assert_called_once_with({"TEST TAG A", "TEST TAG B", "TEST TAG C"}, source_file_path)
+
+
+def test_gdb_insert_breakpoints_reports_invalid_locations_without_sending_them(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    source_file_path = test_dir+"/gdb_responses/MySourceFile.cpp"
+    my_instance = gdb()
+    mock_gdb_controller.write.reset_mock()
+    results = my_instance.insert_breakpoints(
+        [(source_file_path, "MY WRONG TAG"), (test_dir+"/gdb_responses/Missing.cpp", "TEST TAG A"),
+         (source_file_path, 20, "conditional")])
+    assert results[0]["error"].startswith("TagNotFoundError: Tag \"MY WRONG TAG\" not found")
+    assert results[1]["error"].startswith("FileNotFoundError:")
+    assert results[2]["error"].startswith("ValueError: Invalid break_type argument")
+    mock_gdb_controller.write.assert_not_called()
+
+
+def test_gdb_read_memory_pipelines_chunk_reads(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    mock_gdb_controller.write.side_effect = None
+    mock_gdb_controller.get_gdb_response.return_value = read_from_json(
+        os.path.join(responses_dir, "mi_read_memory_pipelined.json"))
+    data = my_instance.read_memory("my_buffer", 8, chunk_size=4, timeout_sec=5)
+    mock_gdb_controller.write.assert_called_with(
+        ["1-data-read-memory-bytes -o 0 &(my_buffer) 4",
+         "2-data-read-memory-bytes -o 4 &(my_buffer) 4"], 5, read_response=False)
+    assert data == bytes([1, 0, 0, 0, 0xff, 0xff, 0xff, 0xff])
+
+
+def test_gdb_read_memory_views_data_as_numpy_array(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    mock_gdb_controller.write.side_effect = None
+    mock_gdb_controller.get_gdb_response.return_value = read_from_json(
+        os.path.join(responses_dir, "mi_read_memory_pipelined.json"))
+    samples = my_instance.read_memory(0x20000100, 8, dtype="<i4", chunk_size=4)
+    assert samples.tolist() == [1, -1]
+
+
+def test_gdb_read_memory_error_raise_exception(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    mock_gdb_controller.write.side_effect = None
+    mock_gdb_controller.get_gdb_response.return_value = [
+        {"type": "result", "message": "error", "payload": {"msg": "Unable to read memory."}, "token": 1}]
+    with pytest.raises(GdbMemoryReadError, match=r".*Error reading memory at 0x40000000: Unable to read memory.*"):
+        my_instance.read_memory("0x40000000", 4)
+
+
+def test_gdb_read_memory_resolves_symbols_from_elf_index(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    elf_path = tmp_path / "firmware.elf"
+    elf_path.write_bytes(build_elf([("my_buffer", 0x20000100, 8, STT_OBJECT, STB_GLOBAL)]))
+    my_instance = gdb()
+    my_instance.load_elf_file(str(elf_path))
+    mock_gdb_controller.write.side_effect = None
+    mock_gdb_controller.get_gdb_response.return_value = read_from_json(
+        os.path.join(responses_dir, "mi_read_memory_pipelined.json"))
+    data = my_instance.read_memory("my_buffer", chunk_size=4, timeout_sec=5)
+    mock_gdb_controller.write.assert_called_with(
+        ["1-data-read-memory-bytes -o 0 0x20000100 4",
+         "2-data-read-memory-bytes -o 4 0x20000100 4"], 5, read_response=False)
+    assert data == bytes([1, 0, 0, 0, 0xff, 0xff, 0xff, 0xff])
+
+
+def test_gdb_read_memory_leaves_shadowed_symbols_to_gdb(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    elf_path = tmp_path / "firmware.elf"
+    elf_path.write_bytes(build_elf([("my_buffer", 0x20000100, 8, STT_OBJECT, STB_GLOBAL),
+                                    ("my_buffer", 0x20000200, 8, STT_OBJECT, STB_LOCAL)]))
+    my_instance = gdb()
+    my_instance.load_elf_file(str(elf_path))
+    mock_gdb_controller.write.side_effect = None
+    mock_gdb_controller.get_gdb_response.return_value = read_from_json(
+        os.path.join(responses_dir, "mi_read_memory_pipelined.json"))
+    my_instance.read_memory("my_buffer", 8, chunk_size=4, timeout_sec=5)
+    mock_gdb_controller.write.assert_called_with(
+        ["1-data-read-memory-bytes -o 0 &(my_buffer) 4",
+         "2-data-read-memory-bytes -o 4 &(my_buffer) 4"], 5, read_response=False)
+    with pytest.raises(ValueError, match=r".*not a unique global symbol.*"):
+        my_instance.read_memory("my_buffer")
+
+
+def test_gdb_read_memory_without_length_raise_exception_for_unknown_symbol(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    my_instance.load_elf_file("/path/to/elf/file")
+    with pytest.raises(ValueError, match=r".*No length given.*"):
+        my_instance.read_memory("my_buffer")
+
+
+def test_gdb_symbol_lookups_use_elf_index(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    elf_path = tmp_path / "firmware.elf"
+    elf_path.write_bytes(build_elf([("main", 0x08000101, 0x40, STT_FUNC, STB_GLOBAL),
+                                    ("my_buffer", 0x20000100, 8, STT_OBJECT, STB_GLOBAL)]))
+    my_instance = gdb()
+    my_instance.load_elf_file(str(elf_path))
+    mock_gdb_controller.write.reset_mock()
+    assert my_instance.get_symbol_address("my_buffer") == 0x20000100
+    assert my_instance.get_symbol_size("my_buffer") == 8
+    assert my_instance.get_function_at("0x08000120") == "main"
+    assert my_instance.get_function_at(0x20000000) is None
+    mock_gdb_controller.write.assert_not_called()
+    with pytest.raises(ValueError, match=r".*Symbol 'missing' not found.*"):
+        my_instance.get_symbol_address("missing")
+
+
+def test_gdb_symbol_lookup_raise_exception_if_elf_not_loaded(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    with pytest.raises(GdbFlashError, match=r".*No ELF file loaded.*"):
+        my_instance.get_symbol_address("main")
+
+
+def set_struct_sample_responses():
+    response_mapping["whatis samples"] = "whatis_samples.json"
+    response_mapping["ptype"] = "ptype_o_struct_sample.json"
+    response_mapping["print sizeof"] = "print_sizeof_struct_sample.json"
+    response_mapping["-data-read-memory-bytes"] = "mi_read_memory_samples.json"
+
+
+def test_gdb_read_object_decodes_array_of_structs(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    set_struct_sample_responses()
+    my_instance = gdb()
+    samples = my_instance.read_object("samples")
+    assert samples == [{"timestamp": 100, "value": -5, "valid": 1, "channel": 2},
+                       {"timestamp": 200, "value": 300, "valid": 0, "channel": 7},
+                       {"timestamp": 300, "value": 0, "valid": 1, "channel": 0}]
+    mock_gdb_controller.write.assert_called_with(
+        ["3-data-read-memory-bytes -o 0 &(samples) 24"], 1, read_response=False)
+
+
+def test_gdb_read_object_as_numpy_structured_array(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    set_struct_sample_responses()
+    my_instance = gdb()
+    samples = my_instance.read_object("samples", as_array=True)
+    assert samples["timestamp"].tolist() == [100, 200, 300]
+    assert samples["value"].tolist() == [-5, 300, 0]
+
+
+def test_gdb_type_layout_read_once_per_type(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    set_struct_sample_responses()
+    my_instance = gdb()
+    my_instance.read_object("samples")
+    mock_gdb_controller.write.reset_mock()
+    my_instance.read_object("samples")
+    written = [c.args[0] for c in mock_gdb_controller.write.call_args_list]
+    assert written == ["whatis samples", ["4-data-read-memory-bytes -o 0 &(samples) 24"]]
+
+
+def test_gdb_type_layout_persisted_next_to_elf(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    set_struct_sample_responses()
+    elf_path = tmp_path / "firmware.elf"
+    elf_path.write_bytes(build_elf([("main", 0x08000101, 0x40, STT_FUNC, STB_GLOBAL)]))
+    my_instance = gdb()
+    my_instance.load_elf_file(str(elf_path))
+    my_instance.get_type_layout("struct sample")
+    my_instance = gdb()
+    my_instance.load_elf_file(str(elf_path))
+    mock_gdb_controller.write.reset_mock()
+    assert my_instance.get_type_layout("struct sample")["size"] == 8
+    mock_gdb_controller.write.assert_not_called()
+
+
+def test_gdb_type_layout_error_raise_exception(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    response_mapping["ptype"] = "print_var_symbol_n_found.json"
+    my_instance = gdb()
+    with pytest.raises(GdbTypeLayoutError, match=r".*Error reading the layout of type 'struct missing'.*"):
+        my_instance.get_type_layout("struct missing")
+
+
+def test_gdb_read_peripheral_reads_register_block_once(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    svd_path = str(tmp_path / "test_device.svd")
+    shutil.copy(os.path.join(test_dir, "svd_test_data", "test_device.svd"), svd_path)
+    my_instance = gdb()
+    my_instance.load_svd_file(svd_path)
+    mock_gdb_controller.write.side_effect = None
+    mock_gdb_controller.get_gdb_response.return_value = [
+        {"type": "result", "message": "done", "token": 1, "payload": {"memory": [
+            {"begin": "0x40000010", "offset": "0x0", "end": "0x40000012", "contents": "0100"}]}}]
+    values = my_instance.read_peripheral("TIM2", ["SR"])
+    mock_gdb_controller.write.assert_called_with(
+        ["1-data-read-memory-bytes -o 0 0x40000010 2"], 1, read_response=False)
+    assert values == {"SR": {"value": 1, "fields": {"UIF": 1}}}
+
+
+def test_gdb_read_peripheral_reads_around_gaps_and_side_effect_registers(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    svd_path = str(tmp_path / "test_device.svd")
+    shutil.copy(os.path.join(test_dir, "svd_test_data", "test_device.svd"), svd_path)
+    my_instance = gdb()
+    my_instance.load_svd_file(svd_path)
+    mock_gdb_controller.write.side_effect = None
+    mock_gdb_controller.get_gdb_response.return_value = memory_records(1, 0x40011000, "20000000") + \
+        memory_records(2, 0x40011008, "16000000")
+    values = my_instance.read_peripheral("USART1")
+    mock_gdb_controller.write.assert_called_with(
+        ["1-data-read-memory-bytes -o 0 0x40011000 4", "2-data-read-memory-bytes -o 0 0x40011008 4"],
+        1, read_response=False)
+    assert values == {"SR": {"value": 0x20, "fields": {"RXNE": 1}}, "BRR": {"value": 0x16, "fields": {}}}
+
+
+def test_gdb_read_peripheral_raise_exception_if_svd_not_loaded(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    with pytest.raises(SvdError, match=r".*No SVD file loaded.*"):
+        my_instance.read_peripheral("TIM2")
+
+
+def test_gdb_get_registers_fetches_names_and_values_in_one_batch(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    registers = my_instance.get_registers()
+    mock_gdb_controller.write.assert_called_with(
+        ["1-data-list-register-names", "2-data-list-register-values x"], 1, read_response=False)
+    assert registers["r0"] == 0x10
+    assert registers["pc"] == 0x1f
+    assert registers["xpsr"] == 0x61000000
+    assert len(registers) == 17
+
+
+def test_gdb_get_registers_cached_until_running(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    my_instance.get_registers()
+    mock_gdb_controller.write.reset_mock()
+    my_instance.get_registers()
+    mock_gdb_controller.write.assert_not_called()
+    my_instance.events.publish({"type": "notify", "message": "running", "payload": {"thread-id": "all"}})
+    my_instance.get_registers()
+    mock_gdb_controller.write.assert_called_once_with(["3-data-list-register-values x"], 1, read_response=False)
+
+
+def test_gdb_get_registers_malformed_raise_exception(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    response_mapping["-data-list-register-values"] = "print_var_symbol_n_found.json"
+    my_instance = gdb()
+    with pytest.raises(GdbResponseError, match=r".*Unexpected GDB response in get_registers.*"):
+        my_instance.get_registers()
+
+
+def test_gdb_paint_stacks_fills_regions_from_elf_symbols(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    elf_path = tmp_path / "firmware.elf"
+    elf_path.write_bytes(build_elf([("_sstack", 0x2001f000, 0, 0, STB_GLOBAL), ("_estack", 0x20020000, 0, 0, STB_GLOBAL),
+                                    ("idle_stack", 0x20000100, 0x200, STT_OBJECT, STB_GLOBAL)]))
+    my_instance = gdb()
+    my_instance.load_elf_file(str(elf_path))
+    my_instance.paint_stacks({"main": ["_sstack", "_estack"], "idle": "idle_stack"})
+    mock_gdb_controller.write.assert_called_with(
+        ["3-data-write-memory-bytes 0x2001f000 a5 4096", "4-data-write-memory-bytes 0x20000100 a5 512"],
+        1, read_response=False)
+
+
+def test_gdb_paint_stacks_keeps_frames_above_stack_pointer(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    my_instance.paint_stacks({"main": [0x10, 0x40]}, pattern=0xcc)
+    mock_gdb_controller.write.assert_called_with(
+        ["3-data-write-memory-bytes 0x10 cc 13"], 1, read_response=False)
+
+
+def test_gdb_get_stack_usage_scans_painted_regions(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    my_instance.paint_stacks({"main": [0x20000000, 0x20000008]})
+    mock_gdb_controller.write.side_effect = None
+    mock_gdb_controller.get_gdb_response.return_value = [
+        {"type": "result", "message": "done", "token": 4, "payload": {"memory": [
+            {"begin": "0x20000000", "offset": "0x0", "end": "0x20000008", "contents": "a5a5a51122334455"}]}}]
+    usage = my_instance.get_stack_usage()
+    mock_gdb_controller.write.assert_called_with(
+        ["4-data-read-memory-bytes -o 0 0x20000000 8"], 1, read_response=False)
+    assert usage == {"main": {"start": 0x20000000, "size": 8, "used": 5, "free": 3,
+                              "high_water_address": 0x20000003}}
+
+
+def test_gdb_get_stack_usage_raise_exception_if_not_painted(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    with pytest.raises(ValueError, match=r".*No stacks painted.*"):
+        my_instance.get_stack_usage()
+
+
+def memory_records(token, address, contents):
+    return [{"type": "result", "message": "done", "token": token, "payload": {"memory": [
+        {"begin": hex(address), "offset": "0x0", "end": hex(address + len(contents) // 2), "contents": contents}]}}]
+
+
+def test_gdb_diff_snapshots_maps_changes_to_symbols(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    elf_path = tmp_path / "firmware.elf"
+    elf_path.write_bytes(build_elf([("counter", 0x20000000, 4, STT_OBJECT, STB_GLOBAL),
+                                    ("state", 0x20000004, 4, STT_OBJECT, STB_GLOBAL)]))
+    snapshot_dir = str(tmp_path / "snapshots")
+    my_instance = gdb()
+    my_instance.load_elf_file(str(elf_path))
+    mock_gdb_controller.write.side_effect = None
+    mock_gdb_controller.get_gdb_response.return_value = memory_records(1, 0x20000000, "0100000000000000")
+    my_instance.snapshot_memory({"data": [0x20000000, 0x20000008]}, "before", snapshot_dir)
+    mock_gdb_controller.write.assert_called_with(
+        ["1-data-read-memory-bytes -o 0 0x20000000 8"], 1, read_response=False)
+    mock_gdb_controller.get_gdb_response.return_value = memory_records(2, 0x20000000, "0200000000000000")
+    my_instance.snapshot_memory({"data": [0x20000000, 0x20000008]}, "after", snapshot_dir)
+    assert my_instance.diff_snapshots("before", "after", snapshot_dir) == [
+        {"region": "data", "start": 0x20000000, "end": 0x20000001, "length": 1, "symbols": ["counter"]}]
+
+
+def test_gdb_watch_variables_creates_variable_objects(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    mock_gdb_controller.write.side_effect = None
+    mock_gdb_controller.get_gdb_response.return_value = read_from_json(
+        os.path.join(responses_dir, "mi_var_create_pipelined.json"))
+    values = my_instance.watch_variables(["my_var", "my_struct.count"])
+    mock_gdb_controller.write.assert_called_with(
+        ["1-var-create omni_watch1 * my_var", "2-var-create omni_watch2 * my_struct.count"],
+        1, read_response=False)
+    assert values == {"my_var": "3", "my_struct.count": "10"}
+
+
+def test_gdb_get_changed_variables_returns_only_changes(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    response_mapping["-var-update"] = "mi_var_update.json"
+    my_instance = gdb()
+    mock_gdb_controller.write.side_effect = None
+    mock_gdb_controller.get_gdb_response.return_value = read_from_json(
+        os.path.join(responses_dir, "mi_var_create_pipelined.json"))
+    my_instance.watch_variables(["my_var", "my_struct.count"])
+    mock_gdb_controller.write.side_effect = gdb_write_responses
+    assert my_instance.get_changed_variables() == {"my_var": "4", "my_struct.count": None}
+    mock_gdb_controller.write.assert_called_with("-var-update --all-values *", 1)
+    assert my_instance.get_watched_variables() == {"my_var": "4", "my_struct.count": None}
+
+
+def test_gdb_watch_variables_with_format_and_invalid_expression(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    mock_gdb_controller.write.side_effect = None
+    mock_gdb_controller.get_gdb_response.return_value = read_from_json(
+        os.path.join(responses_dir, "mi_var_create_hex_pipelined.json"))
+    with pytest.raises(GdbResponseError, match=r".*not_a_var: -var-create: unable to create variable object.*"):
+        my_instance.watch_variables(["my_var", "not_a_var"], format="hex")
+    mock_gdb_controller.write.assert_called_with(
+        ["1-var-create omni_watch1 * my_var", "2-var-set-format omni_watch1 hexadecimal",
+         "3-var-create omni_watch2 * not_a_var", "4-var-set-format omni_watch2 hexadecimal"],
+        1, read_response=False)
+    assert my_instance.get_watched_variables() == {"my_var": "0x3"}
+
+
+def test_gdb_watch_variables_invalid_format_raise_exception(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    with pytest.raises(ValueError, match=r".*Invalid value for 'format' parameter.*"):
+        my_instance.watch_variables(["my_var"], format="oct")
+
+
+def test_gdb_unwatch_variables_deletes_variable_objects(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    mock_gdb_controller.write.side_effect = None
+    mock_gdb_controller.get_gdb_response.return_value = read_from_json(
+        os.path.join(responses_dir, "mi_var_create_pipelined.json"))
+    my_instance.watch_variables(["my_var", "my_struct.count"])
+    mock_gdb_controller.get_gdb_response.return_value = [
+        {"type": "result", "message": "done", "payload": {"ndeleted": "1"}, "token": 3},
+        {"type": "result", "message": "done", "payload": {"ndeleted": "1"}, "token": 4}]
+    my_instance.unwatch_variables()
+    mock_gdb_controller.write.assert_called_with(
+        ["3-var-delete omni_watch1", "4-var-delete omni_watch2"], 1, read_response=False)
+    assert my_instance.get_watched_variables() == {}
+
+
+def test_gdb_get_object_value_formats_cached_value_on_host(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    assert my_instance.get_object_value("my_var", "hex") == "0x3"
+    mock_gdb_controller.write.reset_mock()
+    assert my_instance.get_object_value("my_var", "dec") == "3"
+    assert my_instance.get_object_value("my_var", "bin") == "11"
+    mock_gdb_controller.write.assert_not_called()
+
+
+def test_gdb_get_object_value_cache_cleared_when_target_resumes(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.load_elf_file("/path/to/elf/file")
+    my_instance.flash()
+    my_instance.get_object_value("my_var", "hex")
+    my_instance.continue_execution()
+    mock_gdb_controller.write.reset_mock()
+    my_instance.get_object_value("my_var", "hex")
+    assert mock_gdb_controller.write.call_args.args[0][0].endswith("print /x my_var")
+
+
+def test_gdb_get_object_value_asks_gdb_for_each_format_of_structs(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    assert my_instance.get_object_value("my_struct", "hex") == "{var1 = 0x3, var2 = 0xc, var3 = 0x40020c00}"
+    assert my_instance.get_object_value("my_struct", "hex") == "{var1 = 0x3, var2 = 0xc, var3 = 0x40020c00}"
+    assert mock_gdb_controller.write.call_count == 3
+    with pytest.raises(Exception, match=r".*ERROR IN STUB for param: print /d my_struct.*"):
+        my_instance.get_object_value("my_struct", "dec")
+
+
+def profiled_gdb(tmp_path, server_version):
+    response_mapping["monitor version"] = server_version
+    elf_path = tmp_path / "firmware.elf"
+    elf_path.write_bytes(build_elf([("main", 0x08000101, 0x40, STT_FUNC, STB_GLOBAL),
+                                    ("helper", 0x08000201, 0x10, STT_FUNC, STB_GLOBAL)]))
+    my_instance = gdb()
+    my_instance.load_elf_file(str(elf_path))
+    my_instance.connect("localhost", "3333")
+    return my_instance
+
+
+def running_target_responses(command, *args, **kwargs):
+    """gdb in all-stop mode while the core runs: every command is refused."""
+    return [{"type": "result", "message": "error", "token": None, "stream": "stdout",
+             "payload": {"msg": "Cannot execute this command while the target is running."}}]
+
+
+def test_gdb_profile_program_counter_samples_pcsr_over_openocd_tcl(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path, fake_openocd):
+    my_instance = profiled_gdb(tmp_path, "monitor_version_openocd.json")
+    fake_openocd.replies["mdw 0xe000101c"] = "0xe000101c: 08000106 \n"
+    mock_gdb_controller.write.reset_mock()
+    mock_gdb_controller.write.side_effect = running_target_responses
+    profile = my_instance.profile_program_counter(0.03, rate_hz=100, tcl_port=fake_openocd.tcl_port)
+    assert fake_openocd.commands == ["mdw 0xe000101c"] * 3
+    mock_gdb_controller.write.assert_not_called()
+    assert profile == {"method": "pcsr", "samples": 3, "dropped": 0, "functions": [
+        {"function": "main", "self_samples": 3, "self_percent": 100.0, "total_samples": 3, "total_percent": 100.0}]}
+
+
+def test_gdb_profile_program_counter_drops_samples_of_halted_core(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path, fake_openocd):
+    my_instance = profiled_gdb(tmp_path, "monitor_version_openocd.json")
+    fake_openocd.replies["mdw 0xe000101c"] = "0xe000101c: ffffffff \n"
+    profile = my_instance.profile_program_counter(0.02, rate_hz=100, tcl_port=fake_openocd.tcl_port)
+    assert profile["samples"] == 0
+    assert profile["dropped"] == 2
+    assert profile["functions"] == []
+
+
+def test_gdb_profile_program_counter_rejected_pcsr_read_raise_exception(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path, fake_openocd):
+    my_instance = profiled_gdb(tmp_path, "monitor_version_openocd.json")
+    fake_openocd.replies["mdw 0xe000101c"] = "Error: target not examined yet"
+    with pytest.raises(GdbResponseError, match=r".*Error reading DWT_PCSR: OpenOCD rejected 'mdw 0xe000101c'.*"):
+        my_instance.profile_program_counter(0.01, rate_hz=100, tcl_port=fake_openocd.tcl_port)
+
+
+def test_gdb_profile_program_counter_raise_exception_without_openocd_tcl_port(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    my_instance = profiled_gdb(tmp_path, "monitor_version_openocd.json")
+    with socket.socket() as unused:
+        unused.bind(("localhost", 0))
+        closed_port = unused.getsockname()[1]
+    with pytest.raises(ConnectionError, match=r".*Unable to connect to the OpenOCD TCL server.*"):
+        my_instance.profile_program_counter(0.01, tcl_port=closed_port)
+
+
+def test_gdb_profile_program_counter_halts_for_stacks_without_pcsr(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    my_instance = profiled_gdb(tmp_path, "monitor_version_segger_gdbserver.json")
+    collapsed_path = tmp_path / "profile.folded"
+    profile = my_instance.profile_program_counter(0.02, rate_hz=100, collapsed_file=str(collapsed_path))
+    commands = written_commands(mock_gdb_controller)
+    assert commands.count("-exec-interrupt") == 2
+    assert commands.count("-exec-continue") == 2
+    assert profile["method"] == "halt"
+    assert [(f["function"], f["self_samples"], f["total_samples"]) for f in profile["functions"]] == [
+        ("helper", 2, 2), ("main", 0, 2)]
+    assert collapsed_path.read_text() == "main;helper 2\n"
+
+
+def test_gdb_profile_program_counter_rejects_pcsr_without_openocd(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    my_instance = profiled_gdb(tmp_path, "monitor_version_segger_gdbserver.json")
+    with pytest.raises(NotImplementedError, match=r".*DWT_PCSR sampling not implemented for SEGGER J-Link GDB Server.*"):
+        my_instance.profile_program_counter(0.01, method="pcsr")
+    with pytest.raises(ValueError, match=r".*Invalid value for 'method' parameter.*"):
+        my_instance.profile_program_counter(0.01, method="trace")
+
+
+def test_gdb_profile_program_counter_raise_exception_if_not_connected(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    with pytest.raises(ConnectionError):
+        my_instance.profile_program_counter(0.01)
+
+
+def cycle_measurement_responses(stops, cycle_counts):
+    """Numbers breakpoints in insertion order, stops at the given breakpoint
+    numbers and returns the given CYCCNT values."""
+    stops = iter(stops)
+    cycle_counts = iter(cycle_counts)
+
+    def write(command, *args, **kwargs):
+        if (isinstance(command, list) and "-break-insert" in command[0]):
+            for number, tagged_command in enumerate(command, 1):
+                token = int(re.match(r"^(\d+)", tagged_command).group(1))
+                pipelined_responses.append({"type": "result", "message": "done", "token": token, "payload": {
+                    "bkpt": {"number": str(number), "type": "hw breakpoint", "file": "MySourceFile.cpp",
+                             "line": str(16 + 2 * number)}}})
+            return []
+        if (isinstance(command, list) and "0xe0001004" in command[0]):
+            token = int(re.match(r"^(\d+)", command[0]).group(1))
+            pipelined_responses.extend(memory_records(token, 0xe0001004, next(cycle_counts).to_bytes(4, "little").hex()))
+            return []
+        if (command == "-exec-continue"):
+            return [{"type": "result", "message": "running", "payload": None},
+                    {"type": "notify", "message": "stopped", "payload": {"reason": "breakpoint-hit", "bkptno": next(stops)}}]
+        return gdb_write_responses(command, *args, **kwargs)
+    return write
+
+
+def test_gdb_measure_cycles_between_tags(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    source_file_path = test_dir+"/gdb_responses/MySourceFile.cpp"
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    mock_gdb_controller.write.side_effect = cycle_measurement_responses(
+        ["1", "2", "1", "2", "1", "2"], [1000, 1100, 5000, 5120, 0xfffffff0, 0x64])
+    statistics = my_instance.measure_cycles(source_file_path, "TEST TAG B", "TEST TAG C", iterations=3)
+    commands = written_commands(mock_gdb_controller)
+    assert commands[-15:-12] == [
+        ["1-data-evaluate-expression \"*(unsigned int *)0xe000edfc |= 0x1000000\"",
+         "2-data-evaluate-expression \"*(unsigned int *)0xe0001000 |= 0x1\""],
+        ["3-break-insert --source MySourceFile.cpp --line 18 -h", "4-break-insert --source MySourceFile.cpp --line 20 -h"],
+        "-exec-continue"]
+    assert commands[-1] == "-break-delete 1 2"
+    assert statistics["cycles"] == [100, 120, 0x74]
+    assert statistics["min"] == 100
+    assert statistics["max"] == 120
+    assert len(my_instance.breakpoints) == 0
+
+
+def test_gdb_measure_cycles_raise_exception_on_unexpected_breakpoint(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    source_file_path = test_dir+"/gdb_responses/MySourceFile.cpp"
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    mock_gdb_controller.write.side_effect = cycle_measurement_responses(["2"], [])
+    with pytest.raises(GdbBreakpointNotStopped, match=r".*expected breakpoint 1, stopped at breakpoint 2.*"):
+        my_instance.measure_cycles(source_file_path, "TEST TAG B", "TEST TAG C")
+    assert written_commands(mock_gdb_controller)[-1] == "-break-delete 1 2"
+
+
+def cycle_measurement_timeout(mock_gdb_controller):
+    """Breakpoints are inserted, but the target never stops after -exec-continue."""
+    measurement = cycle_measurement_responses([], [])
+
+    def write(command, *args, **kwargs):
+        if (command == "-exec-continue"):
+            return [{"type": "result", "message": "running", "payload": None},
+                    {"type": "notify", "message": "running", "payload": {"thread-id": "all"}}]
+        return measurement(command, *args, **kwargs)
+
+    def get_gdb_response(*args, **kwargs):
+        if (len(pipelined_responses) == 0):
+            raise GdbTimeoutError("Did not get response from gdb")
+        return gdb_pipelined_responses()
+    mock_gdb_controller.write.side_effect = write
+    mock_gdb_controller.get_gdb_response.side_effect = get_gdb_response
+
+
+def test_gdb_measure_cycles_interrupts_target_before_deleting_breakpoints_on_timeout(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    source_file_path = test_dir+"/gdb_responses/MySourceFile.cpp"
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    cycle_measurement_timeout(mock_gdb_controller)
+    with pytest.raises(GdbTimeoutError):
+        my_instance.measure_cycles(source_file_path, "TEST TAG B", "TEST TAG C", timeout_sec=0.01)
+    assert written_commands(mock_gdb_controller)[-3:] == ["-exec-continue", "-exec-interrupt", "-break-delete 1 2"]
+
+
+def test_gdb_measure_cycles_keeps_breakpoints_if_target_can_not_be_interrupted(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    response_mapping["-exec-interrupt"] = "mi_monitor_reset_halt_openocd_malformed.json"
+    source_file_path = test_dir+"/gdb_responses/MySourceFile.cpp"
+    my_instance = gdb()
+    my_instance.logfile_dir = temp_folder_path
+    my_instance.connect("localhost", "3333")
+    cycle_measurement_timeout(mock_gdb_controller)
+    with pytest.raises(GdbResponseError, match=r".*Breakpoints 1 and 2 were not deleted.*"):
+        my_instance.measure_cycles(source_file_path, "TEST TAG B", "TEST TAG C", timeout_sec=0.01)
+    assert not any(c.startswith("-break-delete") for c in written_commands(mock_gdb_controller) if isinstance(c, str))
+
+
+def test_gdb_measure_cycles_raise_exception_on_missing_tag(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    source_file_path = test_dir+"/gdb_responses/MySourceFile.cpp"
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    with pytest.raises(GdbResponseError, match=r".*Error inserting breakpoint at tag 'NO SUCH TAG'.*"):
+        my_instance.measure_cycles(source_file_path, "TEST TAG B", "NO SUCH TAG")
+
+
+def mdb_reply(address, hexcontents):
+    return f"0x{address:08x}: " + " ".join(hexcontents[i:i + 2] for i in range(0, len(hexcontents), 2)) + " \n"
+
+
+def test_gdb_live_watch_samples_running_target_over_openocd_tcl(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path, fake_openocd):
+    fake_openocd.replies["mdb 0x20000000 4"] = mdb_reply(0x20000000, "0000c03f")
+    fake_openocd.replies["mdb 0x20000010 2"] = mdb_reply(0x20000010, "0500")
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    mock_gdb_controller.write.reset_mock()
+    mock_gdb_controller.write.side_effect = running_target_responses
+    my_instance.start_live_watch({"speed": [0x20000000, "float32"], "state": ["0x20000010", "uint16"]}, rate_hz=500,
+                                 tcl_port=fake_openocd.tcl_port)
+    time.sleep(0.05)
+    count = my_instance.stop_live_watch()
+    samples = my_instance.get_live_watch_samples()
+    assert count == len(samples) > 1
+    assert samples["speed"].tolist() == [1.5] * count
+    assert samples["state"].tolist() == [5] * count
+    assert fake_openocd.commands[:2] == ["mdb 0x20000000 4", "mdb 0x20000010 2"]
+    mock_gdb_controller.write.assert_not_called()
+    my_instance.export_live_watch(str(tmp_path / "watch.csv"))
+    assert (tmp_path / "watch.csv").read_text().splitlines()[0] == "time,speed,state"
+
+
+def test_gdb_live_watch_resolves_symbol_types(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path, fake_openocd):
+    set_struct_sample_responses()
+    fake_openocd.replies["mdb 0x20000100 24"] = mdb_reply(0x20000100, "64000000fbff0500c80000002c010e002c01000000000100")
+    elf_path = tmp_path / "firmware.elf"
+    elf_path.write_bytes(build_elf([("samples", 0x20000100, 24, STT_OBJECT, STB_GLOBAL)]))
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.load_elf_file(str(elf_path))
+    my_instance.start_live_watch(["samples"], rate_hz=500, tcl_port=fake_openocd.tcl_port)
+    time.sleep(0.02)
+    my_instance.stop_live_watch()
+    samples = my_instance.get_live_watch_samples()
+    assert samples["samples"].shape[1:] == (3,)
+    assert samples["samples"]["timestamp"][0].tolist() == [100, 200, 300]
+
+
+def test_gdb_live_watch_stop_raise_exception_on_failed_read(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, fake_openocd):
+    fake_openocd.replies["mdb 0x40000000 4"] = "Error: Failed to read memory at 0x40000000"
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.start_live_watch({"reg": [0x40000000, "uint32"]}, rate_hz=500, tcl_port=fake_openocd.tcl_port)
+    time.sleep(0.02)
+    with pytest.raises(LiveWatchReadError, match=r".*Error reading 'reg': OpenOCD rejected 'mdb 0x40000000 4'.*"):
+        my_instance.stop_live_watch()
+
+
+def test_gdb_live_watch_cannot_start_twice(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, fake_openocd):
+    fake_openocd.replies["mdb 0x20000000 1"] = mdb_reply(0x20000000, "00")
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    my_instance.start_live_watch({"flag": [0x20000000, "uint8"]}, tcl_port=fake_openocd.tcl_port)
+    with pytest.raises(ValueError, match=r".*Live watch already running.*"):
+        my_instance.start_live_watch({"flag": [0x20000000, "uint8"]}, tcl_port=fake_openocd.tcl_port)
+    my_instance.stop_live_watch()
+
+
+def test_gdb_live_watch_needs_openocd(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    response_mapping["monitor version"] = "monitor_version_segger_gdbserver.json"
+    my_instance = gdb()
+    with pytest.raises(ConnectionError, match=r".*not connected to any server.*"):
+        my_instance.start_live_watch({"flag": [0x20000000, "uint8"]})
+    my_instance.connect("localhost", "3333")
+    with pytest.raises(NotImplementedError, match=r".*Live watch not implemented for SEGGER J-Link GDB Server.*"):
+        my_instance.start_live_watch({"flag": [0x20000000, "uint8"]})
+
+
+def test_gdb_live_watch_keywords_need_a_started_watch(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    my_instance = gdb()
+    with pytest.raises(ValueError, match=r".*No live watch started.*"):
+        my_instance.get_live_watch_samples()
+
+
+def watchpoint_stops(stops):
+    """Answers every continue with the next (reason, old, new, pc) stop."""
+    stops = iter(stops)
+
+    def write(command, *args, **kwargs):
+        if (command == "-exec-continue"):
+            reason, old, new, pc = next(stops)
+            payload = {"reason": reason, "frame": {"addr": hex(pc), "func": "main"}}
+            if (reason == "watchpoint-trigger"):
+                payload.update({"wpt": {"number": "2", "exp": "counter"}, "value": {"old": old, "new": new}})
+            return [{"type": "result", "message": "running", "payload": None},
+                    {"type": "notify", "message": "stopped", "payload": payload}]
+        return gdb_write_responses(command, *args, **kwargs)
+    return write
+
+
+def test_gdb_trace_variable_records_value_changes(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    mock_gdb_controller.write.side_effect = watchpoint_stops(
+        [("watchpoint-trigger", "0", "1", 0x08000120), ("watchpoint-trigger", "1", "-5", 0x08000200),
+         ("watchpoint-trigger", "-5", "6", 0x08000120)])
+    trace_path = str(tmp_path / "counter.trace")
+    result = my_instance.trace_variable("counter", max_events=3, trace_file=trace_path)
+    assert result == {"trace_file": trace_path, "events": 3, "stop_reason": "watchpoint-trigger"}
+    records = load_trace(trace_path)
+    assert records["old"].tolist() == [0, 1, -5]
+    assert records["new"].tolist() == [1, -5, 6]
+    assert records["pc"].tolist() == [0x08000120, 0x08000200, 0x08000120]
+    assert records.dtype["new"] == numpy.dtype("<i4")
+    commands = written_commands(mock_gdb_controller)
+    assert "-break-watch counter" in commands
+    assert commands.count("-exec-continue") == 3
+    assert commands[-1] == "-break-delete 2"
+
+
+def test_gdb_trace_variable_stops_at_other_stop_reasons(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    mock_gdb_controller.write.side_effect = watchpoint_stops(
+        [("watchpoint-trigger", "0", "1", 0x08000120), ("watchpoint-scope", None, None, 0x08000300)])
+    result = my_instance.trace_variable("counter", max_events=10, trace_file=str(tmp_path / "counter.trace"))
+    assert result["events"] == 1
+    assert result["stop_reason"] == "watchpoint-scope"
+    assert len(load_trace(str(tmp_path / "counter.trace"))) == 1
+    assert not any(c.startswith("-break-delete") for c in written_commands(mock_gdb_controller) if isinstance(c, str))
+
+
+def test_gdb_trace_variable_records_pointer_values(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    response_mapping["whatis cursor"] = "whatis_cursor.json"
+    response_mapping["ptype"] = "ptype_o_int_pointer.json"
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    mock_gdb_controller.write.side_effect = watchpoint_stops(
+        [("watchpoint-trigger", "(int *) 0x20000010 <buf>", "(int *) 0x20000014 <buf+4>", 0x08000120)])
+    trace_path = str(tmp_path / "cursor.trace")
+    result = my_instance.trace_variable("cursor", max_events=1, trace_file=trace_path)
+    assert result["events"] == 1
+    records = load_trace(trace_path)
+    assert (records["old"].tolist(), records["new"].tolist()) == ([0x20000010], [0x20000014])
+    assert records.dtype["new"] == numpy.dtype("<u4")
+
+
+def test_gdb_trace_variable_rejects_enums_before_setting_watchpoint(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    response_mapping["whatis state"] = "whatis_state.json"
+    response_mapping["ptype"] = "ptype_o_enum_state.json"
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    with pytest.raises(ValueError, match=r".*can not trace enum 'state'. Trace '\(int\)\(state\)' instead.*"):
+        my_instance.trace_variable("state")
+    assert not any(c.startswith("-break-watch") for c in written_commands(mock_gdb_controller) if isinstance(c, str))
+
+
+def test_gdb_trace_variable_interrupts_target_before_deleting_watchpoint_on_timeout(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    stops = watchpoint_stops([("watchpoint-trigger", "0", "1", 0x08000120)])
+    continues = []
+
+    def write(command, *args, **kwargs):
+        if (command == "-exec-continue"):
+            continues.append(command)
+            if (len(continues) > 1):
+                return [{"type": "result", "message": "running", "payload": None}]
+        return stops(command, *args, **kwargs)
+    mock_gdb_controller.write.side_effect = write
+    with pytest.raises(GdbResponseError, match=r".*Target did not stop after continue.*"):
+        my_instance.trace_variable("counter", max_events=10, trace_file=str(tmp_path / "counter.trace"), timeout_sec=0.01)
+    commands = written_commands(mock_gdb_controller)
+    assert commands[-3:] == ["-exec-continue", "-exec-interrupt", "-break-delete 2"]
+    assert len(load_trace(str(tmp_path / "counter.trace"))) == 1
+
+
+def test_gdb_trace_variable_keeps_watchpoint_if_target_can_not_be_interrupted(mock_gdb_controller, gdb_installed_mock, reset_response_mapping, tmp_path):
+    response_mapping["-exec-interrupt"] = "mi_monitor_reset_halt_openocd_malformed.json"
+    my_instance = gdb()
+    my_instance.logfile_dir = temp_folder_path
+    my_instance.connect("localhost", "3333")
+
+    def write(command, *args, **kwargs):
+        if (command == "-exec-continue"):
+            return [{"type": "result", "message": "running", "payload": None}]
+        return gdb_write_responses(command, *args, **kwargs)
+    mock_gdb_controller.write.side_effect = write
+    with pytest.raises(GdbResponseError, match=r".*Target still running after trace_variable. Watchpoint 2 was not deleted.*"):
+        my_instance.trace_variable("counter", trace_file=str(tmp_path / "counter.trace"), timeout_sec=0.01)
+    assert not any(c.startswith("-break-delete") for c in written_commands(mock_gdb_controller) if isinstance(c, str))
+
+
+def test_gdb_trace_variable_rejects_aggregates(mock_gdb_controller, gdb_installed_mock, reset_response_mapping):
+    set_struct_sample_responses()
+    my_instance = gdb()
+    my_instance.connect("localhost", "3333")
+    with pytest.raises(ValueError, match=r".*trace_variable needs a scalar variable.*"):
+        my_instance.trace_variable("samples")
@@ -0,0 +1,53 @@
+import os
+import stat
+import pytest
+from Omni.robotlibraries.gdb.gdb_index import *
+
+
+def write_fake_objcopy(directory):
+    # Copies the input file to the output file like objcopy would.
+    path = os.path.join(directory, "fake-objcopy")
+    with open(path, "w") as script:
+        script.write('#!/bin/sh\nfor last; do :; done\neval "input=\\${$(($#-1))}"\ncp "$input" "$last"\n')
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return path
+
+
+@pytest.fixture
+def elf_and_index(tmp_path):
+    elf_path = tmp_path / "firmware.elf"
+    elf_path.write_bytes(b"\x7fELF firmware")
+    index_dir = tmp_path / "index"
+    index_dir.mkdir()
+    (index_dir / "firmware.elf.gdb-index").write_bytes(b"index")
+    return str(elf_path), str(index_dir)
+
+
+def test_indexed_elf_path_is_keyed_by_hash():
+    assert indexed_elf_path("/cache", "abc123") == os.path.join("/cache", "abc123.elf")
+
+
+def test_build_save_index_cmd():
+    assert build_save_index_cmd("/tmp/index") == "save gdb-index /tmp/index"
+
+
+def test_add_index_section_writes_indexed_copy(elf_and_index, tmp_path):
+    elf_path, index_dir = elf_and_index
+    output_path = str(tmp_path / "cache" / "abc123.elf")
+    add_index_section(elf_path, index_dir, output_path, write_fake_objcopy(str(tmp_path)))
+    with open(output_path, "rb") as output:
+        assert output.read() == b"\x7fELF firmware"
+    assert os.listdir(tmp_path / "cache") == ["abc123.elf"]
+
+
+def test_add_index_section_raise_exception_if_index_missing(elf_and_index, tmp_path):
+    elf_path, _ = elf_and_index
+    with pytest.raises(GdbIndexError, match=r".*gdb did not write an index.*"):
+        add_index_section(elf_path, str(tmp_path), str(tmp_path / "cache" / "abc123.elf"))
+
+
+def test_add_index_section_raise_exception_if_objcopy_fails(elf_and_index, tmp_path):
+    elf_path, index_dir = elf_and_index
+    with pytest.raises(GdbIndexError, match=r".*failed.*"):
+        add_index_section(elf_path, index_dir, str(tmp_path / "cache" / "abc123.elf"), "/nonexistent/objcopy")
+    assert os.listdir(tmp_path / "cache") == []
@@ -0,0 +1,82 @@
+import threading
+import time
+import numpy
+import pytest
+from Omni.robotlibraries.gdb.live_watch import *
+
+
+def test_live_watch_buffer_keeps_newest_samples():
+    buffer = LiveWatchBuffer({"speed": numpy.float32, "state": numpy.uint8}, capacity=3)
+    for i in range(5):
+        buffer.append(i * 0.01, (i * 1.5, i))
+    samples = buffer.ordered()
+    assert buffer.count == 5
+    assert samples.dtype.names == ("time", "speed", "state")
+    assert samples["state"].tolist() == [2, 3, 4]
+    assert samples["speed"].tolist() == [3.0, 4.5, 6.0]
+
+
+def test_live_watch_buffer_before_wrap():
+    buffer = LiveWatchBuffer({"state": numpy.uint8}, capacity=4)
+    buffer.append(0.0, (7,))
+    assert buffer.ordered()["state"].tolist() == [7]
+
+
+def test_live_watch_buffer_rejects_time_variable():
+    with pytest.raises(ValueError, match=r".*'time' is reserved.*"):
+        LiveWatchBuffer({"time": numpy.uint32})
+
+
+def test_live_watch_buffer_exports_npy_and_csv(tmp_path):
+    buffer = LiveWatchBuffer({"state": numpy.uint8}, capacity=4)
+    buffer.append(0.5, (7,))
+    buffer.append(1.0, (9,))
+    buffer.export(str(tmp_path / "watch.npy"))
+    buffer.export(str(tmp_path / "watch.csv"))
+    assert numpy.load(str(tmp_path / "watch.npy"))["state"].tolist() == [7, 9]
+    assert (tmp_path / "watch.csv").read_text().splitlines() == ["time,state", "0.5,7", "1.0,9"]
+    with pytest.raises(ValueError, match=r".*Unsupported live watch export format.*"):
+        buffer.export(str(tmp_path / "watch.txt"))
+
+
+def test_live_watch_sampler_fills_buffer_until_stopped():
+    values = iter(range(1000))
+    sampler = LiveWatchSampler(lambda: (next(values),), LiveWatchBuffer({"counter": numpy.uint32}), rate_hz=1000)
+    sampler.start()
+    time.sleep(0.05)
+    sampler.stop()
+    samples = sampler.buffer.ordered()
+    assert sampler.is_running() == False
+    assert len(samples) > 1
+    assert samples["counter"].tolist() == list(range(len(samples)))
+    assert numpy.all(numpy.diff(samples["time"]) > 0)
+
+
+def test_live_watch_sampler_stop_raises_read_error():
+    def fail():
+        raise ConnectionError("probe lost")
+    sampler = LiveWatchSampler(fail, LiveWatchBuffer({"counter": numpy.uint32}), rate_hz=1000)
+    sampler.start()
+    with pytest.raises(ConnectionError, match=r".*probe lost.*"):
+        sampler.stop()
+
+
+def test_parse_mdb_reply_joins_lines():
+    reply = "0x20000000: " + " ".join(["ab"] * 32) + " \n0x20000020: 01 02 \n"
+    assert build_mdb_cmd(0x20000000, 34) == "mdb 0x20000000 34"
+    assert parse_mdb_reply(reply, 34) == b"\xab" * 32 + b"\x01\x02"
+
+
+def test_parse_mdb_reply_raise_exception_on_short_reply():
+    with pytest.raises(LiveWatchReadError, match=r".*Expected 4 bytes from OpenOCD, got 2.*"):
+        parse_mdb_reply("0x20000000: 01 02 \n", 4)
+
+
+def test_live_watch_sampler_closes_on_its_thread():
+    closed = []
+    sampler = LiveWatchSampler(lambda: (1,), LiveWatchBuffer({"state": numpy.uint8}), 1000,
+                               lambda: closed.append(threading.current_thread()))
+    sampler.start()
+    time.sleep(0.01)
+    sampler.stop()
+    assert len(closed) == 1 and closed[0] is not threading.current_thread()
@@ -0,0 +1,58 @@
+import pytest
+from collections import namedtuple
+from Omni.robotlibraries.gdb.memory import *
+
+Symbol = namedtuple("Symbol", ["address", "size"])
+SYMBOLS = {"_sstack": Symbol(0x2001f000, 0), "_estack": Symbol(0x20020000, 0), "task_stack": Symbol(0x20000100, 0x400)}
+
+
+def memory_result(*blocks):
+    return {"type": "result", "message": "done", "token": None,
+            "payload": {"memory": [{"begin": "0x0", "offset": hex(offset), "end": "0x0", "contents": contents}
+                                   for offset, contents in blocks]}}
+
+
+def test_memory_address_expression_keeps_numeric_addresses():
+    assert memory_address_expression(0x20000000) == "0x20000000"
+    assert memory_address_expression(" 0x20000000 ") == "0x20000000"
+    assert memory_address_expression("536870912") == "536870912"
+
+
+def test_memory_address_expression_reads_symbol_storage():
+    assert memory_address_expression("my_buffer") == "&(my_buffer)"
+    assert memory_address_expression("my_struct.samples") == "&(my_struct.samples)"
+
+
+def test_build_read_memory_cmds_splits_reads_into_chunks():
+    assert build_read_memory_cmds("&(buf)", 10, chunk_size=4) == [
+        "-data-read-memory-bytes -o 0 &(buf) 4",
+        "-data-read-memory-bytes -o 4 &(buf) 4",
+        "-data-read-memory-bytes -o 8 &(buf) 2"]
+
+
+def test_build_read_memory_cmds_rejects_empty_reads():
+    with pytest.raises(ValueError, match=r".*Invalid memory read length 0.*"):
+        build_read_memory_cmds("0x0", 0)
+
+
+def test_decode_memory_blocks_places_chunks_by_offset():
+    data = decode_memory_blocks(
+        [memory_result((0, "0001")), memory_result((1, "03"), (0, "02"))], 4, chunk_size=2)
+    assert data == bytes([0, 1, 2, 3])
+
+
+def test_decode_memory_blocks_raises_on_unreadable_part():
+    with pytest.raises(GdbMemoryReadError, match=r".*Only 2 of 4 bytes could be read.*"):
+        decode_memory_blocks([memory_result((0, "0001"))], 4, chunk_size=4)
+
+
+def test_resolve_memory_regions_from_symbols_and_addresses():
+    regions = resolve_memory_regions({"main": ("_sstack", "_estack"), "task": "task_stack",
+                                     "isr": (0x20000000, 0x20000100)}, SYMBOLS.get)
+    assert regions == {"main": (0x2001f000, 0x20020000), "task": (0x20000100, 0x20000500),
+                       "isr": (0x20000000, 0x20000100)}
+
+
+def test_resolve_memory_regions_raise_exception_if_empty():
+    with pytest.raises(ValueError, match=r".*Invalid memory region main.*"):
+        resolve_memory_regions({"main": ("_estack", "_sstack")}, SYMBOLS.get)
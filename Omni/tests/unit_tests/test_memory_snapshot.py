@@ -0,0 +1,29 @@
+import numpy
+from Omni.robotlibraries.gdb.memory_snapshot import *
+
+
+def test_changed_ranges_groups_adjacent_bytes():
+    before = numpy.zeros(16, dtype=numpy.uint8)
+    after = before.copy()
+    after[[2, 3, 4, 9, 15]] = 1
+    assert changed_ranges(before, after) == [(2, 5), (9, 10), (15, 16)]
+    assert changed_ranges(before, before) == []
+
+
+def test_snapshot_round_trip_and_diff(tmp_path):
+    regions = {"data": (0x20000000, 0x20000008), "bss": (0x20000100, 0x20000104)}
+    write_snapshot(str(tmp_path), "before", regions, {"data": bytes(8), "bss": b"\x01\x02\x03\x04"})
+    write_snapshot(str(tmp_path), "after", regions, {"data": b"\x00\x00\xff\xff\x00\x00\x00\x01",
+                                                     "bss": b"\x01\x02\x03\x04"})
+    index, data = load_snapshot(str(tmp_path), "before")
+    assert index["bss"]["offset"] == 8
+    assert bytes(data[8:12]) == b"\x01\x02\x03\x04"
+    changes = diff_snapshot_regions(*load_snapshot(str(tmp_path), "before"), *load_snapshot(str(tmp_path), "after"))
+    assert changes == [{"region": "data", "start": 0x20000002, "end": 0x20000004, "length": 2},
+                       {"region": "data", "start": 0x20000007, "end": 0x20000008, "length": 1}]
+
+
+def test_diff_skips_regions_with_other_bounds(tmp_path):
+    write_snapshot(str(tmp_path), "a", {"data": (0, 4)}, {"data": bytes(4)})
+    write_snapshot(str(tmp_path), "b", {"data": (4, 8)}, {"data": b"\x01" * 4})
+    assert diff_snapshot_regions(*load_snapshot(str(tmp_path), "a"), *load_snapshot(str(tmp_path), "b")) == []
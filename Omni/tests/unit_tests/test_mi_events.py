@@ -0,0 +1,109 @@
+import threading
+import pytest
+from pygdbmi.constants import GdbTimeoutError
+from Omni.robotlibraries.gdb.mi_events import *
+
+
+def notify(message, **payload):
+    return {"type": "notify", "message": message, "payload": payload, "token": None}
+
+
+def console(text):
+    return {"type": "console", "message": None, "payload": text}
+
+
+def test_events_are_returned_in_order_and_drained():
+    events = MiEventStream()
+    events.publish(notify("running"))
+    events.publish(notify("stopped"))
+    assert [e["message"] for e in events.get_events()] == ["running", "stopped"]
+    assert events.get_events() == []
+
+
+def test_get_events_keeps_events_not_matching_filter():
+    events = MiEventStream()
+    events.publish(console("hello\n"))
+    events.publish(notify("stopped"))
+    assert [e["message"] for e in events.get_events(messages=["stopped"])] == ["stopped"]
+    assert events.get_events(record_types=["console"])[0]["payload"] == "hello\n"
+
+
+def test_events_are_timestamped():
+    events = MiEventStream()
+    events.publish(notify("stopped"))
+    assert events.get_events()[0]["time"] > 0
+
+
+def test_full_stream_drops_oldest_events():
+    events = MiEventStream(max_events=2)
+    for message in ("a", "b", "c"):
+        events.publish(notify(message))
+    assert [e["message"] for e in events.get_events()] == ["b", "c"]
+    assert events.dropped_events == 1
+
+
+def test_subscriber_only_receives_matching_events():
+    events = MiEventStream()
+    received = []
+    events.subscribe(received.append, record_types=["notify"], messages=["stopped"])
+    events.publish(notify("running"))
+    events.publish(console("text"))
+    events.publish(notify("stopped", reason="breakpoint-hit"))
+    assert [e["payload"]["reason"] for e in received] == ["breakpoint-hit"]
+
+
+def test_unsubscribed_callback_is_not_called():
+    events = MiEventStream()
+    received = []
+    subscription = events.subscribe(received.append)
+    events.unsubscribe(subscription)
+    events.publish(notify("stopped"))
+    assert received == []
+
+
+def test_failing_callback_does_not_break_publish():
+    events = MiEventStream()
+
+    def failing_callback(event):
+        raise RuntimeError("listener failed")
+    events.subscribe(failing_callback)
+    events.publish(notify("stopped"))
+    assert events.callback_errors == 1
+    assert str(events.last_callback_error) == "listener failed"
+    assert len(events.get_events()) == 1
+
+
+def test_wait_for_returns_event_published_by_other_thread():
+    events = MiEventStream()
+    publisher = threading.Timer(0.05, events.publish, [notify("stopped")])
+    publisher.start()
+    assert events.wait_for(messages=["stopped"], timeout_sec=5)["message"] == "stopped"
+    publisher.join()
+
+
+def test_wait_for_raises_timeout_without_event():
+    events = MiEventStream()
+    events.publish(notify("running"))
+    with pytest.raises(GdbTimeoutError, match=r".*No gdb event.*stopped.*"):
+        events.wait_for(messages=["stopped"], timeout_sec=0.01)
+
+
+def test_wait_for_ignores_events_published_before_the_call():
+    events = MiEventStream()
+    events.publish(notify("stopped"))
+    with pytest.raises(GdbTimeoutError, match=r".*No gdb event.*stopped.*"):
+        events.wait_for(messages=["stopped"], timeout_sec=0.01)
+    assert events.wait_for(messages=["stopped"], timeout_sec=0.01, after_sequence=0)["sequence"] == 1
+
+
+def test_events_are_numbered_in_publish_order():
+    events = MiEventStream()
+    events.publish(notify("running"))
+    events.publish(notify("stopped"))
+    assert [e["sequence"] for e in events.get_events()] == [1, 2]
+    assert events.last_sequence == 2
+
+
+def test_is_event_record_excludes_result_records():
+    assert is_event_record(notify("stopped"))
+    assert is_event_record({"type": "result", "message": "done"}) == False
@@ -0,0 +1,64 @@
+import pytest
+from Omni.robotlibraries.gdb.mi_responses import *
+
+
+def console(text):
+    return {"type": "console", "message": None, "payload": text, "stream": "stdout"}
+
+
+def result(message, payload=None):
+    return {"type": "result", "message": message, "payload": payload, "token": None, "stream": "stdout"}
+
+
+def test_parse_program_state():
+    assert parse_program_state([console("Selected thread is running.\n"), result("done")]) == ("running", None)
+    assert parse_program_state([console("\tUsing the running image of attached Remote target.\n"
+                                        "Program stopped at 0x8000a72.\n"
+                                        "It stopped at breakpoint 3.\n"), result("done")]) == ("stopped", "3")
+    assert parse_program_state([console("Program stopped at 0x8000a72.\n"
+                                        "It stopped after being stepped.\n"), result("done")]) == ("stopped", "")
+    with pytest.raises(GdbResponseError, match=r".*Unexpected GDB response in get_program_state.*"):
+        parse_program_state([result("done")])
+
+
+def test_parse_server_type():
+    assert parse_server_type([console("Open On-Chip Debugger 0.12.0\n"), result("done")]) == OPEN_OCD
+    assert parse_server_type([console("SEGGER J-Link GDB Server V7.92 Command Line Version\n")]) == SEGGER_JLINK
+    assert parse_server_type([result("error", {"msg": "undefined monitor command"})]) == ""
+
+
+def test_verify_done_response():
+    verify_done_response([console("Warning\n"), result("done")], "start_logging")
+    with pytest.raises(GdbResponseError, match=r".*Error on start_logging message from gdb. Bad value.*"):
+        verify_done_response([result("error", {"msg": "Bad value"})], "start_logging")
+    with pytest.raises(GdbResponseError, match=r".*Unexpected GDB response in start_logging.*"):
+        verify_done_response([console("no result\n")], "start_logging")
+
+
+def test_verify_continue_response_needs_running_result():
+    verify_continue_response([result("running"), {"type": "notify", "message": "running", "payload": {}}],
+                             "continue_execution")
+    with pytest.raises(GdbResponseError, match=r".*Unexpected GDB response in continue_until_breakpoint.*"):
+        verify_continue_response([result("error", {"msg": "The program is not being run."})],
+                                 "continue_until_breakpoint")
+
+
+def test_verify_break_insert_response():
+    bkpt = {"number": "1", "type": "breakpoint", "line": "20"}
+    assert verify_break_insert_response([result("done", {"bkpt": bkpt})]) == bkpt
+    with pytest.raises(GdbResponseError, match=r".*No source file named main.c. defined in the elf file.*"):
+        verify_break_insert_response([result("error", {"msg": "No source file named main.c."})])
+    with pytest.raises(GdbResponseError, match=r".*Unexpected GDB response in insert_breakpoint.*"):
+        verify_break_insert_response([result("done"), result("done")])
+
+
+def test_verify_load_elf_response_raises_file_not_found():
+    verify_load_elf_response([result("done")])
+    with pytest.raises(FileNotFoundError, match=r".*No such file or directory.*"):
+        verify_load_elf_response([result("error", {"msg": "app.elf: No such file or directory."})])
+
+
+def test_verify_change_working_dir_response():
+    verify_change_working_dir_response([console("Working directory /tmp.\n"), result("done")])
+    with pytest.raises(FileNotFoundError, match=r".*No such file or directory.*"):
+        verify_change_working_dir_response([result("error", {"msg": "/nowhere: No such file or directory."})])
@@ -0,0 +1,192 @@
+import os
+import pytest
+from Omni.robotlibraries.gdb.mi_transport import *
+
+
+class FakeIoManager:
+    def __init__(self):
+        stdin_read, stdin_write = os.pipe()
+        stdout_read, stdout_write = os.pipe()
+        self.gdb_stdin = os.fdopen(stdin_read, "rb", 0)
+        self.stdin = os.fdopen(stdin_write, "wb", 0)
+        self.stdout = os.fdopen(stdout_read, "rb", 0)
+        self.gdb_stdout = os.fdopen(stdout_write, "wb", 0)
+        self.stderr = None
+
+    def gdb_says(self, *lines):
+        self.gdb_stdout.write("".join(line + "\n" for line in lines).encode())
+
+    def close(self):
+        for f in (self.gdb_stdin, self.stdin, self.stdout, self.gdb_stdout):
+            f.close()
+
+
+class FakeGdbController:
+    def __init__(self):
+        self.io_manager = FakeIoManager()
+        self.exited = False
+
+    def exit(self):
+        self.exited = True
+
+
+@pytest.fixture
+def fake_controller():
+    controller = FakeGdbController()
+    yield controller
+    controller.io_manager.close()
+
+
+@pytest.fixture
+def transport(fake_controller):
+    transport = MiResultTransport(fake_controller)
+    yield transport
+    transport.exit()
+
+
+def test_transport_writes_command_to_gdb_stdin(fake_controller, transport):
+    fake_controller.io_manager.gdb_says("^done", "(gdb) ")
+    transport.write("-break-delete")
+    assert fake_controller.io_manager.gdb_stdin.read(15) == b"1-break-delete\n"
+
+
+def test_transport_returns_at_result_record(fake_controller, transport):
+    fake_controller.io_manager.gdb_says(
+        '&"pwd\\n"', '~"Working directory /tmp.\\n"', "^done", "(gdb) ")
+    response_list = transport.write("pwd", timeout_sec=5)
+    assert [r["type"] for r in response_list] == ["log", "console", "result"]
+    assert response_list[1]["payload"] == "Working directory /tmp.\n"
+
+
+def test_transport_collects_async_records_before_result(fake_controller, transport):
+    fake_controller.io_manager.gdb_says(
+        '=breakpoint-created,bkpt={number="2",line="16"}',
+        '^done,bkpt={number="2",line="16"}', "(gdb) ")
+    response_list = transport.write("-break-insert --source main.c --line 16")
+    assert response_list[0]["message"] == "breakpoint-created"
+    assert response_list[1]["payload"]["bkpt"]["number"] == "2"
+
+
+def test_transport_queues_records_after_result_for_get_gdb_response(fake_controller, transport):
+    fake_controller.io_manager.gdb_says(
+        "^running", '*running,thread-id="all"', "(gdb) ")
+    response_list = transport.write("-exec-continue")
+    assert len(response_list) == 1
+    fake_controller.io_manager.gdb_says(
+        '*stopped,reason="breakpoint-hit",bkptno="1"')
+    later = transport.get_gdb_response(timeout_sec=1)
+    assert [r["message"] for r in later] == ["running", "stopped"]
+
+
+def test_transport_waits_for_stop_on_stepping_commands(fake_controller, transport):
+    fake_controller.io_manager.gdb_says(
+        "^running", '*running,thread-id="all"',
+        '*stopped,reason="end-stepping-range"', "(gdb) ")
+    response_list = transport.write("-exec-next")
+    assert response_list[-1]["payload"]["reason"] == "end-stepping-range"
+
+
+def test_transport_does_not_wait_for_stop_after_error(fake_controller, transport):
+    fake_controller.io_manager.gdb_says(
+        '^error,msg="The program is not being run."', "(gdb) ")
+    response_list = transport.write("-exec-next", timeout_sec=1)
+    assert response_list[-1]["message"] == "error"
+
+
+def test_transport_reassembles_partial_lines(fake_controller, transport):
+    fake_controller.io_manager.gdb_stdout.write(b'~"Working dir')
+    fake_controller.io_manager.gdb_stdout.write(b'ectory /tmp.\\n"\n^do')
+    fake_controller.io_manager.gdb_stdout.write(b'ne\n')
+    response_list = transport.write("pwd")
+    assert response_list[0]["payload"] == "Working directory /tmp.\n"
+    assert response_list[1]["message"] == "done"
+
+
+def test_transport_waits_for_every_result_of_a_command_list(fake_controller, transport):
+    fake_controller.io_manager.gdb_says("^done", "(gdb) ", "^done", "(gdb) ")
+    response_list = transport.write(["-break-delete", "-gdb-set confirm off"])
+    assert [r["type"] for r in response_list] == ["result", "result"]
+
+
+def test_transport_raises_timeout_without_result(fake_controller, transport):
+    fake_controller.io_manager.gdb_says('~"partial output\\n"')
+    with pytest.raises(GdbTimeoutError):
+        transport.write("pwd", timeout_sec=0.1)
+
+
+def test_transport_returns_partial_response_if_timeout_not_raised(fake_controller, transport):
+    fake_controller.io_manager.gdb_says('~"partial output\\n"')
+    response_list = transport.write(
+        "pwd", timeout_sec=0.1, raise_error_on_timeout=False)
+    assert response_list[0]["payload"] == "partial output\n"
+
+
+def test_transport_get_gdb_response_raises_timeout_without_output(fake_controller, transport):
+    with pytest.raises(GdbTimeoutError):
+        transport.get_gdb_response(timeout_sec=0.1)
+
+
+def test_transport_exit_terminates_gdb(fake_controller, transport):
+    transport.exit()
+    assert fake_controller.exited == True
+
+
+def test_collector_groups_records_by_result_token():
+    collector = TokenResponseCollector([7, 8])
+    collector.add({"type": "console", "message": None, "payload": "a\n"})
+    collector.add({"type": "result", "message": "done", "payload": None, "token": 7})
+    collector.add({"type": "result", "message": "error", "payload": {"msg": "x"}, "token": 8})
+    assert collector.is_complete()
+    assert [len(r) for r in collector.response_lists()] == [2, 1]
+    assert collector.response_lists()[1][0]["message"] == "error"
+
+
+def test_collector_matches_untagged_result_to_oldest_token():
+    collector = TokenResponseCollector([3, 4])
+    collector.add({"type": "result", "message": "done", "payload": None, "token": None})
+    assert collector.responses[3][0]["message"] == "done"
+    assert collector.is_complete() == False
+
+
+def test_tag_commands_prefixes_sequential_tokens():
+    tokens, tagged = tag_commands(["-break-delete", "pwd"], iter([10, 11]))
+    assert tokens == [10, 11]
+    assert tagged == ["10-break-delete", "11pwd"]
+
+
+def test_transport_pipelines_commands_in_one_write(fake_controller, transport):
+    fake_controller.io_manager.gdb_says(
+        '1^done,bkpt={number="1"}', "(gdb) ",
+        '=breakpoint-created,bkpt={number="2"}', '2^done,bkpt={number="2"}', "(gdb) ",
+        '3^error,msg="No line 300 in file \\"main.c\\"."', "(gdb) ")
+    responses = transport.write_pipelined([
+        "-break-insert --source main.c --line 10",
+        "-break-insert --source main.c --line 20",
+        "-break-insert --source main.c --line 300"])
+    sent = fake_controller.io_manager.gdb_stdin.read(200).decode().splitlines()
+    assert [line.split("-")[0] for line in sent] == ["1", "2", "3"]
+    assert responses[0][0]["payload"]["bkpt"]["number"] == "1"
+    assert responses[1][0]["message"] == "breakpoint-created"
+    assert responses[2][-1]["message"] == "error"
+
+
+def test_transport_ignores_result_of_other_tokens(fake_controller, transport):
+    fake_controller.io_manager.gdb_says(
+        "41^done", "(gdb) ", '~"Working directory /tmp.\\n"', "1^done", "(gdb) ")
+    response_list = transport.write("pwd")
+    assert response_list[-1]["token"] == 1
+
+
+def test_transport_publishes_async_records_without_a_command(fake_controller, transport):
+    after_sequence = transport.events.last_sequence
+    fake_controller.io_manager.gdb_says(
+        '*stopped,reason="breakpoint-hit",bkptno="1",thread-id="1"')
+    event = transport.events.wait_for(messages=["stopped"], timeout_sec=5, after_sequence=after_sequence)
+    assert event["payload"]["bkptno"] == "1"
+    assert transport.get_gdb_response(timeout_sec=1)[0]["message"] == "stopped"
+
+
+def test_transport_raises_connection_error_when_gdb_closes_stdout(fake_controller, transport):
+    fake_controller.io_manager.gdb_stdout.close()
+    with pytest.raises(ConnectionError, match=r".*closed its stdout.*"):
+        transport.write("pwd", timeout_sec=5)
@@ -0,0 +1,30 @@
+import pytest
+from Omni.robotlibraries.openocd_tcl import *
+from Omni.tests.fake_openocd import FakeOpenocd
+
+
+@pytest.fixture
+def fake_openocd():
+    server = FakeOpenocd()
+    yield server
+    server.close()
+
+
+def test_openocd_tcl_client_returns_replies(fake_openocd):
+    fake_openocd.replies["version"] = "Open On-Chip Debugger 0.12.0"
+    with OpenocdTclClient("localhost", fake_openocd.tcl_port) as openocd:
+        assert openocd.command("version") == "Open On-Chip Debugger 0.12.0"
+        assert openocd.command("halt") == ""
+    assert fake_openocd.commands == ["version", "halt"]
+
+
+def test_openocd_tcl_client_raises_on_rejected_command(fake_openocd):
+    fake_openocd.replies["rtt start"] = 'invalid command name "rtt"'
+    with OpenocdTclClient("localhost", fake_openocd.tcl_port) as openocd:
+        with pytest.raises(OpenocdError, match=r".*OpenOCD rejected 'rtt start'.*"):
+            openocd.command("rtt start")
+
+
+def test_openocd_tcl_client_raises_on_missing_server():
+    with pytest.raises(OpenocdError, match=r".*Unable to connect to the OpenOCD TCL server.*"):
+        OpenocdTclClient("localhost", 1, 0.5)
@@ -0,0 +1,38 @@
+from Omni.robotlibraries.gdb.pc_profile import *
+from Omni.robotlibraries.gdb.elf_symbols import ElfSymbolIndex, read_elf_symbols
+from Omni.tests.fake_elf import build_elf, STT_FUNC, STB_GLOBAL
+
+
+FUNCTIONS = ElfSymbolIndex(read_elf_symbols(build_elf([("main", 0x08000101, 0x40, STT_FUNC, STB_GLOBAL),
+                                                        ("helper", 0x08000201, 0x10, STT_FUNC, STB_GLOBAL)])))
+
+
+def test_parse_pcsr_reply():
+    assert parse_pcsr_reply("0xe000101c: 08000106 \n") == 0x08000106
+    assert parse_pcsr_reply("0xe000101c: ffffffff \n") is None
+    assert parse_pcsr_reply("Error: target not examined yet\n") is None
+
+
+def test_build_pcsr_read_cmd():
+    assert build_pcsr_read_cmd() == "mdw 0xe000101c"
+
+
+def test_resolve_stacks_maps_addresses_to_functions():
+    stacks = resolve_stacks([(0x08000110, 0x08000204), (0x08000106,), (0x09000000,)], FUNCTIONS.function_at)
+    assert stacks == [("main", "helper"), ("main",), (UNKNOWN_FUNCTION,)]
+
+
+def test_flat_profile_counts_self_and_total_samples():
+    profile = flat_profile([("main", "helper"), ("main", "helper"), ("main",), ("main", "helper", "helper")])
+    assert profile == [
+        {"function": "helper", "self_samples": 3, "self_percent": 75.0, "total_samples": 3, "total_percent": 75.0},
+        {"function": "main", "self_samples": 1, "self_percent": 25.0, "total_samples": 4, "total_percent": 100.0}]
+    assert flat_profile([]) == []
+
+
+def test_collapsed_stacks_folds_identical_stacks(tmp_path):
+    stacks = [("main", "helper"), ("main",), ("main", "helper")]
+    assert collapsed_stacks(stacks) == "main 1\nmain;helper 2\n"
+    path = tmp_path / "profile.folded"
+    write_collapsed_stacks(str(path), stacks)
+    assert path.read_text() == "main 1\nmain;helper 2\n"
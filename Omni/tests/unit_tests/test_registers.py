@@ -0,0 +1,25 @@
+from Omni.robotlibraries.gdb.registers import *
+
+
+def test_register_file_maps_numbers_to_names():
+    registers = RegisterFile()
+    registers.set_names(["r0", "", "pc"])
+    snapshot = registers.store([{"number": "0", "value": "0x1"}, {"number": "1", "value": "0x2"},
+                                {"number": "2", "value": "0x8000100"}, {"number": "7", "value": "0x3"}])
+    assert snapshot == {"r0": 1, "pc": 0x8000100}
+
+
+def test_register_file_keeps_structured_values_as_text():
+    registers = RegisterFile()
+    registers.set_names(["d0"])
+    assert registers.store([{"number": "0", "value": "{u8 = {0x0}}"}]) == {"d0": "{u8 = {0x0}}"}
+
+
+def test_register_file_clear_keeps_names():
+    registers = RegisterFile()
+    registers.set_names(["r0"])
+    registers.store([{"number": "0", "value": "0x1"}])
+    registers.clear({"type": "notify", "message": "running"})
+    assert (registers.names, registers.snapshot) == (["r0"], None)
+    registers.reset_names()
+    assert registers.names is None
@@ -0,0 +1,101 @@
+import threading
+import pytest
+from Omni.robotlibraries.rtt import Rtt, RttError, RttTimeout
+from Omni.robotlibraries.rtt.rtt_stream import *
+from Omni.tests.fake_openocd import FakeOpenocd
+
+
+@pytest.fixture
+def fake_openocd():
+    server = FakeOpenocd()
+    yield server
+    server.close()
+
+
+def test_build_rtt_setup_cmds():
+    assert build_rtt_setup_cmds(0x20000000) == [
+        'rtt setup 0x20000000 0x10000 "SEGGER RTT"', "rtt start", "rtt server start 9090 0"]
+    assert build_rtt_setup_cmds(0x20000000, 0x400, "MY RTT", 1, 19021, polling_interval_ms=10) == [
+        'rtt setup 0x20000000 0x400 "MY RTT"', "rtt polling_interval 10", "rtt start", "rtt server start 19021 1"]
+
+
+def test_rtt_buffer_waits_for_lines_across_chunks():
+    buffer = RttBuffer()
+    buffer.feed(b"boot ok\r\nsensor: 1")
+    buffer.feed(b"2\nsensor: 13\n")
+    assert buffer.wait_for_line(r"sensor: \d+", 0.1) == "sensor: 12"
+    assert buffer.wait_for_line(r"sensor", 0.1) == "sensor: 13"
+    with pytest.raises(RttTimeout, match=r".*No RTT output matching 'boot'.*"):
+        buffer.wait_for_line("boot", 0.01)
+
+
+def test_rtt_buffer_regex_match_consumes_up_to_match():
+    buffer = RttBuffer()
+    buffer.feed(b"state=IDLE state=RUN tail")
+    assert buffer.wait_for_match(r"state=\w+", 0.1) == "state=IDLE"
+    assert buffer.read() == " state=RUN tail"
+    assert buffer.read() == ""
+
+
+def test_rtt_buffer_drops_oldest_bytes_when_full():
+    buffer = RttBuffer(max_bytes=8)
+    buffer.feed(b"0123456789ab")
+    assert buffer.read() == "456789ab"
+    metrics = buffer.metrics()
+    assert metrics["bytes_received"] == 12
+    assert metrics["bytes_dropped"] == 4
+
+
+def test_rtt_buffer_wakes_waiter_on_new_data():
+    buffer = RttBuffer()
+    threading.Timer(0.02, buffer.feed, [b"ready\n"]).start()
+    assert buffer.wait_for_line("ready", 1) == "ready"
+    metrics = buffer.metrics()
+    assert metrics["matches"] == 1
+    assert 0 <= metrics["match_latency_sec"]["max"] < 0.5
+
+
+def test_rtt_buffer_raises_reader_error():
+    buffer = RttBuffer()
+    buffer.close(RttError("RTT server closed the connection"))
+    with pytest.raises(RttError, match=r".*closed the connection.*"):
+        buffer.wait_for_line("never", 1)
+
+
+def test_rtt_library_reports_rejected_openocd_command(fake_openocd):
+    fake_openocd.replies["rtt start"] = 'invalid command name "rtt"'
+    rtt = Rtt()
+    with pytest.raises(RttError, match=r".*OpenOCD rejected 'rtt start'.*"):
+        rtt.start_rtt(0x20000000, rtt_port=fake_openocd.rtt_port, tcl_port=fake_openocd.tcl_port)
+    assert rtt.stream is None
+
+
+def test_rtt_library_streams_channel_output(fake_openocd):
+    rtt = Rtt()
+    rtt.start_rtt("0x20000000", rtt_port=fake_openocd.rtt_port, tcl_port=fake_openocd.tcl_port)
+    assert fake_openocd.commands == ['rtt setup 0x20000000 0x10000 "SEGGER RTT"', "rtt start",
+                                     f"rtt server start {fake_openocd.rtt_port} 0"]
+    fake_openocd.send(b"hello\nvalue=42\n")
+    assert rtt.wait_for_rtt_match(r"value=\d+", 1) == "value=42"
+    fake_openocd.send(b"done\n")
+    assert rtt.wait_for_rtt_line("^done$", 1) == "done"
+    assert rtt.get_rtt_metrics()["bytes_received"] == 20
+    rtt.stop_rtt()
+    assert fake_openocd.commands[-2:] == [f"rtt server stop {fake_openocd.rtt_port}", "rtt stop"]
+
+
+def test_rtt_library_reports_closed_connection(fake_openocd):
+    rtt = Rtt()
+    rtt.start_rtt(0x20000000, rtt_port=fake_openocd.rtt_port, tcl_port=fake_openocd.tcl_port)
+    fake_openocd.close_rtt()
+    with pytest.raises(RttError, match=r".*RTT server closed the connection.*"):
+        rtt.wait_for_rtt_line("never", 2)
+    rtt.stop_rtt()
+
+
+def test_rtt_library_needs_started_stream():
+    rtt = Rtt()
+    with pytest.raises(RttError, match=r".*RTT not started.*"):
+        rtt.wait_for_rtt_line("boot")
+    with pytest.raises(RttError, match=r".*Unable to connect to the OpenOCD TCL server.*"):
+        rtt.start_rtt(0x20000000, tcl_port=1, timeout_sec=0.5)
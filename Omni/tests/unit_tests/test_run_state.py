@@ -0,0 +1,82 @@
+from Omni.robotlibraries.gdb.run_state import *
+
+
+def notify(message, payload=None):
+    return {"type": "notify", "message": message, "payload": payload, "token": None}
+
+
+BREAKPOINT_STOP = notify("stopped", {
+    "reason": "breakpoint-hit", "disp": "keep", "bkptno": "2",
+    "frame": {"addr": "0x08000a72", "func": "main", "file": "main.c",
+              "fullname": "/src/main.c", "line": "24"},
+    "thread-id": "1", "stopped-threads": "all"})
+
+
+def test_run_state_is_unknown_before_any_record():
+    run_state = TargetRunState()
+    assert run_state.is_known() == False
+    assert run_state.state == STATE_UNKNOWN
+
+
+def test_run_state_tracks_breakpoint_stop():
+    run_state = TargetRunState()
+    run_state.update(BREAKPOINT_STOP)
+    assert run_state.state == STATE_STOPPED
+    assert run_state.is_stopped_at_breakpoint()
+    info = run_state.stop_info()
+    assert (info["reason"], info["breakpoint_number"], info["file"], info["line"]) == \
+        ("breakpoint-hit", "2", "main.c", 24)
+    assert info["frame"]["func"] == "main"
+
+
+def test_run_state_running_clears_last_stop():
+    run_state = TargetRunState()
+    run_state.update(BREAKPOINT_STOP)
+    run_state.update(notify("running", {"thread-id": "all"}))
+    assert run_state.state == STATE_RUNNING
+    assert run_state.is_stopped_at_breakpoint() == False
+    assert run_state.stop_info()["breakpoint_number"] == ""
+
+
+def test_run_state_tracks_signal_stop_without_frame_line():
+    run_state = TargetRunState()
+    run_state.update(notify("stopped", {"reason": "signal-received", "signal-name": "SIGINT"}))
+    assert run_state.signal_name == "SIGINT"
+    assert run_state.line == -1
+    assert run_state.is_stopped_at_breakpoint() == False
+
+
+def test_run_state_ignores_other_records():
+    run_state = TargetRunState()
+    run_state.update(notify("breakpoint-modified", {"bkpt": {}}))
+    run_state.update({"type": "console", "message": None, "payload": "stopped\n"})
+    assert run_state.is_known() == False
+
+
+def test_run_state_reset_forgets_state():
+    run_state = TargetRunState()
+    run_state.update(BREAKPOINT_STOP)
+    run_state.reset()
+    assert run_state.is_known() == False
+    assert run_state.stop_info()["reason"] == ""
+
+
+def test_run_state_confirm_stopped_keeps_tracked_stop():
+    run_state = TargetRunState()
+    run_state.update(BREAKPOINT_STOP)
+    run_state.confirm_stopped()
+    assert run_state.is_stopped_at_breakpoint()
+    assert run_state.breakpoint_number == "2"
+    assert run_state.line == 24
+
+
+def test_run_state_confirm_stopped_after_running():
+    run_state = TargetRunState()
+    run_state.update(notify("running", {"thread-id": "all"}))
+    run_state.confirm_stopped("3")
+    assert run_state.state == STATE_STOPPED
+    assert run_state.is_stopped_at_breakpoint()
+    assert run_state.breakpoint_number == "3"
+    run_state.update(notify("running", {"thread-id": "all"}))
+    run_state.confirm_stopped()
+    assert run_state.is_stopped_at_breakpoint() == False
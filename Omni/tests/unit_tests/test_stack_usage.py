@@ -0,0 +1,15 @@
+from Omni.robotlibraries.gdb.stack_usage import *
+
+def test_build_paint_cmd():
+    assert build_paint_cmd(0x2001f000, 4096) == "-data-write-memory-bytes 0x2001f000 a5 4096"
+
+
+def test_stack_usage_finds_high_water_mark():
+    data = bytes([0xa5] * 12 + [0x00, 0xa5, 0x11, 0x22])
+    assert stack_usage(data, 0x1000) == {"start": 0x1000, "size": 16, "used": 4, "free": 12,
+                                         "high_water_address": 0x100c}
+
+
+def test_stack_usage_of_untouched_and_overflowed_stacks():
+    assert stack_usage(bytes([0xa5] * 8), 0)["used"] == 0
+    assert stack_usage(bytes(8), 0)["free"] == 0
@@ -0,0 +1,77 @@
+import os
+import shutil
+import pytest
+from Omni.robotlibraries.gdb.svd import *
+
+svd_test_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "svd_test_data", "test_device.svd")
+
+
+@pytest.fixture
+def svd_path(tmp_path):
+    path = str(tmp_path / "test_device.svd")
+    shutil.copy(svd_test_file, path)
+    return path
+
+
+def test_svd_device_parses_registers_and_fields(svd_path):
+    timer = SvdDevice.load(svd_path).peripheral("TIM2")
+    assert timer.base_address == 0x40000000
+    assert [r.name for r in timer.registers] == ["CR1", "SR", "CCR0", "CCR1"]
+    assert timer.register("CR1").fields == (SvdField("CEN", 0, 1), SvdField("DIR", 4, 1), SvdField("CMS", 5, 2))
+    assert timer.register("SR").size == 16
+    assert timer.register("CCR1").offset == 0x38
+
+
+def test_svd_device_copies_derived_peripherals(svd_path):
+    device = SvdDevice.load(svd_path)
+    assert device.peripheral("TIM3").base_address == 0x40000400
+    assert [r.name for r in device.peripheral("TIM3").registers] == ["CR1", "SR", "CCR0", "CCR1"]
+
+
+def test_svd_device_load_uses_pickled_cache(svd_path, mocker):
+    SvdDevice.load(svd_path)
+    assert os.path.isfile(svd_path + SVD_CACHE_SUFFIX)
+    parse = mocker.patch("Omni.robotlibraries.gdb.svd.parse_svd")
+    assert SvdDevice.load(svd_path).peripheral("TIM2").base_address == 0x40000000
+    parse.assert_not_called()
+
+
+def test_svd_device_unknown_names_raise_exception(svd_path):
+    device = SvdDevice.load(svd_path)
+    with pytest.raises(SvdError, match=r".*Peripheral TIM9 not found.*"):
+        device.peripheral("TIM9")
+    with pytest.raises(SvdError, match=r".*Peripheral TIM2 has no register ARR.*"):
+        device.peripheral("TIM2").register("ARR")
+
+
+def test_svd_peripheral_decodes_register_block(svd_path):
+    timer = SvdDevice.load(svd_path).peripheral("TIM2")
+    assert timer.block_spans(timer.registers) == [(0, 4), (0x10, 2), (0x34, 8)]
+    assert timer.block_spans(timer.readable_registers(["CCR1", "CCR0"])) == [(0x34, 8)]
+    data = bytearray(0x3c)
+    data[0:4] = (0b1010001).to_bytes(4, "little")
+    data[0x10:0x12] = (1).to_bytes(2, "little")
+    data[0x38:0x3c] = (1234).to_bytes(4, "little")
+    values = timer.decode(data, 0)
+    assert values["CR1"] == {"value": 0b1010001, "fields": {"CEN": 1, "DIR": 1, "CMS": 2}}
+    assert values["SR"]["fields"] == {"UIF": 1}
+    assert values["CCR1"] == {"value": 1234, "fields": {}}
+
+
+def test_svd_peripheral_skips_registers_with_read_side_effects(svd_path):
+    usart = SvdDevice.load(svd_path).peripheral("USART1")
+    assert (usart.register("DR").read_action, usart.register("ICR").access) == ("modify", "write-only")
+    assert usart.register("GTPR").read_action == "clear"
+    assert usart.register("SR").access == "read-write"
+    assert [r.name for r in usart.readable_registers()] == ["SR", "BRR"]
+    assert [r.name for r in usart.readable_registers(read_side_effects=True)] == ["SR", "DR", "BRR", "GTPR"]
+    assert usart.block_spans(usart.readable_registers()) == [(0, 4), (8, 4)]
+
+
+def test_svd_peripheral_named_unreadable_registers_raise_exception(svd_path):
+    usart = SvdDevice.load(svd_path).peripheral("USART1")
+    with pytest.raises(SvdError, match=r".*USART1.DR has a read side effect \(modify\).*"):
+        usart.readable_registers(["SR", "DR"])
+    with pytest.raises(SvdError, match=r".*USART1.ICR is write-only.*"):
+        usart.readable_registers(["ICR"], read_side_effects=True)
+    assert [r.name for r in usart.readable_registers(["DR"], read_side_effects=True)] == ["DR"]
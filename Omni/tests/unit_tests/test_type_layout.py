@@ -0,0 +1,132 @@
+import struct
+import numpy
+import pytest
+from Omni.robotlibraries.gdb.type_layout import *
+
+
+PTYPE_TUV = """/* offset      |    size */  type = struct tuv {
+/*      0      |       4 */    int a1;
+/* XXX  4-byte hole      */
+/*      8      |       8 */    char *a2;
+/*     16      |       4 */    int a3;
+
+                               /* total size (bytes):   24 */
+                             }
+"""
+
+PTYPE_NESTED = """/* offset      |    size */  type = struct outer {
+/*      0      |       2 */    unsigned short id;
+/* XXX  2-byte hole      */
+/*      4      |      16 */    struct point {
+/*      4      |       4 */        float x;
+/*      8      |       4 */        float y;
+
+                                   /* total size (bytes):    8 */
+                               } points[2];
+/*     20      |       4 */    union {
+/*                     4 */        unsigned int raw;
+/*                     4 */        unsigned char bytes[4];
+
+                                   /* total size (bytes):    4 */
+                               } word;
+/*     24      |       4 */    counter_t count;
+/*     28      |       4 */    void (*callback)(int);
+
+                               /* total size (bytes):   32 */
+                             }
+"""
+
+PTYPE_BITFIELDS = """/* offset      |    size */  type = struct flags {
+/*      0: 0   |       4 */    int a1 : 1;
+/*      0: 1   |       4 */    int a2 : 3;
+/*      0: 4   |       4 */    unsigned int a3 : 23;
+/*      3: 3   |       1 */    signed char a4 : 2;
+/* XXX  3-bit hole       */
+
+                               /* total size (bytes):    4 */
+                             }
+"""
+
+
+def resolve_counter(type_name):
+    assert type_name == "counter_t"
+    return base_layout("unsigned int", 4)
+
+
+def test_split_array_type():
+    assert split_array_type("struct sample [2][500]") == ("struct sample", [2, 500])
+    assert split_array_type("uint32_t") == ("uint32_t", [])
+
+
+def test_parse_type_layout_reads_offsets_and_holes():
+    layout = parse_type_layout("struct tuv", PTYPE_TUV, "24", None)
+    assert layout["size"] == 24
+    assert [(f["name"], f["offset"], f["layout"]["size"]) for f in layout["fields"]] == [
+        ("a1", 0, 4), ("a2", 8, 8), ("a3", 16, 4)]
+    assert layout["fields"][1]["layout"]["encoding"] == "pointer"
+
+
+def test_parse_type_layout_reads_nested_aggregates_and_arrays():
+    layout = parse_type_layout("struct outer", PTYPE_NESTED, "32", resolve_counter)
+    fields = {f["name"]: f for f in layout["fields"]}
+    points = fields["points"]["layout"]
+    assert (fields["points"]["offset"], points["kind"], points["count"], points["size"]) == (4, "array", 2, 16)
+    assert [(f["name"], f["offset"]) for f in points["element"]["fields"]] == [("x", 0), ("y", 4)]
+    word = fields["word"]["layout"]
+    assert word["kind"] == "union"
+    assert [(f["name"], f["offset"]) for f in word["fields"]] == [("raw", 0), ("bytes", 0)]
+    assert word["fields"][1]["layout"]["count"] == 4
+    assert fields["count"]["layout"]["encoding"] == "unsigned"
+    assert fields["callback"]["layout"]["encoding"] == "pointer"
+
+
+def test_parse_type_layout_of_scalar_and_array_types():
+    assert parse_type_layout("int32_t", "type = int\n", "4", None)["encoding"] == "signed"
+    layout = parse_type_layout("buffer_t", "type = unsigned char [16]\n", "16",
+                               lambda type_name: base_layout(type_name, 1))
+    assert (layout["kind"], layout["count"], layout["size"]) == ("array", 16, 16)
+
+
+def test_parse_type_layout_raise_exception_if_output_unexpected():
+    with pytest.raises(GdbTypeLayoutError, match=r".*Unexpected ptype output.*"):
+        parse_type_layout("struct tuv", "No symbol table is loaded.\n", "0", None)
+
+
+def test_decode_value_decodes_nested_structs():
+    layout = parse_type_layout("struct outer", PTYPE_NESTED, "32", resolve_counter)
+    data = struct.pack("<H2xffffIIL", 7, 1.5, -2.0, 0.25, 4.0, 0x04030201, 9, 0x08000101)
+    assert decode_value(layout, data) == {
+        "id": 7,
+        "points": [{"x": 1.5, "y": -2.0}, {"x": 0.25, "y": 4.0}],
+        "word": {"raw": 0x04030201, "bytes": [1, 2, 3, 4]},
+        "count": 9,
+        "callback": 0x08000101}
+
+
+def test_decode_value_extracts_bitfields():
+    layout = parse_type_layout("struct flags", PTYPE_BITFIELDS, "4", None)
+    raw = 1 | (5 << 1) | (0x1234 << 4) | (0b11 << 27)
+    assert decode_value(layout, raw.to_bytes(4, "little")) == {"a1": -1, "a2": -3, "a3": 0x1234, "a4": -1}
+
+
+def test_layout_dtype_decodes_arrays_of_structs_vectorized():
+    layout = parse_type_layout("struct tuv", PTYPE_TUV, "24", None)
+    dtype = layout_dtype(layout)
+    assert dtype.itemsize == 24
+    data = b"".join(struct.pack("<i4xQi4x", i, 0x1000 + i, -i) for i in range(500))
+    samples = numpy.frombuffer(data, dtype=dtype)
+    assert samples["a1"][499] == 499
+    assert samples["a3"].sum() == -sum(range(500))
+
+
+def test_layout_dtype_skips_bitfields():
+    layout = parse_type_layout("struct flags", PTYPE_BITFIELDS, "4", None)
+    assert layout_dtype(layout).names == ()
+
+
+def test_type_layout_cache_persists_per_elf_hash(tmp_path):
+    cache_path = str(tmp_path / "firmware.elf.omni-types.json")
+    layouts = TypeLayoutCache(cache_path, "abc")
+    layouts.store("int", base_layout("int", 4))
+    assert "int" in TypeLayoutCache(cache_path, "abc")
+    assert len(TypeLayoutCache(cache_path, "def")) == 0
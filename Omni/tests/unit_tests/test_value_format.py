@@ -0,0 +1,42 @@
+from Omni.robotlibraries.gdb.value_format import *
+
+
+def test_integer_type_signedness():
+    assert integer_type_is_signed("int") == True
+    assert integer_type_is_signed("long long") == True
+    assert integer_type_is_signed("unsigned short") == False
+    assert integer_type_is_signed("_Bool") == False
+    assert integer_type_is_signed("uint8_t *") == False
+
+
+def test_types_not_rendered_on_host():
+    assert integer_type_is_signed("char") is None
+    assert integer_type_is_signed("float") is None
+    assert integer_type_is_signed("struct {") is None
+    assert integer_type_is_signed("enum {RED, GREEN}") is None
+
+
+def test_render_integer_like_gdb_print_formats():
+    assert render_integer(0xfffffffe, 4, True, "dec") == "-2"
+    assert render_integer(0xfffffffe, 4, False, "dec") == "4294967294"
+    assert render_integer(0xfe, 1, True, "hex") == "0xfe"
+    assert render_integer(0x3, 2, True, "bin") == "11"
+    assert render_integer(0, 4, True, "bin") == "0"
+
+
+def test_value_cache_renders_other_formats_of_scalars():
+    cache = ObjectValueCache()
+    cache.store("counter", "hex", "0xffff")
+    cache.store_raw("counter", "0xffff", "short", "2")
+    assert cache.get("counter", "hex") == "0xffff"
+    assert cache.get("counter", "dec") == "-1"
+    assert cache.get("counter", "bin") == "1" * 16
+
+
+def test_value_cache_does_not_render_aggregates():
+    cache = ObjectValueCache()
+    cache.store("my_struct", "hex", "{a = 0x1}")
+    cache.store_raw("my_struct", "{a = 0x1}", "struct {", "4")
+    assert cache.get("my_struct", "dec") is None
+    cache.clear()
+    assert "my_struct" not in cache
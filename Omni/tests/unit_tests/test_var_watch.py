@@ -0,0 +1,26 @@
+from Omni.robotlibraries.gdb.var_watch import *
+
+
+def test_watch_set_names_variable_objects_uniquely():
+    watches = VariableWatchSet()
+    names, commands = watches.create_cmds(["a", "b"], format="bin")
+    assert names == ["omni_watch1", "omni_watch2"]
+    assert commands[1] == "-var-set-format omni_watch1 binary"
+    assert watches.create_cmds(["a"])[0] == ["omni_watch3"]
+
+
+def test_watch_set_ignores_changes_of_foreign_variable_objects():
+    watches = VariableWatchSet()
+    watches.add("a", "omni_watch1", "1")
+    changes = watches.apply_changes([{"name": "var7", "value": "2", "in_scope": "true"},
+                                     {"name": "omni_watch1", "value": "5", "in_scope": "true"}])
+    assert changes == {"a": "5"}
+
+
+def test_watch_set_readding_expression_replaces_variable_object():
+    watches = VariableWatchSet()
+    watches.add("a", "omni_watch1", "1")
+    watches.add("a", "omni_watch2", "1")
+    assert watches.name_of("a") == "omni_watch2"
+    assert watches.apply_changes([{"name": "omni_watch1", "value": "9"}]) == {}
+    assert len(watches) == 1
@@ -0,0 +1,41 @@
+import os
+import numpy
+from Omni.robotlibraries.gdb.watch_trace import *
+
+
+def test_parse_watch_value():
+    assert parse_watch_value("42", numpy.int32) == 42
+    assert parse_watch_value("-7", numpy.int16) == -7
+    assert parse_watch_value("65 'A'", numpy.uint8) == 65
+    assert parse_watch_value("true", numpy.uint8) == True
+    assert parse_watch_value("1.5", numpy.float32) == 1.5
+    assert parse_watch_value("0x20000010 <buffer>", numpy.uint32) == 0x20000010
+    assert parse_watch_value("(int *) 0x20000010 <buffer>", numpy.uint32) == 0x20000010
+    assert parse_watch_value("(void (*)(void)) 0x8000101 <handler>", numpy.uint32) == 0x8000101
+
+
+def test_trace_records_have_fixed_size():
+    assert trace_dtype(numpy.int32).itemsize == 24
+    assert trace_dtype("<f8").names == ("timestamp", "pc", "old", "new")
+
+
+def test_trace_written_and_memory_mapped(tmp_path):
+    path = str(tmp_path / "traces" / "counter.trace")
+    writer = WatchTraceWriter(path, "counter", "<i4", capacity=10)
+    writer.append(1.0, 0x08000120, 0, 1)
+    writer.append(2.0, 0x08000200, 1, -3)
+    writer.close()
+    assert os.path.getsize(path) == 2 * 24
+    records = load_trace(path)
+    assert records["pc"].tolist() == [0x08000120, 0x08000200]
+    assert records["old"].tolist() == [0, 1]
+    assert records["new"].tolist() == [1, -3]
+    assert records["timestamp"].tolist() == [1.0, 2.0]
+
+
+def test_empty_trace(tmp_path):
+    path = str(tmp_path / "counter.trace")
+    writer = WatchTraceWriter(path, "counter", "<u2", capacity=0)
+    assert writer.is_full()
+    writer.close()
+    assert len(load_trace(path)) == 0